@@ -1,10 +1,16 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import User
 from django.utils.html import format_html
 from django.urls import reverse
 from django.utils.safestring import mark_safe
 from .models import *
+from .importacion_pagos import importar_pagos
 
 
 # Inline para PerfilUsuario
@@ -156,10 +162,68 @@ class AlertaSeguridadAdmin(admin.ModelAdmin):
     actions = ['marcar_como_revisada']
     
     def marcar_como_revisada(self, request, queryset):
-        queryset.update(revisada=True, revisada_por=request.user.perfil)
+        queryset.update(revisada=True, revisada_por=request.user.perfil, fecha_modificacion=timezone.now())
     marcar_como_revisada.short_description = "Marcar alertas seleccionadas como revisadas"
 
 
+@admin.register(SaldoUnidad)
+class SaldoUnidadAdmin(admin.ModelAdmin):
+    list_display = ['unidad', 'total_pendiente', 'total_vencido', 'cuotas_pendientes',
+                   'proximo_vencimiento', 'fecha_actualizacion']
+    list_filter = ['unidad__condominio']
+    search_fields = ['unidad__numero']
+    readonly_fields = ['unidad', 'total_pendiente', 'total_vencido', 'cuotas_pendientes',
+                      'pagado_año', 'año', 'proximo_vencimiento', 'fecha_actualizacion']
+
+
+class ImportarPagosForm(forms.Form):
+    archivo = forms.FileField(help_text="Extracto bancario en CSV (fecha, monto, referencia, unidad y opcionalmente bloque) u OFX")
+    metodo_pago = forms.ModelChoiceField(queryset=MetodoPago.objects.filter(activo=True).select_related('condominio'),
+                                         help_text="Define también el condominio")
+    simulacion = forms.BooleanField(required=False, initial=True,
+                                    help_text="Solo conciliar y mostrar el resultado, sin guardar")
+
+
+@admin.register(Pago)
+class PagoAdmin(admin.ModelAdmin):
+    list_display = ['numero_transaccion', 'cuota', 'monto_pagado', 'metodo_pago', 'fecha_pago', 'estado']
+    list_filter = ['estado', 'metodo_pago', 'cuota__unidad__condominio']
+    search_fields = ['numero_transaccion', 'numero_comprobante', 'cuota__unidad__numero']
+    date_hierarchy = 'fecha_pago'
+    list_select_related = ['cuota__unidad', 'cuota__configuracion', 'metodo_pago']
+    raw_id_fields = ['cuota', 'registrado_por', 'verificado_por']
+    change_list_template = 'admin/comunidad/pago/change_list.html'
+    
+    def get_urls(self):
+        return [
+            path('importar/', self.admin_site.admin_view(self.importar_extracto), name='comunidad_pago_importar'),
+        ] + super().get_urls()
+    
+    def importar_extracto(self, request):
+        """Carga de extractos bancarios para conciliar pagos en bloque"""
+        if not self.has_add_permission(request):
+            return redirect('admin:comunidad_pago_changelist')
+        
+        resumen = None
+        form = ImportarPagosForm(request.POST or None, request.FILES or None)
+        if request.method == 'POST' and form.is_valid():
+            metodo_pago = form.cleaned_data['metodo_pago']
+            resumen = importar_pagos(
+                form.cleaned_data['archivo'], metodo_pago.condominio_id, metodo_pago,
+                request.user.perfil, simulacion=form.cleaned_data['simulacion']
+            )
+            if not resumen['simulacion']:
+                messages.success(request, f"{resumen['conciliadas']} pagos importados")
+        
+        return TemplateResponse(request, 'admin/comunidad/pago/importar.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': 'Importar extracto bancario',
+            'form': form,
+            'resumen': resumen,
+        })
+
+
 # Configuración del sitio admin
 admin.site.site_header = "Smart Condominium - Administración"
 admin.site.site_title = "Smart Condominium"
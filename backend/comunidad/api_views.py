@@ -36,11 +36,23 @@ def api_home(request):
             },
             'notificaciones': {
                 'obtener': '/api/notificaciones/',
+                'marcar_leidas': '/api/notificaciones/leer/',
             },
             'perfil': {
                 'consultar': '/api/perfil/',
                 'actualizar': '/api/perfil/ (PUT)',
             },
+            'comunicados': {
+                'registrar_lectura': '/api/comunicados/<id>/leer/',
+                'comentarios': '/api/comunicados/<id>/comentarios/',
+            },
+            'ia': {
+                'reconocimiento_facial': '/api/ia/reconocimiento-facial/',
+                'deteccion_vehiculos': '/api/ia/deteccion-vehiculos/',
+            },
+            'sincronizacion': {
+                'cambios': '/api/sync/?since=<cursor>',
+            },
             'admin': {
                 'panel': '/admin/',
             }
@@ -0,0 +1,137 @@
+from datetime import date, timedelta
+from itertools import islice
+
+from django.utils import timezone
+
+from .models import CuotaMantenimiento, NotificacionUsuario, PerfilUsuario
+
+
+TAMAÑO_LOTE = 1000
+
+# Los recordatorios de pago se escriben con esta anticipación al vencimiento
+DIAS_AVISO_VENCIMIENTO = 7
+
+LARGO_MENSAJE_COMUNICADO = 300
+
+
+def entregar(notificaciones, tamaño_lote=TAMAÑO_LOTE):
+    """
+    Fan-out: inserta las notificaciones (una por destinatario) en lotes.
+    Las que ya existen para la misma referencia y usuario se ignoran, así que
+    repetir una entrega no duplica la bandeja. Devuelve cuántas se intentaron.
+    """
+    notificaciones = iter(notificaciones)
+    total = 0
+    while lote := list(islice(notificaciones, tamaño_lote)):
+        NotificacionUsuario.objects.bulk_create(lote, ignore_conflicts=True)
+        total += len(lote)
+    return total
+
+
+def notificar(usuario_ids, referencia, **campos):
+    """La misma notificación para cada usuario de `usuario_ids` (ids o queryset de ids)"""
+    campos.setdefault('fecha', timezone.now())
+    if hasattr(usuario_ids, 'iterator'):
+        usuario_ids = usuario_ids.iterator()
+    return entregar(
+        NotificacionUsuario(usuario_id=usuario_id, referencia=referencia, **campos)
+        for usuario_id in usuario_ids
+    )
+
+
+# =====================================
+# AUDIENCIAS
+# =====================================
+
+def usuarios_condominio(condominio_id):
+    """Ids de los perfiles activos del condominio, en una sola consulta"""
+    return PerfilUsuario.objects.filter(condominio_id=condominio_id, activo=True).values_list('id', flat=True)
+
+
+def destinatarios_comunicado(comunicado):
+    """Ids de los perfiles a los que va dirigido el comunicado según su audiencia"""
+    perfiles = PerfilUsuario.objects.filter(condominio_id=comunicado.condominio_id, activo=True)
+    if comunicado.audiencia == 'PROPIETARIOS':
+        perfiles = perfiles.filter(residencias__activa=True, residencias__es_propietario=True)
+    elif comunicado.audiencia == 'INQUILINOS':
+        perfiles = perfiles.filter(residencias__activa=True, residencias__es_propietario=False)
+    elif comunicado.audiencia == 'ADMINISTRACION':
+        perfiles = perfiles.filter(tipo_usuario__tipo='ADMINISTRADOR')
+    elif comunicado.audiencia == 'PERSONALIZADA':
+        perfiles = perfiles.filter(
+            residencias__activa=True,
+            residencias__unidad__in=comunicado.unidades_especificas.values('pk')
+        )
+    return perfiles.values_list('id', flat=True).distinct()
+
+
+# =====================================
+# EVENTOS
+# =====================================
+
+def notificar_alerta(alerta):
+    """Una alerta de seguridad llega a todos los usuarios del condominio"""
+    return notificar(
+        usuarios_condominio(alerta.condominio_id),
+        referencia=f'alerta:{alerta.pk}',
+        tipo='EMERGENCIA' if alerta.nivel == 'CRITICA' else 'ALERTA',
+        prioridad=alerta.nivel,
+        titulo=alerta.get_tipo_alerta_display(),
+        mensaje=alerta.descripcion,
+        datos={'alerta_id': alerta.pk},
+        fecha=alerta.fecha_hora,
+    )
+
+
+def comunicado_entregado(comunicado):
+    return NotificacionUsuario.objects.filter(referencia=f'comunicado:{comunicado.pk}').exists()
+
+
+def notificar_comunicado(comunicado, usuario_ids=None):
+    """
+    Entrega un comunicado publicado a su audiencia, o a `usuario_ids` si ya se
+    resolvió. Si ya se entregó (por ejemplo, al volver a guardarlo) no hace nada.
+    """
+    if comunicado_entregado(comunicado):
+        return 0
+    if usuario_ids is None:
+        usuario_ids = destinatarios_comunicado(comunicado)
+    return notificar(
+        usuario_ids,
+        referencia=f'comunicado:{comunicado.pk}',
+        tipo='EMERGENCIA' if comunicado.es_urgente else 'AVISO',
+        prioridad='ALTA' if comunicado.es_urgente else 'MEDIA',
+        titulo=comunicado.titulo,
+        mensaje=comunicado.resumen or comunicado.contenido[:LARGO_MENSAJE_COMUNICADO],
+        datos={'comunicado_id': comunicado.pk},
+        fecha=comunicado.fecha_publicacion or timezone.now(),
+    )
+
+
+def recordar_vencimientos(hoy=None, dias=DIAS_AVISO_VENCIMIENTO):
+    """
+    Recordatorio para los residentes de cada cuota pendiente que vence en los
+    próximos `dias`, con una sola consulta. Pensado para correr cada día: un
+    recordatorio ya entregado no se repite.
+    """
+    hoy = hoy or date.today()
+    ahora = timezone.now()
+    filas = CuotaMantenimiento.objects.filter(
+        estado='PENDIENTE',
+        fecha_vencimiento__range=(hoy, hoy + timedelta(days=dias)),
+        unidad__residentes__activa=True
+    ).values_list('id', 'unidad__residentes__usuario_id', 'fecha_vencimiento', 'monto_total').iterator()
+
+    return entregar(
+        NotificacionUsuario(
+            usuario_id=usuario_id,
+            referencia=f'cuota:{cuota_id}:vencimiento',
+            tipo='PAGO',
+            prioridad='ALTA' if (vencimiento - hoy).days <= 3 else 'MEDIA',
+            titulo='Cuota próxima a vencer',
+            mensaje=f"Su cuota vence el {vencimiento.strftime('%d/%m/%Y')}. Monto: ${monto}",
+            datos={'cuota_id': cuota_id},
+            fecha=ahora,
+        )
+        for cuota_id, usuario_id, vencimiento, monto in filas
+    )
@@ -0,0 +1,73 @@
+import uuid
+
+from django.core.cache import cache
+
+from .etags import etag_de
+from .models import AreaComun, MetodoPago, TipoUnidad, TipoUsuario
+from .serializers import AreaComunSerializer, MetodoPagoSerializer, TipoUnidadSerializer, TipoUsuarioSerializer
+
+
+# Los catálogos globales no dependen del condominio
+GLOBAL = 'global'
+
+
+def _areas(condominio_id):
+    return AreaComunSerializer(
+        AreaComun.objects.filter(condominio_id=condominio_id, activa=True).order_by('nombre'), many=True
+    ).data
+
+
+def _metodos_pago(condominio_id):
+    return MetodoPagoSerializer(
+        MetodoPago.objects.filter(condominio_id=condominio_id, activo=True).order_by('nombre'), many=True
+    ).data
+
+
+def _tipos_unidad(condominio_id):
+    return TipoUnidadSerializer(TipoUnidad.objects.order_by('nombre'), many=True).data
+
+
+def _tipos_usuario(condominio_id):
+    return TipoUsuarioSerializer(TipoUsuario.objects.order_by('tipo'), many=True).data
+
+
+# nombre -> (construcción, si es por condominio)
+CATALOGOS = {
+    'areas': (_areas, True),
+    'metodos_pago': (_metodos_pago, True),
+    'tipos_unidad': (_tipos_unidad, False),
+    'tipos_usuario': (_tipos_usuario, False),
+}
+
+
+def _ambito(nombre, condominio_id):
+    return str(condominio_id) if CATALOGOS[nombre][1] else GLOBAL
+
+
+def _clave_version(nombre, ambito):
+    return f'catalogo:{nombre}:{ambito}:version'
+
+
+def obtener_catalogo(nombre, condominio_id):
+    """
+    Datos serializados del catálogo y su ETag, desde el cache mientras no
+    cambie la versión del catálogo para ese condominio
+    """
+    ambito = _ambito(nombre, condominio_id)
+    version = cache.get(_clave_version(nombre, ambito), 0)
+    clave = f'catalogo:{nombre}:{ambito}:{version}'
+    
+    entrada = cache.get(clave)
+    if entrada is None:
+        datos = list(CATALOGOS[nombre][0](condominio_id))
+        entrada = {'datos': datos, 'etag': etag_de(nombre, ambito, datos)}
+        cache.set(clave, entrada)
+    return entrada['datos'], entrada['etag']
+
+
+def invalidar_catalogo(nombre, condominio_id=None):
+    """
+    Las entradas anteriores dejan de usarse al cambiar la versión. Es un UUID
+    para que, si el cache descarta la clave, no se vuelva a una versión vieja.
+    """
+    cache.set(_clave_version(nombre, _ambito(nombre, condominio_id)), uuid.uuid4().hex, None)
@@ -0,0 +1,51 @@
+from django.db.models import Q
+
+from .models import ComentarioComunicado
+
+
+HILOS_POR_PAGINA = 20
+
+
+def cargar_hilos(comunicado_id, despues=None, tamaño=None):
+    """
+    Una página de hilos de comentarios del comunicado con todas sus
+    respuestas, en una sola consulta: las raíces de la página van como
+    subconsulta y las respuestas se traen por su columna `hilo`. Devuelve las
+    filas ordenadas por id (cada padre antes que sus respuestas) y si quedan
+    más hilos después de la página.
+    """
+    tamaño = tamaño or HILOS_POR_PAGINA
+    raices = ComentarioComunicado.objects.filter(comunicado_id=comunicado_id, padre__isnull=True, moderado=True)
+    if despues is not None:
+        raices = raices.filter(id__gt=despues)
+    # Un hilo de más para saber si hay otra página; se descarta en memoria
+    pagina = raices.order_by('id').values('id')[:tamaño + 1]
+
+    filas = list(
+        ComentarioComunicado.objects.filter(Q(pk__in=pagina) | Q(hilo__in=pagina), moderado=True)
+        .select_related('usuario__user')
+        .order_by('id')
+    )
+    ids_raices = [fila.id for fila in filas if fila.padre_id is None]
+    if len(ids_raices) <= tamaño:
+        return filas, False
+    sobrante = ids_raices[tamaño]
+    return [fila for fila in filas if sobrante not in (fila.id, fila.hilo_id)], True
+
+
+def anidar(comentarios):
+    """
+    Arma el árbol en O(n) a partir de los comentarios serializados en orden de
+    id. Las respuestas cuyo padre no está (no moderado) quedan fuera.
+    """
+    por_id, hilos = {}, []
+    for comentario in comentarios:
+        nodo = {**comentario, 'respuestas': []}
+        if nodo['padre'] is None:
+            hilos.append(nodo)
+        elif nodo['padre'] in por_id:
+            por_id[nodo['padre']]['respuestas'].append(nodo)
+        else:
+            continue
+        por_id[nodo['id']] = nodo
+    return hilos
@@ -0,0 +1,57 @@
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+@lru_cache(maxsize=None)
+def plan_de_carga(serializer_class):
+    """
+    Deriva del árbol de un serializer las relaciones que hay que cargar por
+    adelantado para serializar una lista sin consultas N+1.
+
+    Devuelve (select_related, prefetch_related). Las relaciones directas (FK y
+    OneToOne) van a select_related; las inversas y ManyToMany, y todo lo que
+    cuelgue de ellas, a prefetch_related.
+    """
+    select, prefetch = set(), set()
+    _recorrer(serializer_class(), serializer_class.Meta.model, '', False, select, prefetch)
+    return tuple(sorted(select)), tuple(sorted(prefetch))
+
+
+def optimizar_queryset(queryset, serializer_class):
+    """Aplica al queryset el plan de carga del serializer"""
+    select, prefetch = plan_de_carga(serializer_class)
+    return queryset.select_related(*select).prefetch_related(*prefetch)
+
+
+def _recorrer(serializer, modelo, prefijo, en_prefetch, select, prefetch):
+    for campo in serializer.fields.values():
+        if campo.source == '*':
+            continue
+
+        # Un PK de una relación directa se lee de la columna <relación>_id
+        if isinstance(campo, serializers.PrimaryKeyRelatedField) and len(campo.source_attrs) == 1:
+            continue
+
+        ruta, modelo_actual, multiple = prefijo, modelo, en_prefetch
+        recorrio_todo = True
+        for attr in campo.source_attrs:
+            try:
+                campo_modelo = modelo_actual._meta.get_field(attr)
+            except FieldDoesNotExist:
+                recorrio_todo = False
+                break
+            if not campo_modelo.is_relation:
+                recorrio_todo = False
+                break
+
+            ruta = f'{ruta}__{attr}' if ruta else attr
+            multiple = multiple or campo_modelo.one_to_many or campo_modelo.many_to_many
+            modelo_actual = campo_modelo.related_model
+            (prefetch if multiple else select).add(ruta)
+
+        # Serializers anidados: se sigue recorriendo desde el modelo relacionado
+        anidado = campo.child if isinstance(campo, serializers.ListSerializer) else campo
+        if recorrio_todo and ruta != prefijo and isinstance(anidado, serializers.BaseSerializer):
+            _recorrer(anidado, modelo_actual, ruta, multiple, select, prefetch)
@@ -0,0 +1,205 @@
+import calendar
+import unicodedata
+import uuid
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from itertools import islice
+
+from django.core.cache import cache
+
+from .models import ReservaAreaComun
+
+
+# Estados de reserva que ocupan el área
+ESTADOS_RESERVA_ACTIVOS = ['PENDIENTE', 'CONFIRMADA']
+
+# Como se guardan en AreaComun.dias_disponibles, en el orden de date.weekday()
+DIAS_SEMANA = ['lunes', 'martes', 'miercoles', 'jueves', 'viernes', 'sabado', 'domingo']
+
+MAX_DIAS_CONSULTA = 92
+
+MAX_OCURRENCIAS = 366
+
+# Distancia máxima entre fecha_inicio y fecha_fin de una reserva recurrente
+MAX_DIAS_RECURRENCIA = 2 * 366
+
+CACHE_TIMEOUT = 60 * 15
+
+
+def _normalizar_dia(dia):
+    return unicodedata.normalize('NFKD', str(dia)).encode('ascii', 'ignore').decode().strip().lower()
+
+
+def dias_habilitados(area):
+    """Días de la semana (0 = lunes) en que se puede reservar; una lista vacía habilita todos"""
+    dias = {_normalizar_dia(dia) for dia in area.dias_disponibles or []}
+    if not dias:
+        return set(range(7))
+    return {numero for numero, nombre in enumerate(DIAS_SEMANA) if nombre in dias}
+
+
+def horario_permitido(area, fecha, hora_inicio, hora_fin):
+    """Si el horario cae dentro de los días y horas de atención del área"""
+    return (
+        fecha.weekday() in dias_habilitados(area)
+        and area.hora_apertura <= hora_inicio < hora_fin <= area.hora_cierre
+    )
+
+
+def costo_reserva(area, hora_inicio, hora_fin):
+    """precio_por_hora por la duración de la reserva"""
+    minutos = (datetime.combine(date.min, hora_fin) - datetime.combine(date.min, hora_inicio)).seconds // 60
+    return (area.precio_por_hora * Decimal(minutos) / 60).quantize(Decimal('0.01'))
+
+
+def franjas_libres(apertura, cierre, ocupadas):
+    """
+    Recorre las reservas de un día ordenadas por hora de inicio y devuelve los
+    intervalos libres entre apertura y cierre. Las reservas solapadas se
+    fusionan al avanzar el cursor.
+    """
+    libres, cursor = [], apertura
+    for inicio, fin in ocupadas:
+        if fin <= cursor:
+            continue
+        if inicio > cursor:
+            libres.append((cursor, min(inicio, cierre)))
+        cursor = max(cursor, fin)
+        if cursor >= cierre:
+            break
+    if cursor < cierre:
+        libres.append((cursor, cierre))
+    return [(inicio, fin) for inicio, fin in libres if inicio < fin]
+
+
+def calcular_disponibilidad(areas, desde, hasta):
+    """
+    Disponibilidad de varias áreas entre dos fechas (inclusive) con una sola
+    consulta de reservas. Devuelve {area_id: [día, ...]}.
+    """
+    ocupadas = defaultdict(list)
+    reservas = ReservaAreaComun.objects.filter(
+        area_comun__in=[area.pk for area in areas],
+        fecha_reserva__range=(desde, hasta),
+        estado__in=ESTADOS_RESERVA_ACTIVOS
+    ).order_by('area_comun_id', 'fecha_reserva', 'hora_inicio').values_list(
+        'area_comun_id', 'fecha_reserva', 'hora_inicio', 'hora_fin'
+    )
+    for area_id, fecha, inicio, fin in reservas:
+        ocupadas[area_id, fecha].append((inicio, fin))
+
+    fechas = [desde + timedelta(days=n) for n in range((hasta - desde).days + 1)]
+    resultado = {}
+    for area in areas:
+        habilitados = dias_habilitados(area)
+        dias = []
+        for fecha in fechas:
+            reservas_dia = ocupadas.get((area.pk, fecha), [])
+            libres = (
+                franjas_libres(area.hora_apertura, area.hora_cierre, reservas_dia)
+                if area.activa and fecha.weekday() in habilitados else []
+            )
+            dias.append({
+                'fecha': fecha.isoformat(),
+                'disponible': bool(libres),
+                'libres': [{'hora_inicio': i.isoformat(), 'hora_fin': f.isoformat()} for i, f in libres],
+                'ocupadas': [{'hora_inicio': i.isoformat(), 'hora_fin': f.isoformat()} for i, f in reservas_dia],
+            })
+        resultado[area.pk] = dias
+    return resultado
+
+
+def _fechas_regla(fecha_inicio, fecha_fin, frecuencia, intervalo, dias_semana):
+    if frecuencia == 'DIARIA':
+        paso = timedelta(days=intervalo)
+        fecha = fecha_inicio
+        while fecha <= fecha_fin:
+            yield fecha
+            fecha += paso
+    elif frecuencia == 'SEMANAL':
+        dias = sorted(set(dias_semana or [fecha_inicio.weekday()]))
+        lunes = fecha_inicio - timedelta(days=fecha_inicio.weekday())
+        while lunes <= fecha_fin:
+            yield from (
+                fecha for fecha in (lunes + timedelta(days=dia) for dia in dias)
+                if fecha_inicio <= fecha <= fecha_fin
+            )
+            lunes += timedelta(weeks=intervalo)
+    elif frecuencia == 'MENSUAL':
+        año, mes = fecha_inicio.year, fecha_inicio.month
+        while date(año, mes, 1) <= fecha_fin:
+            if fecha_inicio.day <= calendar.monthrange(año, mes)[1]:
+                fecha = date(año, mes, fecha_inicio.day)
+                if fecha <= fecha_fin:
+                    yield fecha
+            año, mes = año + (mes - 1 + intervalo) // 12, (mes - 1 + intervalo) % 12 + 1
+
+
+def fechas_recurrentes(fecha_inicio, fecha_fin, frecuencia, intervalo=1, dias_semana=None,
+                       limite=MAX_OCURRENCIAS + 1):
+    """
+    Fechas de una regla de recurrencia entre fecha_inicio y fecha_fin
+    (inclusive). SEMANAL usa dias_semana (0 = lunes) o el día de fecha_inicio;
+    MENSUAL repite el día del mes y omite los meses que no lo tienen. Se
+    generan a lo sumo `limite` fechas: con una más de MAX_OCURRENCIAS ya se
+    sabe que la regla se pasa.
+    """
+    return list(islice(_fechas_regla(fecha_inicio, fecha_fin, frecuencia, intervalo, dias_semana), limite))
+
+
+def conflictos_recurrentes(area, fechas, hora_inicio, hora_fin):
+    """
+    Motivo de rechazo de cada fecha que no se puede reservar, con una sola
+    consulta de reservas solapadas para todas las fechas
+    """
+    ocupadas = set(ReservaAreaComun.objects.filter(
+        area_comun=area,
+        fecha_reserva__in=fechas,
+        estado__in=ESTADOS_RESERVA_ACTIVOS,
+        hora_inicio__lt=hora_fin,
+        hora_fin__gt=hora_inicio
+    ).values_list('fecha_reserva', flat=True))
+
+    conflictos = {}
+    for fecha in fechas:
+        if fecha in ocupadas:
+            conflictos[fecha] = 'El área ya está reservada en ese horario'
+        elif not horario_permitido(area, fecha, hora_inicio, hora_fin):
+            conflictos[fecha] = 'El área no atiende en ese día u horario'
+    return conflictos
+
+
+# =====================================
+# CACHE
+# =====================================
+
+def _clave_version(area_id):
+    return f'disponibilidad:version:{area_id}'
+
+
+def invalidar_disponibilidad(area_id):
+    """
+    Cambia la versión del área para que las entradas anteriores dejen de
+    usarse. La versión es un UUID y no un contador: si el cache descarta la
+    clave, un contador reiniciado volvería a una versión con entradas viejas.
+    """
+    cache.set(_clave_version(area_id), uuid.uuid4().hex, None)
+
+
+def obtener_disponibilidad(areas, desde, hasta):
+    """calcular_disponibilidad() con cache por área y rango, invalidado al cambiar sus reservas"""
+    versiones = cache.get_many([_clave_version(area.pk) for area in areas])
+    claves = {
+        area.pk: f'disponibilidad:{area.pk}:{versiones.get(_clave_version(area.pk), 0)}:{desde}:{hasta}'
+        for area in areas
+    }
+    en_cache = cache.get_many(claves.values())
+
+    resultado = {area_id: en_cache[clave] for area_id, clave in claves.items() if clave in en_cache}
+    faltantes = [area for area in areas if area.pk not in resultado]
+    if faltantes:
+        calculados = calcular_disponibilidad(faltantes, desde, hasta)
+        cache.set_many({claves[area_id]: dias for area_id, dias in calculados.items()}, CACHE_TIMEOUT)
+        resultado.update(calculados)
+    return resultado
@@ -0,0 +1,37 @@
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def etag_de(*partes):
+    """ETag débil a partir de datos serializables (o de tokens de versión)"""
+    contenido = json.dumps(partes, cls=DjangoJSONEncoder, sort_keys=True, separators=(',', ':'))
+    return 'W/' + quote_etag(hashlib.md5(contenido.encode()).hexdigest())
+
+
+def coincide_etag(request, etag):
+    """Si el cliente ya tiene esta versión (If-None-Match)"""
+    encabezado = request.headers.get('If-None-Match')
+    if not encabezado:
+        return False
+    etiquetas = parse_etags(encabezado)
+    return '*' in etiquetas or etag.removeprefix('W/') in {e.removeprefix('W/') for e in etiquetas}
+
+
+def respuesta_con_etag(request, datos, etag=None):
+    """
+    Responde los datos con su ETag, o 304 sin cuerpo si el cliente ya tiene
+    esa versión. Sin etag explícito se calcula sobre los datos.
+    """
+    etag = etag or etag_de(datos)
+    if coincide_etag(request, etag):
+        return respuesta_no_modificada(etag)
+    return Response(datos, status=status.HTTP_200_OK, headers={'ETag': etag})
+
+
+def respuesta_no_modificada(etag):
+    return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
@@ -0,0 +1,95 @@
+import time
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+
+from .models import ConfiguracionExpensa, CuotaMantenimiento, Unidad
+from .saldos import recalcular_saldos
+
+
+CENTAVOS = Decimal('0.01')
+
+# Unidades por recálculo del libro de saldos (una consulta agregada por lote)
+LOTE_SALDOS = 500
+
+# Monto base de la configuración -> monto de la cuota
+CONCEPTOS = [
+    ('monto_base_administracion', 'monto_administracion'),
+    ('monto_base_mantenimiento', 'monto_mantenimiento'),
+    ('monto_base_seguridad', 'monto_seguridad'),
+    ('monto_base_limpieza', 'monto_limpieza'),
+]
+
+
+def generar_cuotas(configuracion, tamaño_lote=1000):
+    """
+    Genera las cuotas de todas las unidades activas del condominio para una
+    ConfiguracionExpensa.
+
+    Lee las unidades en una sola consulta, calcula la parte de cada una
+    (montos base x porcentaje_propiedad / 100 x factor_costo del tipo de unidad)
+    en una pasada y escribe con bulk_create por lotes. Es idempotente: las
+    unidades que ya tienen cuota del período se omiten, y unique_together
+    (unidad, configuracion) cubre las ejecuciones simultáneas.
+    """
+    inicio = time.perf_counter()
+    
+    unidades = list(Unidad.objects.filter(
+        condominio_id=configuracion.condominio_id,
+        activa=True
+    ).values_list('id', 'porcentaje_propiedad', 'tipo_unidad__factor_costo'))
+    
+    existentes = set(CuotaMantenimiento.objects.filter(
+        configuracion=configuracion
+    ).values_list('unidad_id', flat=True))
+    
+    bases = [(campo_cuota, getattr(configuracion, campo_base)) for campo_base, campo_cuota in CONCEPTOS]
+    
+    cuotas = []
+    for unidad_id, porcentaje, factor_costo in unidades:
+        if unidad_id in existentes:
+            continue
+        participacion = porcentaje / 100 * factor_costo
+        cuota = CuotaMantenimiento(
+            unidad_id=unidad_id,
+            configuracion=configuracion,
+            fecha_vencimiento=configuracion.fecha_vencimiento,
+            **{
+                campo: (base * participacion).quantize(CENTAVOS, rounding=ROUND_HALF_UP)
+                for campo, base in bases
+            }
+        )
+        # bulk_create no pasa por save(): se calculan aquí total, pendiente y estado
+        cuota.calcular_totales()
+        cuotas.append(cuota)
+    
+    with transaction.atomic():
+        for desde in range(0, len(cuotas), tamaño_lote):
+            CuotaMantenimiento.objects.bulk_create(
+                cuotas[desde:desde + tamaño_lote], ignore_conflicts=True
+            )
+        unidad_ids = [cuota.unidad_id for cuota in cuotas]
+        for desde in range(0, len(unidad_ids), LOTE_SALDOS):
+            recalcular_saldos(unidad_ids[desde:desde + LOTE_SALDOS])
+    
+    return {
+        'configuracion': configuracion.id,
+        'condominio': str(configuracion.condominio_id),
+        'unidades': len(unidades),
+        'cuotas_creadas': len(cuotas),
+        'cuotas_existentes': len(existentes),
+        'segundos': round(time.perf_counter() - inicio, 3),
+    }
+
+
+def generar_cuotas_periodo(periodo_mes, periodo_año, condominio_ids=None, tamaño_lote=1000):
+    """Genera las cuotas de todas las configuraciones activas de un período"""
+    configuraciones = ConfiguracionExpensa.objects.filter(
+        periodo_mes=periodo_mes,
+        periodo_año=periodo_año,
+        activa=True
+    )
+    if condominio_ids:
+        configuraciones = configuraciones.filter(condominio_id__in=condominio_ids)
+    
+    return [generar_cuotas(configuracion, tamaño_lote) for configuracion in configuraciones]
@@ -0,0 +1,299 @@
+import codecs
+import csv
+import re
+import time
+from collections import defaultdict, namedtuple
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, Value, When
+from django.utils import timezone
+
+from .models import CuotaMantenimiento, Pago, estado_cuota_sql
+from .saldos import ESTADOS_ABIERTOS, recalcular_saldos
+
+
+MovimientoBancario = namedtuple('MovimientoBancario', ['linea', 'fecha', 'monto', 'referencia', 'unidad', 'bloque'],
+                                defaults=[''])
+
+MONTO = DecimalField(max_digits=10, decimal_places=2)
+
+# Estados de cuota que todavía admiten pagos
+ESTADOS_COBRABLES = ESTADOS_ABIERTOS + ['PAGADA_PARCIAL']
+
+# "Unidad 101", "Depto. 4B", "U-12"... en la descripción del movimiento
+PATRON_UNIDAD = re.compile(r'\b(?:unidad|depto|dpto|departamento|casa|u)\.?\s*[:#-]?\s*([A-Za-z0-9-]+)', re.IGNORECASE)
+
+# Etiqueta OFX/SGML: <TRNAMT>150.00 o <TRNAMT>150.00</TRNAMT>
+PATRON_OFX = re.compile(r'<(\w+)>([^<\r\n]*)')
+
+
+class ErrorImportacion(ValueError):
+    """Línea del extracto que no se puede interpretar"""
+
+
+# =====================================
+# LECTURA DE EXTRACTOS
+# =====================================
+
+def leer_movimientos(archivo, formato=None, encoding='utf-8-sig'):
+    """
+    Recorre un extracto bancario línea por línea sin cargarlo completo en
+    memoria. `archivo` es un archivo binario; el formato se deduce del nombre
+    si no se indica.
+    """
+    if formato is None:
+        formato = 'ofx' if getattr(archivo, 'name', '').lower().endswith('.ofx') else 'csv'
+    lineas = codecs.iterdecode(archivo, encoding)
+    return leer_ofx(lineas) if formato == 'ofx' else leer_csv(lineas)
+
+
+def leer_csv(lineas):
+    """
+    CSV con encabezado: fecha, monto, referencia, unidad (o descripción, de
+    donde se extrae el número de unidad) y opcionalmente bloque. Acepta ',' o
+    ';' como separador. Los débitos y montos en cero se informan como
+    rechazos: solo los créditos son pagos.
+    """
+    lineas = iter(lineas)
+    encabezado = next(lineas, '')
+    separador = ';' if encabezado.count(';') > encabezado.count(',') else ','
+    columnas = [c.strip().lower() for c in next(csv.reader([encabezado], delimiter=separador))]
+
+    for numero, fila in enumerate(csv.reader(lineas, delimiter=separador), start=2):
+        if not any(campo.strip() for campo in fila):
+            continue
+        datos = dict(zip(columnas, (campo.strip() for campo in fila)))
+        try:
+            monto = _leer_monto(datos.get('monto', ''))
+            if monto <= 0:
+                raise ErrorImportacion(f"monto {monto} no es un crédito")
+            yield MovimientoBancario(
+                linea=numero,
+                fecha=_leer_fecha(datos.get('fecha', '')),
+                monto=monto,
+                referencia=datos.get('referencia', ''),
+                unidad=datos.get('unidad') or _extraer_unidad(datos.get('descripcion', '')),
+                bloque=datos.get('bloque', ''),
+            )
+        except ErrorImportacion as error:
+            yield ErrorImportacion(f"Línea {numero}: {error}")
+
+
+def leer_ofx(lineas):
+    """Bloques <STMTTRN> de un OFX (SGML o XML): DTPOSTED, TRNAMT, FITID, MEMO/NAME"""
+    transaccion = None
+    for numero, linea in enumerate(lineas, start=1):
+        for etiqueta, valor in PATRON_OFX.findall(linea):
+            etiqueta = etiqueta.upper()
+            if etiqueta == 'STMTTRN':
+                transaccion = {'linea': numero}
+            elif transaccion is not None:
+                transaccion[etiqueta] = valor.strip()
+        if transaccion is not None and '</STMTTRN>' in linea.upper():
+            try:
+                monto = _leer_monto(transaccion.get('TRNAMT', ''))
+                if monto > 0:  # Solo créditos
+                    yield MovimientoBancario(
+                        linea=transaccion['linea'],
+                        fecha=_leer_fecha(transaccion.get('DTPOSTED', '')[:8]),
+                        monto=monto,
+                        referencia=transaccion.get('FITID', ''),
+                        unidad=_extraer_unidad(transaccion.get('MEMO', '') or transaccion.get('NAME', '')),
+                    )
+            except ErrorImportacion as error:
+                yield ErrorImportacion(f"Línea {transaccion['linea']}: {error}")
+            transaccion = None
+
+
+def _leer_fecha(texto):
+    for formato in ('%Y-%m-%d', '%d/%m/%Y', '%Y%m%d'):
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    raise ErrorImportacion(f"fecha inválida '{texto}'")
+
+
+def _leer_monto(texto):
+    texto = texto.replace(' ', '')
+    if ',' in texto and '.' in texto:
+        texto = texto.replace('.', '').replace(',', '.') if texto.rfind(',') > texto.rfind('.') else texto.replace(',', '')
+    else:
+        texto = texto.replace(',', '.')
+    try:
+        return Decimal(texto).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        raise ErrorImportacion(f"monto inválido '{texto}'")
+
+
+def _extraer_unidad(descripcion):
+    coincidencia = PATRON_UNIDAD.search(descripcion)
+    return coincidencia.group(1) if coincidencia else ''
+
+
+# =====================================
+# CONCILIACIÓN E IMPORTACIÓN
+# =====================================
+
+class IndiceCuotas:
+    """
+    Cuotas cobrables del condominio en memoria, por (bloque, número) de
+    unidad y de la más antigua a la más nueva. Se carga con una sola consulta
+    y se va descontando a medida que se asignan pagos.
+    """
+
+    def __init__(self, condominio_id):
+        self.por_unidad = defaultdict(list)
+        self.bloques = defaultdict(set)
+        filas = CuotaMantenimiento.objects.filter(
+            unidad__condominio_id=condominio_id,
+            estado__in=ESTADOS_COBRABLES,
+            monto_pendiente__gt=0
+        ).order_by('fecha_vencimiento', 'id').values_list(
+            'id', 'unidad_id', 'unidad__bloque', 'unidad__numero', 'monto_pendiente'
+        )
+        for cuota_id, unidad_id, bloque, numero, pendiente in filas:
+            clave = ((bloque or '').upper(), numero.upper())
+            self.por_unidad[clave].append([cuota_id, unidad_id, pendiente])
+            self.bloques[clave[1]].add(clave[0])
+
+    def cuotas_de(self, movimiento):
+        """
+        Cuotas de la unidad del movimiento. Con bloque (columna o 'A-101' en la
+        descripción) tiene que coincidir; solo con el número, la unidad tiene
+        que ser la única con ese número en el condominio.
+        """
+        numero, bloque = movimiento.unidad.upper(), movimiento.bloque.upper()
+        if not bloque:
+            bloques = self.bloques.get(numero, ())
+            if len(bloques) == 1:
+                return self.por_unidad[next(iter(bloques)), numero]
+            if len(bloques) > 1 or '-' not in numero:
+                return None
+            bloque, numero = numero.split('-', 1)
+        return self.por_unidad.get((bloque, numero))
+
+    def asignar(self, movimiento):
+        """
+        Devuelve (cuota_id, unidad_id) para el movimiento o un motivo de rechazo.
+        Primero busca una cuota con el mismo saldo pendiente; si no hay, abona a
+        la más antigua siempre que el monto no la exceda.
+        """
+        if movimiento.monto <= 0:
+            return None, 'el monto no es un crédito'
+        cuotas = self.cuotas_de(movimiento) if movimiento.unidad else None
+        if cuotas is None:
+            return None, 'unidad no encontrada, ambigua (falta el bloque) o sin cuotas pendientes'
+
+        abiertas = [cuota for cuota in cuotas if cuota[2] > 0]
+        elegida = next((cuota for cuota in abiertas if cuota[2] == movimiento.monto), None)
+        if elegida is None and abiertas and movimiento.monto < abiertas[0][2]:
+            elegida = abiertas[0]
+        if elegida is None:
+            return None, 'el monto no coincide con ninguna cuota pendiente'
+
+        elegida[2] -= movimiento.monto
+        return (elegida[0], elegida[1]), None
+
+
+def importar_pagos(archivo, condominio_id, metodo_pago, registrado_por, formato=None,
+                   simulacion=False, tamaño_lote=500, max_rechazos=100):
+    """
+    Importa los créditos de un extracto bancario como pagos de cuotas.
+
+    Cada lote se procesa en su propia transacción: los Pago se crean con
+    bulk_create y las cuotas se actualizan con un solo UPDATE ... CASE por lote.
+    Los movimientos cuya referencia ya existe como numero_transaccion se
+    omiten, así que reimportar el mismo extracto no duplica pagos. Con
+    simulacion=True se concilia y se informa sin escribir nada.
+    """
+    inicio = time.perf_counter()
+    indice = IndiceCuotas(condominio_id)
+    resumen = {
+        'lineas': 0, 'conciliadas': 0, 'duplicadas': 0, 'rechazadas': 0,
+        'monto_conciliado': Decimal('0'), 'detalle_rechazos': [], 'simulacion': simulacion,
+    }
+
+    def rechazar(texto):
+        resumen['rechazadas'] += 1
+        if len(resumen['detalle_rechazos']) < max_rechazos:
+            resumen['detalle_rechazos'].append(texto)
+
+    lote = []
+    for movimiento in leer_movimientos(archivo, formato):
+        resumen['lineas'] += 1
+        if isinstance(movimiento, ErrorImportacion):
+            rechazar(str(movimiento))
+            continue
+        lote.append(movimiento)
+        if len(lote) >= tamaño_lote:
+            _procesar_lote(lote, indice, metodo_pago, registrado_por, simulacion, resumen, rechazar)
+            lote = []
+    if lote:
+        _procesar_lote(lote, indice, metodo_pago, registrado_por, simulacion, resumen, rechazar)
+
+    resumen['segundos'] = round(time.perf_counter() - inicio, 3)
+    return resumen
+
+
+def _procesar_lote(movimientos, indice, metodo_pago, registrado_por, simulacion, resumen, rechazar):
+    referencias = {m.referencia for m in movimientos if m.referencia}
+    existentes = set(Pago.objects.filter(
+        numero_transaccion__in=referencias
+    ).values_list('numero_transaccion', flat=True))
+
+    ahora = timezone.now()
+    pagos, abonos, unidades, vistas = [], defaultdict(Decimal), set(), set()
+    for movimiento in movimientos:
+        if not movimiento.referencia:
+            rechazar(f"Línea {movimiento.linea}: sin referencia bancaria")
+            continue
+        if movimiento.referencia in existentes or movimiento.referencia in vistas:
+            resumen['duplicadas'] += 1
+            continue
+
+        asignacion, motivo = indice.asignar(movimiento)
+        if asignacion is None:
+            rechazar(f"Línea {movimiento.linea} (unidad '{movimiento.unidad}', ${movimiento.monto}): {motivo}")
+            continue
+
+        cuota_id, unidad_id = asignacion
+        vistas.add(movimiento.referencia)
+        abonos[cuota_id] += movimiento.monto
+        unidades.add(unidad_id)
+        resumen['conciliadas'] += 1
+        resumen['monto_conciliado'] += movimiento.monto
+        pagos.append(Pago(
+            cuota_id=cuota_id,
+            metodo_pago=metodo_pago,
+            monto_pagado=movimiento.monto,
+            numero_transaccion=movimiento.referencia,
+            fecha_pago=timezone.make_aware(datetime.combine(movimiento.fecha, datetime.min.time())),
+            estado='COMPLETADO',
+            registrado_por=registrado_por,
+            observaciones=f"Importado de extracto bancario (línea {movimiento.linea})",
+        ))
+
+    if simulacion or not pagos:
+        return
+
+    with transaction.atomic():
+        Pago.objects.bulk_create(pagos)
+
+        monto_pagado = Case(
+            *[When(id=cuota_id, then=F('monto_pagado') + Value(monto, output_field=MONTO))
+              for cuota_id, monto in abonos.items()],
+            output_field=MONTO
+        )
+        monto_pendiente = ExpressionWrapper(F('monto_total') - monto_pagado, output_field=MONTO)
+        CuotaMantenimiento.objects.filter(id__in=abonos).update(
+            monto_pagado=monto_pagado,
+            monto_pendiente=monto_pendiente,
+            estado=estado_cuota_sql(monto_pendiente=monto_pendiente, monto_pagado=monto_pagado),
+            fecha_ultimo_pago=ahora,
+            fecha_modificacion=ahora
+        )
+
+        recalcular_saldos(sorted(unidades))
@@ -0,0 +1,134 @@
+import atexit
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Comunicado, LecturaComunicado
+
+
+logger = logging.getLogger(__name__)
+
+# El buffer se vacía al llegar a este tamaño y, en un hilo aparte, cada intervalo
+MAXIMO_PENDIENTES = 500
+INTERVALO_VACIADO = 5  # segundos
+
+
+class BufferLecturas:
+    """
+    Lecturas de comunicados acumuladas en memoria del proceso. Cuando sale un
+    comunicado urgente todos los teléfonos lo abren a la vez; en lugar de un
+    INSERT y un UPDATE de la fila del comunicado por apertura, cada vaciado
+    hace un bulk_create de las lecturas y un UPDATE con F() por comunicado.
+    Un hilo del proceso lo vacía cada `intervalo` segundos aunque no lleguen
+    más lecturas, así lo que se pierde si el proceso muere sin pasar por
+    atexit es a lo sumo un intervalo.
+    """
+
+    def __init__(self, maximo=MAXIMO_PENDIENTES, intervalo=INTERVALO_VACIADO):
+        self.maximo = maximo
+        self.intervalo = intervalo
+        self._candado = threading.Lock()
+        self._hilo = None
+        self._detener = threading.Event()
+        self._reiniciar()
+
+    def _reiniciar(self):
+        # Pares (comunicado_id, usuario_id); las fechas son las del vaciado
+        self.lecturas = set()
+        self.confirmaciones = set()
+        self.vistas = Counter()
+        self.desde = time.monotonic()
+
+    def registrar(self, comunicado_id, usuario_id, confirmar=False):
+        with self._candado:
+            self.lecturas.add((comunicado_id, usuario_id))
+            self.vistas[comunicado_id] += 1
+            if confirmar:
+                self.confirmaciones.add((comunicado_id, usuario_id))
+            vaciar = len(self.lecturas) >= self.maximo or time.monotonic() - self.desde >= self.intervalo
+        if self._hilo is None:
+            self.iniciar()
+        if vaciar:
+            self.vaciar()
+
+    def iniciar(self):
+        """Arranca el hilo de vaciado periódico (una vez por proceso)"""
+        with self._candado:
+            if self._hilo is not None:
+                return
+            self._detener.clear()
+            hilo = self._hilo = threading.Thread(target=self._vaciar_periodicamente, name='buffer-lecturas',
+                                                 daemon=True)
+        hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        with self._candado:
+            hilo, self._hilo = self._hilo, None
+        if hilo is not None:
+            hilo.join()
+
+    def _vaciar_periodicamente(self):
+        while not self._detener.wait(self.intervalo):
+            if not self.vistas:
+                continue
+            try:
+                self.vaciar()
+            finally:
+                # La conexión es de este hilo: no queda abierta entre vaciados
+                connection.close()
+
+    def vaciar(self):
+        """Escribe lo acumulado. Si falla, las lecturas vuelven al buffer"""
+        with self._candado:
+            lecturas, confirmaciones, vistas = self.lecturas, self.confirmaciones, self.vistas
+            self._reiniciar()
+        if not vistas:
+            return
+        try:
+            escribir_lecturas(lecturas, confirmaciones, vistas)
+        except Exception:
+            logger.exception('No se pudieron guardar %s lecturas de comunicados', len(lecturas))
+            with self._candado:
+                self.lecturas |= lecturas
+                self.confirmaciones |= confirmaciones
+                self.vistas.update(vistas)
+
+
+def escribir_lecturas(lecturas, confirmaciones, vistas):
+    """
+    Inserta las lecturas nuevas (las repetidas se ignoran), confirma las que
+    corresponda y suma los contadores de cada comunicado. confirmaciones_lectura
+    suma solo las filas que efectivamente pasaron a confirmadas, así que una
+    confirmación repetida no cuenta dos veces.
+    """
+    por_comunicado = defaultdict(list)
+    for comunicado_id, usuario_id in confirmaciones:
+        por_comunicado[comunicado_id].append(usuario_id)
+
+    with transaction.atomic():
+        LecturaComunicado.objects.bulk_create(
+            [LecturaComunicado(comunicado_id=comunicado_id, usuario_id=usuario_id)
+             for comunicado_id, usuario_id in lecturas],
+            ignore_conflicts=True, batch_size=1000
+        )
+        ahora = timezone.now()
+        confirmadas = Counter()
+        for comunicado_id, usuario_ids in por_comunicado.items():
+            confirmadas[comunicado_id] = LecturaComunicado.objects.filter(
+                comunicado_id=comunicado_id, usuario_id__in=usuario_ids, confirmado=False
+            ).update(confirmado=True, fecha_confirmacion=ahora)
+        for comunicado_id, veces in vistas.items():
+            Comunicado.objects.filter(pk=comunicado_id).update(
+                veces_visto=F('veces_visto') + veces,
+                confirmaciones_lectura=F('confirmaciones_lectura') + confirmadas[comunicado_id]
+            )
+
+
+buffer_lecturas = BufferLecturas()
+atexit.register(buffer_lecturas.vaciar)
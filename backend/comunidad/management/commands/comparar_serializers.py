@@ -0,0 +1,75 @@
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from comunidad.models import (
+    PerfilUsuario, Unidad, ResidenciaUnidad, Vehiculo, ReservaAreaComun,
+    RegistroAcceso, Visitante, AlertaSeguridad, CuotaMantenimiento, Pago
+)
+from comunidad.serializers import (
+    SERIALIZERS_COMPACTOS, PerfilUsuarioSerializer, UnidadSerializer,
+    ResidenciaUnidadSerializer, VehiculoSerializer, ReservaAreaComunSerializer,
+    RegistroAccesoSerializer, VisitanteSerializer, AlertaSeguridadSerializer,
+    CuotaMantenimientoSerializer, PagoSerializer
+)
+
+
+# Serializer completo a comparar y modelo del que se toma la muestra
+COMPARACIONES = [
+    (PerfilUsuarioSerializer, PerfilUsuario),
+    (UnidadSerializer, Unidad),
+    (ResidenciaUnidadSerializer, ResidenciaUnidad),
+    (VehiculoSerializer, Vehiculo),
+    (ReservaAreaComunSerializer, ReservaAreaComun),
+    (RegistroAccesoSerializer, RegistroAcceso),
+    (VisitanteSerializer, Visitante),
+    (AlertaSeguridadSerializer, AlertaSeguridad),
+    (CuotaMantenimientoSerializer, CuotaMantenimiento),
+    (PagoSerializer, Pago),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compara tamaño de respuesta y tiempo de serialización entre la vista completa y la compacta'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=20,
+                            help='Cantidad de filas por modelo (tamaño de página)')
+        parser.add_argument('--repeticiones', type=int, default=20,
+                            help='Repeticiones para promediar el tiempo de serialización')
+
+    def handle(self, *args, **options):
+        filas = options['filas']
+        repeticiones = options['repeticiones']
+        renderer = JSONRenderer()
+        
+        self.stdout.write(f"{'Serializer':<28} {'Filas':>5} {'Completo':>12} {'Compacto':>12} "
+                          f"{'Ahorro':>7} {'ms compl.':>10} {'ms comp.':>10}")
+        
+        for serializer_class, modelo in COMPARACIONES:
+            # Se materializan las filas antes de medir para comparar solo la serialización
+            muestra = list(modelo.objects.all()[:filas])
+            if not muestra:
+                self.stdout.write(f"{serializer_class.__name__:<28} {'sin datos':>5}")
+                continue
+            
+            compacto_class = SERIALIZERS_COMPACTOS[serializer_class]
+            completo_bytes, completo_ms = self.medir(renderer, serializer_class, muestra, repeticiones)
+            compacto_bytes, compacto_ms = self.medir(renderer, compacto_class, muestra, repeticiones)
+            ahorro = 100 * (1 - compacto_bytes / completo_bytes)
+            
+            self.stdout.write(f"{serializer_class.__name__:<28} {len(muestra):>5} {completo_bytes:>10} B "
+                              f"{compacto_bytes:>10} B {ahorro:>6.1f}% {completo_ms:>10.2f} {compacto_ms:>10.2f}")
+
+    def medir(self, renderer, serializer_class, muestra, repeticiones):
+        """Devuelve (bytes de la respuesta, milisegundos promedio por serialización)"""
+        # Primera pasada fuera de la medición: carga las relaciones en caché de las instancias
+        contenido = renderer.render(serializer_class(muestra, many=True).data)
+        
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            renderer.render(serializer_class(muestra, many=True).data)
+        transcurrido = (time.perf_counter() - inicio) * 1000 / repeticiones
+        
+        return len(contenido), transcurrido
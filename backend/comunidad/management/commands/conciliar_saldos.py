@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from comunidad.models import SaldoUnidad, Unidad
+from comunidad.saldos import CAMPOS_SALDO, calcular_saldos, recalcular_saldos
+
+
+class Command(BaseCommand):
+    help = 'Verifica el libro de saldos por unidad contra las cuotas y opcionalmente lo corrige'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--corregir', action='store_true',
+                            help='Reescribir los saldos que no coinciden')
+        parser.add_argument('--lote', type=int, default=500,
+                            help='Cantidad de unidades por consulta agregada')
+
+    def handle(self, *args, **options):
+        lote = options['lote']
+        unidad_ids = list(Unidad.objects.order_by('pk').values_list('pk', flat=True))
+        diferencias = []
+        
+        for inicio in range(0, len(unidad_ids), lote):
+            ids = unidad_ids[inicio:inicio + lote]
+            esperados = calcular_saldos(ids)
+            registrados = SaldoUnidad.objects.in_bulk(ids)
+            
+            for unidad_id, esperado in esperados.items():
+                registrado = registrados.get(unidad_id)
+                campos = [
+                    campo for campo in CAMPOS_SALDO
+                    if registrado is None or getattr(registrado, campo) != getattr(esperado, campo)
+                ]
+                if campos:
+                    diferencias.append(unidad_id)
+                    self.stdout.write(self.style.WARNING(
+                        f"Unidad {unidad_id}: " + (
+                            'sin saldo registrado' if registrado is None else
+                            ', '.join(f"{campo} {getattr(registrado, campo)} != {getattr(esperado, campo)}"
+                                      for campo in campos)
+                        )
+                    ))
+        
+        if diferencias and options['corregir']:
+            with transaction.atomic():
+                for inicio in range(0, len(diferencias), lote):
+                    recalcular_saldos(diferencias[inicio:inicio + lote])
+            self.stdout.write(self.style.SUCCESS(f"✓ {len(diferencias)} saldos corregidos"))
+        
+        self.stdout.write(
+            f"Unidades revisadas: {len(unidad_ids)} - Diferencias: {len(diferencias)}"
+        )
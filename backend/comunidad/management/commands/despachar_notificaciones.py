@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from comunidad.push import despachar_pendientes, ejecutar_despachador
+
+
+class Command(BaseCommand):
+    help = 'Envía las notificaciones push pendientes (una vez, o en bucle con --continuo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true',
+                            help='Quedarse revisando pendientes cada --intervalo segundos')
+        parser.add_argument('--intervalo', type=float, default=2,
+                            help='Segundos de espera cuando no hay pendientes')
+
+    def handle(self, *args, **options):
+        if options['continuo']:
+            self.stdout.write('Despachador de notificaciones en ejecución (Ctrl+C para detener)')
+            try:
+                ejecutar_despachador(intervalo=options['intervalo'])
+            except KeyboardInterrupt:
+                pass
+            return
+        
+        resumenes = despachar_pendientes()
+        for resumen in resumenes:
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ Notificación {resumen['notificacion']}: {resumen['entregadas']}/{resumen['enviadas']} entregadas"
+            ))
+        self.stdout.write(f"Notificaciones despachadas: {len(resumenes)}")
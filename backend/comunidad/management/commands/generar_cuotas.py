@@ -0,0 +1,38 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from comunidad.expensas import generar_cuotas_periodo
+
+
+class Command(BaseCommand):
+    help = 'Genera en bloque las cuotas de mantenimiento de un período para todas las unidades activas'
+
+    def add_arguments(self, parser):
+        hoy = date.today()
+        parser.add_argument('--mes', type=int, default=hoy.month, help='Mes del período (1-12)')
+        parser.add_argument('--año', type=int, default=hoy.year, help='Año del período')
+        parser.add_argument('--condominio', action='append', default=[],
+                            help='ID de condominio (se puede repetir); por defecto todos')
+        parser.add_argument('--lote', type=int, default=1000,
+                            help='Cantidad de cuotas por INSERT')
+
+    def handle(self, *args, **options):
+        resumenes = generar_cuotas_periodo(
+            options['mes'], options['año'],
+            condominio_ids=options['condominio'],
+            tamaño_lote=options['lote']
+        )
+        
+        if not resumenes:
+            self.stdout.write(self.style.WARNING(
+                f"No hay configuraciones de expensa activas para {options['mes']}/{options['año']}"
+            ))
+            return
+        
+        for resumen in resumenes:
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ Condominio {resumen['condominio']}: {resumen['cuotas_creadas']} cuotas creadas, "
+                f"{resumen['cuotas_existentes']} ya existían "
+                f"({resumen['unidades']} unidades, {resumen['segundos']}s)"
+            ))
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from comunidad.importacion_pagos import importar_pagos
+from comunidad.models import MetodoPago, PerfilUsuario
+
+
+class Command(BaseCommand):
+    help = 'Importa pagos desde un extracto bancario CSV u OFX conciliándolos con las cuotas pendientes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del extracto (.csv u .ofx)')
+        parser.add_argument('--metodo-pago', type=int, required=True,
+                            help='ID del método de pago; define el condominio')
+        parser.add_argument('--usuario', required=True,
+                            help='Username de quien registra los pagos')
+        parser.add_argument('--formato', choices=['csv', 'ofx'], default=None,
+                            help='Por defecto se deduce de la extensión')
+        parser.add_argument('--lote', type=int, default=500,
+                            help='Movimientos por transacción')
+        parser.add_argument('--simulacion', action='store_true',
+                            help='Conciliar e informar sin guardar nada')
+
+    def handle(self, *args, **options):
+        try:
+            metodo_pago = MetodoPago.objects.get(pk=options['metodo_pago'])
+            perfil = PerfilUsuario.objects.get(user__username=options['usuario'])
+        except (MetodoPago.DoesNotExist, PerfilUsuario.DoesNotExist) as error:
+            raise CommandError(str(error))
+        
+        with open(options['archivo'], 'rb') as archivo:
+            resumen = importar_pagos(
+                archivo, metodo_pago.condominio_id, metodo_pago, perfil,
+                formato=options['formato'],
+                simulacion=options['simulacion'],
+                tamaño_lote=options['lote']
+            )
+        
+        for rechazo in resumen['detalle_rechazos']:
+            self.stdout.write(self.style.WARNING(rechazo))
+        
+        estilo = self.style.NOTICE if resumen['simulacion'] else self.style.SUCCESS
+        self.stdout.write(estilo(
+            f"{'SIMULACIÓN - ' if resumen['simulacion'] else '✓ '}"
+            f"Líneas: {resumen['lineas']} - Conciliadas: {resumen['conciliadas']} "
+            f"(${resumen['monto_conciliado']}) - Duplicadas: {resumen['duplicadas']} - "
+            f"Rechazadas: {resumen['rechazadas']} ({resumen['segundos']}s)"
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from comunidad.publicacion import ejecutar_programador, procesar_programacion
+
+
+class Command(BaseCommand):
+    help = 'Publica los comunicados programados y archiva los expirados (una vez, o en bucle con --continuo)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--continuo', action='store_true',
+                            help='Quedarse revisando cada --intervalo segundos')
+        parser.add_argument('--intervalo', type=float, default=60,
+                            help='Segundos entre revisiones')
+
+    def handle(self, *args, **options):
+        if options['continuo']:
+            self.stdout.write('Programador de comunicados en ejecución (Ctrl+C para detener)')
+            try:
+                ejecutar_programador(intervalo=options['intervalo'])
+            except KeyboardInterrupt:
+                pass
+            return
+        
+        resumen = procesar_programacion()
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ Comunicados publicados: {resumen['publicados']}, archivados: {resumen['archivados']}"
+        ))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from comunidad.sincronizacion import RETENCION_ELIMINADOS, purgar_eliminados
+
+
+class Command(BaseCommand):
+    help = 'Borra las lápidas de sincronización más viejas que el período de retención'
+
+    def handle(self, *args, **options):
+        borradas = purgar_eliminados()
+        self.stdout.write(self.style.SUCCESS(
+            f"✓ {borradas} registros eliminados purgados (retención: {RETENCION_ELIMINADOS.days} días)"
+        ))
@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from comunidad.mora import recalcular_mora
+
+
+class Command(BaseCommand):
+    help = 'Marca cuotas vencidas y recalcula multas y mora (pensado para ejecutarse cada noche)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', type=date.fromisoformat, default=None,
+                            help='Fecha de cálculo AAAA-MM-DD (por defecto hoy)')
+        parser.add_argument('--condominio', action='append', default=[],
+                            help='ID de condominio (se puede repetir); por defecto todos')
+
+    def handle(self, *args, **options):
+        resumenes = recalcular_mora(hoy=options['fecha'], condominio_ids=options['condominio'])
+        
+        for resumen in resumenes:
+            self.stdout.write(self.style.SUCCESS(
+                f"✓ Condominio {resumen['condominio']}: {resumen['cuotas_vencidas']} cuotas vencidas, "
+                f"{resumen['cuotas_con_mora']} con multa/mora actualizada "
+                f"({resumen['unidades']} unidades, {resumen['segundos']}s)"
+            ))
+        
+        self.stdout.write(
+            f"Cuotas vencidas: {sum(r['cuotas_vencidas'] for r in resumenes)} - "
+            f"Con mora: {sum(r['cuotas_con_mora'] for r in resumenes)}"
+        )
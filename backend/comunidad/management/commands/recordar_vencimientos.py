@@ -0,0 +1,19 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+
+from comunidad.bandeja import DIAS_AVISO_VENCIMIENTO, recordar_vencimientos
+
+
+class Command(BaseCommand):
+    help = 'Escribe en la bandeja de los residentes los recordatorios de cuotas por vencer (pensado para correr cada día)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', type=date.fromisoformat, default=None,
+                            help='Fecha de referencia AAAA-MM-DD (por defecto hoy)')
+        parser.add_argument('--dias', type=int, default=DIAS_AVISO_VENCIMIENTO,
+                            help='Días de anticipación al vencimiento')
+
+    def handle(self, *args, **options):
+        total = recordar_vencimientos(hoy=options['fecha'], dias=options['dias'])
+        self.stdout.write(self.style.SUCCESS(f"✓ {total} recordatorios de pago procesados"))
@@ -0,0 +1,61 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunidad', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='alertaseguridad',
+            index=models.Index(fields=['condominio', 'revisada', '-fecha_hora'], name='alerta_condominio_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alertaseguridad',
+            index=models.Index(condition=models.Q(('revisada', False)), fields=['condominio', '-fecha_hora'], name='alerta_no_revisada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='alertaseguridad',
+            index=models.Index(fields=['-fecha_hora', '-id'], name='alerta_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cuotamantenimiento',
+            index=models.Index(fields=['unidad', 'estado', 'fecha_vencimiento'], name='cuota_unidad_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cuotamantenimiento',
+            index=models.Index(condition=models.Q(('estado__in', ['PENDIENTE', 'VENCIDA'])), fields=['unidad', 'fecha_vencimiento'], name='cuota_abierta_unidad_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['cuota', 'estado', '-fecha_pago'], name='pago_cuota_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['-fecha_pago', '-id'], name='pago_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registroacceso',
+            index=models.Index(fields=['usuario', '-fecha_hora'], name='acceso_usuario_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='registroacceso',
+            index=models.Index(fields=['-fecha_hora', '-id'], name='acceso_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservaareacomun',
+            index=models.Index(fields=['area_comun', 'fecha_reserva', 'estado'], name='reserva_area_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservaareacomun',
+            index=models.Index(fields=['usuario', 'estado', 'fecha_reserva'], name='reserva_usuario_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='residenciaunidad',
+            index=models.Index(fields=['usuario', 'activa'], name='residencia_usuario_activa_idx'),
+        ),
+    ]
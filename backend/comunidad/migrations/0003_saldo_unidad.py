@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunidad', '0002_indices_consultas_frecuentes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SaldoUnidad',
+            fields=[
+                ('unidad', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='saldo', serialize=False, to='comunidad.unidad')),
+                ('total_pendiente', models.DecimalField(decimal_places=2, default=0, help_text='Saldo de cuotas pendientes y vencidas', max_digits=12)),
+                ('total_vencido', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cuotas_pendientes', models.IntegerField(default=0)),
+                ('pagado_año', models.DecimalField(decimal_places=2, default=0, help_text='Total de cuotas pagadas del año de referencia', max_digits=12)),
+                ('año', models.IntegerField(help_text='Año de referencia de pagado_año')),
+                ('proximo_vencimiento', models.DateField(blank=True, null=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Saldo de Unidad',
+                'verbose_name_plural': 'Saldos de Unidades',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunidad', '0003_saldo_unidad'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pago',
+            name='clave_idempotencia',
+            field=models.CharField(blank=True, max_length=100, null=True, unique=True),
+        ),
+    ]
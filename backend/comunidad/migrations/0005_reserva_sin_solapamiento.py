@@ -0,0 +1,48 @@
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeBoundary, RangeOperators
+from django.contrib.postgres.operations import BtreeGistExtension
+from django.db import migrations, models
+
+
+def fecha_hora(hora):
+    # fecha_reserva + hora como timestamp
+    return models.Func('fecha_reserva', hora, template='(%(expressions)s)', arg_joiner=' + ',
+                       output_field=models.DateTimeField())
+
+
+# Definición congelada de models.RESERVA_SIN_SOLAPAMIENTO al crear la restricción
+RESERVA_SIN_SOLAPAMIENTO = ExclusionConstraint(
+    name='reserva_sin_solapamiento',
+    index_type='GIST',
+    expressions=[
+        ('area_comun', RangeOperators.EQUAL),
+        (models.Func(fecha_hora('hora_inicio'), fecha_hora('hora_fin'), RangeBoundary(),
+                     function='TSRANGE', output_field=DateTimeRangeField()), RangeOperators.OVERLAPS),
+    ],
+    condition=models.Q(estado__in=['PENDIENTE', 'CONFIRMADA']),
+)
+
+
+def crear_restriccion(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.add_constraint(apps.get_model('comunidad', 'ReservaAreaComun'), RESERVA_SIN_SOLAPAMIENTO)
+
+
+def eliminar_restriccion(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.remove_constraint(apps.get_model('comunidad', 'ReservaAreaComun'), RESERVA_SIN_SOLAPAMIENTO)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunidad', '0004_pago_clave_idempotencia'),
+    ]
+
+    operations = [
+        # btree_gist permite combinar la igualdad de area_comun con el solapamiento de rangos
+        BtreeGistExtension(),
+        migrations.RunPython(crear_restriccion, eliminar_restriccion),
+    ]
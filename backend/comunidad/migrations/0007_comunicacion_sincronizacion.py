@@ -0,0 +1,412 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:43
+
+import django.core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunidad', '0006_fecha_modificacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComentarioComunicado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('contenido', models.TextField()),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('moderado', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Comentario',
+                'verbose_name_plural': 'Comentarios',
+                'ordering': ['fecha_creacion'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Comunicado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('titulo', models.CharField(max_length=200)),
+                ('contenido', models.TextField()),
+                ('resumen', models.CharField(blank=True, help_text='Resumen para notificaciones push', max_length=300, null=True)),
+                ('audiencia', models.CharField(choices=[('TODOS', 'Todos los Residentes'), ('PROPIETARIOS', 'Solo Propietarios'), ('INQUILINOS', 'Solo Inquilinos'), ('ADMINISTRACION', 'Solo Administración'), ('PERSONALIZADA', 'Audiencia Personalizada')], default='TODOS', max_length=15)),
+                ('estado', models.CharField(choices=[('BORRADOR', 'Borrador'), ('PUBLICADO', 'Publicado'), ('ARCHIVADO', 'Archivado')], default='BORRADOR', max_length=10)),
+                ('fecha_publicacion', models.DateTimeField(blank=True, null=True)),
+                ('fecha_programada', models.DateTimeField(blank=True, help_text='Para programar publicación', null=True)),
+                ('fecha_expiracion', models.DateTimeField(blank=True, null=True)),
+                ('imagen_destacada', models.ImageField(blank=True, null=True, upload_to='comunicados/imagenes/')),
+                ('archivo_adjunto', models.FileField(blank=True, null=True, upload_to='comunicados/archivos/')),
+                ('permite_comentarios', models.BooleanField(default=True)),
+                ('es_urgente', models.BooleanField(default=False)),
+                ('requiere_confirmacion_lectura', models.BooleanField(default=False)),
+                ('veces_visto', models.IntegerField(default=0)),
+                ('confirmaciones_lectura', models.IntegerField(default=0)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Comunicado',
+                'verbose_name_plural': 'Comunicados',
+                'ordering': ['-fecha_publicacion', '-fecha_creacion'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ConfiguracionNotificaciones',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('alertas_seguridad', models.BooleanField(default=True)),
+                ('comunicados_urgentes', models.BooleanField(default=True)),
+                ('comunicados_generales', models.BooleanField(default=True)),
+                ('recordatorios_pago', models.BooleanField(default=True)),
+                ('mantenimiento', models.BooleanField(default=True)),
+                ('reservas', models.BooleanField(default=True)),
+                ('no_molestar_inicio', models.TimeField(default='22:00')),
+                ('no_molestar_fin', models.TimeField(default='07:00')),
+                ('token_firebase', models.CharField(blank=True, max_length=500, null=True)),
+                ('token_apns', models.CharField(blank=True, max_length=500, null=True)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Configuración de Notificaciones',
+                'verbose_name_plural': 'Configuraciones de Notificaciones',
+            },
+        ),
+        migrations.CreateModel(
+            name='LecturaComunicado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha_lectura', models.DateTimeField(auto_now_add=True)),
+                ('confirmado', models.BooleanField(default=False)),
+                ('fecha_confirmacion', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Lectura de Comunicado',
+                'verbose_name_plural': 'Lecturas de Comunicados',
+            },
+        ),
+        migrations.CreateModel(
+            name='MantenimientoPreventivo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('titulo', models.CharField(max_length=200)),
+                ('descripcion', models.TextField()),
+                ('fecha_programada', models.DateTimeField()),
+                ('fecha_completada', models.DateTimeField(blank=True, null=True)),
+                ('frecuencia_dias', models.IntegerField(help_text='Días hasta el próximo mantenimiento')),
+                ('estado', models.CharField(choices=[('PROGRAMADO', 'Programado'), ('COMPLETADO', 'Completado'), ('POSTPONED', 'Pospuesto'), ('CANCELADO', 'Cancelado')], default='PROGRAMADO', max_length=12)),
+                ('proxima_fecha', models.DateTimeField(blank=True, null=True)),
+                ('recordatorio_enviado', models.BooleanField(default=False)),
+                ('costo_programado', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('costo_real', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('reporte_trabajo', models.TextField(blank=True, null=True)),
+                ('fotos_antes', models.JSONField(blank=True, default=list)),
+                ('fotos_despues', models.JSONField(blank=True, default=list)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Mantenimiento Preventivo',
+                'verbose_name_plural': 'Mantenimientos Preventivos',
+                'ordering': ['fecha_programada'],
+            },
+        ),
+        migrations.CreateModel(
+            name='NotificacionPush',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('SEGURIDAD', 'Alerta de Seguridad'), ('COMUNICADO', 'Nuevo Comunicado'), ('PAGO', 'Recordatorio de Pago'), ('MANTENIMIENTO', 'Mantenimiento'), ('RESERVA', 'Reserva de Área Común'), ('GENERAL', 'General')], max_length=15)),
+                ('titulo', models.CharField(max_length=100)),
+                ('mensaje', models.CharField(max_length=200)),
+                ('datos_adicionales', models.JSONField(blank=True, help_text='Datos para deep linking y acciones', null=True)),
+                ('enviar_a_todos', models.BooleanField(default=False)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('ENVIADA', 'Enviada'), ('FALLIDA', 'Fallida')], default='PENDIENTE', max_length=10)),
+                ('fecha_programada', models.DateTimeField(blank=True, null=True)),
+                ('fecha_enviada', models.DateTimeField(blank=True, null=True)),
+                ('fecha_creacion', models.DateTimeField(auto_now_add=True)),
+                ('total_enviadas', models.IntegerField(default=0)),
+                ('total_entregadas', models.IntegerField(default=0)),
+                ('total_leidas', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Notificación Push',
+                'verbose_name_plural': 'Notificaciones Push',
+                'ordering': ['-fecha_creacion'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PersonalMantenimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_personal', models.CharField(choices=[('INTERNO', 'Personal Interno'), ('EXTERNO', 'Proveedor Externo'), ('CONTRATISTA', 'Contratista')], max_length=12)),
+                ('nombre_empresa', models.CharField(blank=True, max_length=200, null=True)),
+                ('nombre_contacto', models.CharField(max_length=100)),
+                ('telefono', models.CharField(max_length=20)),
+                ('email', models.EmailField(blank=True, max_length=254, null=True)),
+                ('nit', models.CharField(blank=True, max_length=15, null=True)),
+                ('direccion', models.TextField(blank=True, null=True)),
+                ('especialidades', models.JSONField(default=list, help_text='Lista de especialidades')),
+                ('calificacion', models.DecimalField(decimal_places=1, default=0, help_text='Calificación promedio del 1 al 5', max_digits=3)),
+                ('activo', models.BooleanField(default=True)),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Personal de Mantenimiento',
+                'verbose_name_plural': 'Personal de Mantenimiento',
+            },
+        ),
+        migrations.CreateModel(
+            name='RegistroEliminado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tabla', models.CharField(max_length=30)),
+                ('objeto_id', models.BigIntegerField()),
+                ('fecha_eliminacion', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Registro Eliminado',
+                'verbose_name_plural': 'Registros Eliminados',
+            },
+        ),
+        migrations.CreateModel(
+            name='SolicitudMantenimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('titulo', models.CharField(max_length=200)),
+                ('descripcion', models.TextField()),
+                ('ubicacion_especifica', models.CharField(blank=True, max_length=200, null=True)),
+                ('prioridad', models.CharField(choices=[('BAJA', 'Baja'), ('MEDIA', 'Media'), ('ALTA', 'Alta'), ('URGENTE', 'Urgente')], default='MEDIA', max_length=10)),
+                ('estado', models.CharField(choices=[('PENDIENTE', 'Pendiente'), ('ASIGNADA', 'Asignada'), ('EN_PROGRESO', 'En Progreso'), ('COMPLETADA', 'Completada'), ('CANCELADA', 'Cancelada')], default='PENDIENTE', max_length=12)),
+                ('fotos_problema', models.JSONField(blank=True, default=list, help_text='URLs de fotos del problema')),
+                ('fecha_solicitud', models.DateTimeField(auto_now_add=True)),
+                ('fecha_programada', models.DateTimeField(blank=True, null=True)),
+                ('fecha_completada', models.DateTimeField(blank=True, null=True)),
+                ('fecha_asignacion', models.DateTimeField(blank=True, null=True)),
+                ('costo_estimado', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('costo_real', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('calificacion', models.IntegerField(blank=True, null=True, validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(5)])),
+                ('comentario_calificacion', models.TextField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Solicitud de Mantenimiento',
+                'verbose_name_plural': 'Solicitudes de Mantenimiento',
+                'ordering': ['-fecha_solicitud'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TipoComunicado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('GENERAL', 'General'), ('URGENTE', 'Urgente'), ('MANTENIMIENTO', 'Mantenimiento'), ('REUNION', 'Reunión'), ('AVISO', 'Aviso'), ('FINANCIERO', 'Financiero'), ('SEGURIDAD', 'Seguridad')], max_length=15, unique=True)),
+                ('descripcion', models.TextField(blank=True, null=True)),
+                ('color_badge', models.CharField(default='#007bff', help_text='Color hexadecimal para el badge', max_length=7)),
+                ('requiere_confirmacion', models.BooleanField(default=False)),
+            ],
+            options={
+                'verbose_name': 'Tipo de Comunicado',
+                'verbose_name_plural': 'Tipos de Comunicados',
+            },
+        ),
+        migrations.CreateModel(
+            name='TipoMantenimiento',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nombre', models.CharField(max_length=100)),
+                ('descripcion', models.TextField(blank=True, null=True)),
+                ('es_preventivo', models.BooleanField(default=False)),
+                ('frecuencia_dias', models.IntegerField(blank=True, help_text='Días entre mantenimientos preventivos', null=True)),
+                ('costo_estimado', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('requiere_personal_externo', models.BooleanField(default=False)),
+                ('activo', models.BooleanField(default=True)),
+            ],
+            options={
+                'verbose_name': 'Tipo de Mantenimiento',
+                'verbose_name_plural': 'Tipos de Mantenimiento',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='alertaseguridad',
+            index=models.Index(fields=['condominio', 'fecha_modificacion', 'id'], name='alerta_condominio_modif_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cuotamantenimiento',
+            index=models.Index(fields=['unidad', 'fecha_modificacion', 'id'], name='cuota_unidad_modif_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pago',
+            index=models.Index(fields=['cuota', 'fecha_modificacion', 'id'], name='pago_cuota_modif_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reservaareacomun',
+            index=models.Index(fields=['usuario', 'fecha_modificacion', 'id'], name='reserva_usuario_modif_idx'),
+        ),
+        migrations.AddField(
+            model_name='comentariocomunicado',
+            name='padre',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='respuestas', to='comunidad.comentariocomunicado'),
+        ),
+        migrations.AddField(
+            model_name='comentariocomunicado',
+            name='usuario',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comentarios', to='comunidad.perfilusuario'),
+        ),
+        migrations.AddField(
+            model_name='comunicado',
+            name='autor',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='comunicados_creados', to='comunidad.perfilusuario'),
+        ),
+        migrations.AddField(
+            model_name='comunicado',
+            name='condominio',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comunicados', to='comunidad.condominio'),
+        ),
+        migrations.AddField(
+            model_name='comunicado',
+            name='unidades_especificas',
+            field=models.ManyToManyField(blank=True, help_text='Para audiencia personalizada', to='comunidad.unidad'),
+        ),
+        migrations.AddField(
+            model_name='comentariocomunicado',
+            name='comunicado',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comentarios', to='comunidad.comunicado'),
+        ),
+        migrations.AddField(
+            model_name='configuracionnotificaciones',
+            name='usuario',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='config_notificaciones', to='comunidad.perfilusuario'),
+        ),
+        migrations.AddField(
+            model_name='lecturacomunicado',
+            name='comunicado',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lecturas', to='comunidad.comunicado'),
+        ),
+        migrations.AddField(
+            model_name='lecturacomunicado',
+            name='usuario',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='comunicados_leidos', to='comunidad.perfilusuario'),
+        ),
+        migrations.AddField(
+            model_name='mantenimientopreventivo',
+            name='area_comun',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='comunidad.areacomun'),
+        ),
+        migrations.AddField(
+            model_name='mantenimientopreventivo',
+            name='condominio',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mantenimientos_preventivos', to='comunidad.condominio'),
+        ),
+        migrations.AddField(
+            model_name='mantenimientopreventivo',
+            name='creado_por',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='comunidad.perfilusuario'),
+        ),
+        migrations.AddField(
+            model_name='notificacionpush',
+            name='condominio',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='notificaciones', to='comunidad.condominio'),
+        ),
+        migrations.AddField(
+            model_name='notificacionpush',
+            name='creada_por',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='notificaciones_creadas', to='comunidad.perfilusuario'),
+        ),
+        migrations.AddField(
+            model_name='notificacionpush',
+            name='usuarios_destino',
+            field=models.ManyToManyField(blank=True, related_name='notificaciones_recibidas', to='comunidad.perfilusuario'),
+        ),
+        migrations.AddField(
+            model_name='personalmantenimiento',
+            name='condominio',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='personal_mantenimiento', to='comunidad.condominio'),
+        ),
+        migrations.AddField(
+            model_name='personalmantenimiento',
+            name='usuario',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='comunidad.perfilusuario'),
+        ),
+        migrations.AddField(
+            model_name='mantenimientopreventivo',
+            name='personal_asignado',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='comunidad.personalmantenimiento'),
+        ),
+        migrations.AddField(
+            model_name='registroeliminado',
+            name='condominio',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='comunidad.condominio'),
+        ),
+        migrations.AddField(
+            model_name='registroeliminado',
+            name='unidad',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='comunidad.unidad'),
+        ),
+        migrations.AddField(
+            model_name='registroeliminado',
+            name='usuario',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='comunidad.perfilusuario'),
+        ),
+        migrations.AddField(
+            model_name='solicitudmantenimiento',
+            name='area_comun_relacionada',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='comunidad.areacomun'),
+        ),
+        migrations.AddField(
+            model_name='solicitudmantenimiento',
+            name='asignado_a',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tareas_asignadas', to='comunidad.personalmantenimiento'),
+        ),
+        migrations.AddField(
+            model_name='solicitudmantenimiento',
+            name='asignado_por',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='mantenimientos_asignados', to='comunidad.perfilusuario'),
+        ),
+        migrations.AddField(
+            model_name='solicitudmantenimiento',
+            name='condominio',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes_mantenimiento', to='comunidad.condominio'),
+        ),
+        migrations.AddField(
+            model_name='solicitudmantenimiento',
+            name='solicitante',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='solicitudes_mantenimiento', to='comunidad.perfilusuario'),
+        ),
+        migrations.AddField(
+            model_name='solicitudmantenimiento',
+            name='unidad_relacionada',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='comunidad.unidad'),
+        ),
+        migrations.AddField(
+            model_name='comunicado',
+            name='tipo',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='comunidad.tipocomunicado'),
+        ),
+        migrations.AddField(
+            model_name='tipomantenimiento',
+            name='condominio',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tipos_mantenimiento', to='comunidad.condominio'),
+        ),
+        migrations.AddField(
+            model_name='solicitudmantenimiento',
+            name='tipo_mantenimiento',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, to='comunidad.tipomantenimiento'),
+        ),
+        migrations.AddField(
+            model_name='mantenimientopreventivo',
+            name='tipo_mantenimiento',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='comunidad.tipomantenimiento'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='lecturacomunicado',
+            unique_together={('comunicado', 'usuario')},
+        ),
+        migrations.AddIndex(
+            model_name='registroeliminado',
+            index=models.Index(fields=['fecha_eliminacion', 'id'], name='eliminado_fecha_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comunicado',
+            index=models.Index(fields=['condominio', 'fecha_actualizacion', 'id'], name='comunicado_modif_idx'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:47
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunidad', '0007_comunicacion_sincronizacion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificacionUsuario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('AVISO', 'Aviso Administrativo'), ('ALERTA', 'Alerta de Seguridad'), ('EMERGENCIA', 'Emergencia'), ('PAGO', 'Notificación de Pago'), ('RESERVA', 'Reserva de Área')], max_length=10)),
+                ('prioridad', models.CharField(choices=[('BAJA', 'Baja'), ('MEDIA', 'Media'), ('ALTA', 'Alta'), ('CRITICA', 'Crítica')], default='MEDIA', max_length=10)),
+                ('titulo', models.CharField(max_length=200)),
+                ('mensaje', models.TextField()),
+                ('datos', models.JSONField(blank=True, help_text='Datos para deep linking', null=True)),
+                ('referencia', models.CharField(help_text="Evento de origen, p. ej. 'alerta:12'; evita duplicados al reintentar", max_length=50)),
+                ('leida', models.BooleanField(default=False)),
+                ('fecha_lectura', models.DateTimeField(blank=True, null=True)),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('fecha_modificacion', models.DateTimeField(auto_now=True)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bandeja', to='comunidad.perfilusuario')),
+            ],
+            options={
+                'verbose_name': 'Notificación de Usuario',
+                'verbose_name_plural': 'Notificaciones de Usuarios',
+                'ordering': ['-fecha', '-id'],
+                'indexes': [models.Index(fields=['usuario', '-fecha', '-id'], name='bandeja_usuario_fecha_idx'), models.Index(fields=['usuario', 'tipo', '-fecha', '-id'], name='bandeja_usuario_tipo_idx'), models.Index(condition=models.Q(('leida', False)), fields=['usuario'], name='bandeja_no_leidas_idx')],
+                'constraints': [models.UniqueConstraint(fields=('referencia', 'usuario'), name='notificacion_referencia_usuario_uniq')],
+            },
+        ),
+    ]
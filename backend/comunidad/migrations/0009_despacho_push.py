@@ -0,0 +1,23 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunidad', '0008_bandeja_notificaciones'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='notificacionpush',
+            name='creada_por',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='notificaciones_creadas', to='comunidad.perfilusuario'),
+        ),
+        migrations.AddIndex(
+            model_name='notificacionpush',
+            index=models.Index(condition=models.Q(('estado', 'PENDIENTE')), fields=['fecha_programada', 'id'], name='push_pendiente_idx'),
+        ),
+    ]
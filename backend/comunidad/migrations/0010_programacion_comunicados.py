@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunidad', '0009_despacho_push'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comunicado',
+            index=models.Index(condition=models.Q(('estado', 'BORRADOR'), ('fecha_programada__isnull', False)), fields=['fecha_programada', 'id'], name='comunicado_programado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comunicado',
+            index=models.Index(condition=models.Q(('estado', 'PUBLICADO'), ('fecha_expiracion__isnull', False)), fields=['fecha_expiracion', 'id'], name='comunicado_expiracion_idx'),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 20:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def completar_hilos(apps, schema_editor):
+    """Raíz de cada respuesta existente, recorriendo los comentarios por id"""
+    ComentarioComunicado = apps.get_model('comunidad', 'ComentarioComunicado')
+    raices = {}
+    respuestas = []
+    for comentario in ComentarioComunicado.objects.order_by('id').only('id', 'padre_id').iterator():
+        if comentario.padre_id is None:
+            raices[comentario.id] = None
+            continue
+        raiz = raices.get(comentario.padre_id) or comentario.padre_id
+        raices[comentario.id] = raiz
+        comentario.hilo_id = raiz
+        respuestas.append(comentario)
+    ComentarioComunicado.objects.bulk_update(respuestas, ['hilo'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunidad', '0010_programacion_comunicados'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comentariocomunicado',
+            name='hilo',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='comunidad.comentariocomunicado'),
+        ),
+        migrations.AddIndex(
+            model_name='comentariocomunicado',
+            index=models.Index(condition=models.Q(('padre__isnull', True)), fields=['comunicado', 'id'], name='comentario_raiz_idx'),
+        ),
+        migrations.RunPython(completar_hilos, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,92 @@
+import json
+import struct
+
+from django.db import migrations, models
+
+
+# float32 little-endian, el mismo formato que lee comunidad.reconocimiento
+def _a_binario(encoding):
+    if isinstance(encoding, str):
+        encoding = json.loads(encoding)
+    if not isinstance(encoding, list) or not encoding:
+        return None
+    try:
+        return struct.pack(f'<{len(encoding)}f', *encoding)
+    except (struct.error, TypeError):
+        return None
+
+
+def _a_lista(binario):
+    binario = bytes(binario)
+    return list(struct.unpack(f'<{len(binario) // 4}f', binario))
+
+
+def convertir(apps, origen, destino, conversion):
+    for nombre in ('PerfilUsuario', 'Visitante'):
+        Modelo = apps.get_model('comunidad', nombre)
+        filas = Modelo.objects.filter(**{f'{origen}__isnull': False}).only('id', origen)
+        lote = []
+        for fila in filas.iterator(chunk_size=1000):
+            setattr(fila, destino, conversion(getattr(fila, origen)))
+            lote.append(fila)
+            if len(lote) == 1000:
+                Modelo.objects.bulk_update(lote, [destino])
+                lote = []
+        Modelo.objects.bulk_update(lote, [destino])
+
+
+def json_a_binario(apps, schema_editor):
+    convertir(apps, 'facial_encoding', 'facial_encoding_binario', _a_binario)
+
+
+def binario_a_json(apps, schema_editor):
+    convertir(apps, 'facial_encoding_binario', 'facial_encoding', _a_lista)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunidad', '0011_hilos_comentarios'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='perfilusuario',
+            name='facial_encoding_binario',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='visitante',
+            name='facial_encoding_binario',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.RunPython(json_a_binario, binario_a_json),
+        migrations.RemoveField(
+            model_name='perfilusuario',
+            name='facial_encoding',
+        ),
+        migrations.RemoveField(
+            model_name='visitante',
+            name='facial_encoding',
+        ),
+        migrations.RenameField(
+            model_name='perfilusuario',
+            old_name='facial_encoding_binario',
+            new_name='facial_encoding',
+        ),
+        migrations.RenameField(
+            model_name='visitante',
+            old_name='facial_encoding_binario',
+            new_name='facial_encoding',
+        ),
+        migrations.AlterField(
+            model_name='perfilusuario',
+            name='facial_encoding',
+            field=models.BinaryField(blank=True, help_text='Encoding facial para IA (float32)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='visitante',
+            name='facial_encoding',
+            field=models.BinaryField(blank=True, help_text='Encoding facial (float32)', null=True),
+        ),
+    ]
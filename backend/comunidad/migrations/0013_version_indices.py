@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 21:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comunidad', '0012_encodings_binarios'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionIndice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('indice', models.CharField(choices=[('FACIAL', 'Reconocimiento facial'), ('PLACAS', 'Placas vehiculares')], max_length=10)),
+                ('version', models.BigIntegerField(default=0)),
+                ('condominio', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='comunidad.condominio')),
+            ],
+            options={
+                'verbose_name': 'Versión de Índice',
+                'verbose_name_plural': 'Versiones de Índices',
+                'unique_together': {('condominio', 'indice')},
+            },
+        ),
+    ]
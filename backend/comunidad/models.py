@@ -1,5 +1,8 @@
 from django.db import models
+from django.db.models.lookups import GreaterThan, LessThan, LessThanOrEqual
 from django.contrib.auth.models import User
+from django.contrib.postgres.constraints import ExclusionConstraint
+from django.contrib.postgres.fields import DateTimeRangeField, RangeBoundary, RangeOperators
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from decimal import Decimal
@@ -20,6 +23,7 @@ class Condominio(models.Model):
     logo = models.ImageField(upload_to='condominios/logos/', blank=True, null=True)
     activo = models.BooleanField(default=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Condominio"
@@ -43,6 +47,7 @@ class TipoUsuario(models.Model):
     tipo = models.CharField(max_length=15, choices=TIPOS, unique=True)
     descripcion = models.TextField(blank=True, null=True)
     permisos_especiales = models.JSONField(default=dict, blank=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Tipo de Usuario"
@@ -64,12 +69,13 @@ class PerfilUsuario(models.Model):
     foto_perfil = models.ImageField(upload_to='usuarios/fotos/', blank=True, null=True)
     
     # Datos para reconocimiento facial
-    facial_encoding = models.JSONField(blank=True, null=True, help_text="Encoding facial para IA")
+    facial_encoding = models.BinaryField(blank=True, null=True, help_text="Encoding facial para IA (float32)")
     facial_images = models.JSONField(default=list, blank=True, help_text="URLs de imágenes para entrenamiento")
     
     activo = models.BooleanField(default=True)
     fecha_registro = models.DateTimeField(auto_now_add=True)
     ultimo_acceso = models.DateTimeField(null=True, blank=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Perfil de Usuario"
@@ -85,6 +91,7 @@ class TipoUnidad(models.Model):
     descripcion = models.TextField(blank=True, null=True)
     factor_costo = models.DecimalField(max_digits=5, decimal_places=2, default=1.00,
                                       help_text="Factor multiplicador para costos")
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Tipo de Unidad"
@@ -115,6 +122,7 @@ class Unidad(models.Model):
     
     activa = models.BooleanField(default=True)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Unidad"
@@ -139,10 +147,14 @@ class ResidenciaUnidad(models.Model):
     fecha_inicio = models.DateField()
     fecha_fin = models.DateField(null=True, blank=True)
     activa = models.BooleanField(default=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Residencia en Unidad"
         verbose_name_plural = "Residencias en Unidades"
+        indexes = [
+            models.Index(fields=['usuario', 'activa'], name='residencia_usuario_activa_idx'),
+        ]
     
     def __str__(self):
         tipo = "Propietario" if self.es_propietario else "Inquilino"
@@ -168,6 +180,7 @@ class Vehiculo(models.Model):
     foto = models.ImageField(upload_to='vehiculos/', blank=True, null=True)
     activo = models.BooleanField(default=True)
     fecha_registro = models.DateTimeField(auto_now_add=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Vehículo"
@@ -193,6 +206,7 @@ class AreaComun(models.Model):
     reglas = models.TextField(blank=True, null=True)
     imagen = models.ImageField(upload_to='areas_comunes/', blank=True, null=True)
     activa = models.BooleanField(default=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Área Común"
@@ -202,6 +216,19 @@ class AreaComun(models.Model):
         return f"{self.nombre} - {self.condominio.nombre}"
 
 
+class FechaHora(models.Func):
+    """fecha + hora como timestamp (date + time en PostgreSQL)"""
+    arg_joiner = ' + '
+    template = '(%(expressions)s)'
+    output_field = models.DateTimeField()
+
+
+class RangoHorario(models.Func):
+    """tsrange(inicio, fin, '[)')"""
+    function = 'TSRANGE'
+    output_field = DateTimeRangeField()
+
+
 class ReservaAreaComun(models.Model):
     """Reservas de áreas comunes"""
     ESTADOS = [
@@ -223,16 +250,40 @@ class ReservaAreaComun(models.Model):
     monto_total = models.DecimalField(max_digits=8, decimal_places=2, default=0)
     deposito_pagado = models.BooleanField(default=False)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Reserva de Área Común"
         verbose_name_plural = "Reservas de Áreas Comunes"
         ordering = ['-fecha_reserva', '-hora_inicio']
+        indexes = [
+            # Verificación de disponibilidad de un área en una fecha
+            models.Index(fields=['area_comun', 'fecha_reserva', 'estado'], name='reserva_area_fecha_idx'),
+            # Reservas próximas de un usuario
+            models.Index(fields=['usuario', 'estado', 'fecha_reserva'], name='reserva_usuario_estado_idx'),
+            # Sincronización incremental (fecha_modificacion, id)
+            models.Index(fields=['usuario', 'fecha_modificacion', 'id'], name='reserva_usuario_modif_idx'),
+        ]
+        # Las reservas activas de un área no se pueden solapar: restricción de
+        # exclusión RESERVA_SIN_SOLAPAMIENTO, creada en la migración 0005 solo en
+        # PostgreSQL (no se declara aquí porque SQLite no la soporta)
     
     def __str__(self):
         return f"{self.area_comun.nombre} - {self.fecha_reserva} - {self.usuario.user.get_full_name()}"
 
 
+RESERVA_SIN_SOLAPAMIENTO = ExclusionConstraint(
+    name='reserva_sin_solapamiento',
+    index_type='GIST',
+    expressions=[
+        ('area_comun', RangeOperators.EQUAL),
+        (RangoHorario(FechaHora('fecha_reserva', 'hora_inicio'), FechaHora('fecha_reserva', 'hora_fin'),
+                      RangeBoundary()), RangeOperators.OVERLAPS),
+    ],
+    condition=models.Q(estado__in=['PENDIENTE', 'CONFIRMADA']),
+)
+
+
 # Modelos para Seguridad e IA
 class CamaraSeguridad(models.Model):
     """Cámaras de seguridad del condominio"""
@@ -251,6 +302,7 @@ class CamaraSeguridad(models.Model):
     
     activa = models.BooleanField(default=True)
     fecha_instalacion = models.DateTimeField(auto_now_add=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Cámara de Seguridad"
@@ -294,6 +346,11 @@ class RegistroAcceso(models.Model):
         verbose_name = "Registro de Acceso"
         verbose_name_plural = "Registros de Acceso"
         ordering = ['-fecha_hora']
+        indexes = [
+            models.Index(fields=['usuario', '-fecha_hora'], name='acceso_usuario_fecha_idx'),
+            # Paginación por cursor (fecha_hora, id)
+            models.Index(fields=['-fecha_hora', '-id'], name='acceso_fecha_id_idx'),
+        ]
     
     def __str__(self):
         persona = self.usuario.user.get_full_name() if self.usuario else (self.visitante.nombre if self.visitante else "Desconocido")
@@ -315,7 +372,7 @@ class Visitante(models.Model):
     vehiculo_placa = models.CharField(max_length=10, blank=True, null=True)
     
     # Para IA
-    facial_encoding = models.JSONField(blank=True, null=True)
+    facial_encoding = models.BinaryField(blank=True, null=True, help_text="Encoding facial (float32)")
     
     activo = models.BooleanField(default=True)
     
@@ -364,11 +421,22 @@ class AlertaSeguridad(models.Model):
     revisada_por = models.ForeignKey(PerfilUsuario, on_delete=models.SET_NULL, null=True, blank=True, related_name='alertas_revisadas')
     fecha_revision = models.DateTimeField(null=True, blank=True)
     accion_tomada = models.TextField(blank=True, null=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Alerta de Seguridad"
         verbose_name_plural = "Alertas de Seguridad"
         ordering = ['-fecha_hora']
+        indexes = [
+            models.Index(fields=['condominio', 'revisada', '-fecha_hora'], name='alerta_condominio_fecha_idx'),
+            # Solo las alertas sin revisar, que son las que consulta el dashboard
+            models.Index(fields=['condominio', '-fecha_hora'], name='alerta_no_revisada_idx',
+                         condition=models.Q(revisada=False)),
+            # Paginación por cursor (fecha_hora, id)
+            models.Index(fields=['-fecha_hora', '-id'], name='alerta_fecha_id_idx'),
+            # Sincronización incremental (fecha_modificacion, id)
+            models.Index(fields=['condominio', 'fecha_modificacion', 'id'], name='alerta_condominio_modif_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_tipo_alerta_display()} - {self.fecha_hora.strftime('%d/%m/%Y %H:%M')}"
@@ -416,6 +484,7 @@ class ConfiguracionExpensa(models.Model):
     
     fecha_vencimiento = models.DateField()
     fecha_creacion = models.DateTimeField(auto_now_add=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     activa = models.BooleanField(default=True)
     
     class Meta:
@@ -427,6 +496,42 @@ class ConfiguracionExpensa(models.Model):
         return f"Expensas {self.periodo_mes}/{self.periodo_año} - {self.condominio.nombre}"
 
 
+def derivar_estado_cuota(estado, monto_pendiente, monto_pagado, fecha_vencimiento, hoy=None):
+    """
+    Regla única del estado de una cuota. CONDONADA se asigna a mano y no se
+    recalcula. estado_cuota_sql() es la misma regla como expresión SQL.
+    """
+    hoy = hoy or timezone.now().date()
+    if estado == 'CONDONADA':
+        return 'CONDONADA'
+    if monto_pendiente <= 0:
+        return 'PAGADA'
+    if monto_pagado > 0:
+        return 'PAGADA_PARCIAL'
+    if fecha_vencimiento < hoy:
+        return 'VENCIDA'
+    return 'PENDIENTE'
+
+
+def estado_cuota_sql(hoy=None, monto_pendiente=None, monto_pagado=None):
+    """
+    derivar_estado_cuota() como CASE para update() en bloque. En un UPDATE las
+    columnas se leen con su valor anterior, así que si la misma sentencia
+    cambia los montos hay que pasar aquí las expresiones nuevas.
+    """
+    hoy = hoy or timezone.now().date()
+    monto_pendiente = monto_pendiente if monto_pendiente is not None else models.F('monto_pendiente')
+    monto_pagado = monto_pagado if monto_pagado is not None else models.F('monto_pagado')
+    return models.Case(
+        models.When(estado='CONDONADA', then=models.Value('CONDONADA')),
+        models.When(LessThanOrEqual(monto_pendiente, 0), then=models.Value('PAGADA')),
+        models.When(GreaterThan(monto_pagado, 0), then=models.Value('PAGADA_PARCIAL')),
+        models.When(LessThan(models.F('fecha_vencimiento'), hoy), then=models.Value('VENCIDA')),
+        default=models.Value('PENDIENTE'),
+        output_field=models.CharField(),
+    )
+
+
 class CuotaMantenimiento(models.Model):
     """Cuotas de mantenimiento por unidad"""
     ESTADOS = [
@@ -462,36 +567,63 @@ class CuotaMantenimiento(models.Model):
                                           help_text="Porcentaje de riesgo predicho por IA")
     factores_riesgo = models.JSONField(blank=True, null=True,
                                       help_text="Factores considerados por IA para predicción")
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Cuota de Mantenimiento"
         verbose_name_plural = "Cuotas de Mantenimiento"
         unique_together = ['unidad', 'configuracion']
         ordering = ['-configuracion__periodo_año', '-configuracion__periodo_mes']
-    
-    def save(self, *args, **kwargs):
+        indexes = [
+            models.Index(fields=['unidad', 'estado', 'fecha_vencimiento'], name='cuota_unidad_estado_idx'),
+            # Solo las cuotas abiertas, que son las que consultan dashboard, finanzas y notificaciones
+            models.Index(fields=['unidad', 'fecha_vencimiento'], name='cuota_abierta_unidad_idx',
+                         condition=models.Q(estado__in=['PENDIENTE', 'VENCIDA'])),
+            # Sincronización incremental (fecha_modificacion, id)
+            models.Index(fields=['unidad', 'fecha_modificacion', 'id'], name='cuota_unidad_modif_idx'),
+        ]
+    
+    def calcular_totales(self):
+        """Calcula monto total, pendiente y estado. Se usa también antes de bulk_create."""
         # Calcular monto total
         self.monto_total = (self.monto_administracion + self.monto_mantenimiento + 
                            self.monto_seguridad + self.monto_limpieza + 
                            self.monto_gastos_extras + self.monto_multas + self.monto_mora)
         self.monto_pendiente = self.monto_total - self.monto_pagado
-        
-        # Actualizar estado
-        if self.monto_pendiente <= 0:
-            self.estado = 'PAGADA'
-        elif self.monto_pagado > 0:
-            self.estado = 'PAGADA_PARCIAL'
-        elif self.fecha_vencimiento < timezone.now().date():
-            self.estado = 'VENCIDA'
-        else:
-            self.estado = 'PENDIENTE'
-            
+        self.estado = derivar_estado_cuota(
+            self.estado, self.monto_pendiente, self.monto_pagado, self.fecha_vencimiento
+        )
+    
+    def save(self, *args, **kwargs):
+        self.calcular_totales()
         super().save(*args, **kwargs)
     
     def __str__(self):
         return f"{self.unidad} - {self.configuracion.periodo_mes}/{self.configuracion.periodo_año}"
 
 
+class SaldoUnidad(models.Model):
+    """Saldo consolidado por unidad, recalculado cada vez que cambian sus cuotas"""
+    unidad = models.OneToOneField(Unidad, on_delete=models.CASCADE, primary_key=True, related_name='saldo')
+    
+    total_pendiente = models.DecimalField(max_digits=12, decimal_places=2, default=0,
+                                         help_text="Saldo de cuotas pendientes y vencidas")
+    total_vencido = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cuotas_pendientes = models.IntegerField(default=0)
+    pagado_año = models.DecimalField(max_digits=12, decimal_places=2, default=0,
+                                    help_text="Total de cuotas pagadas del año de referencia")
+    año = models.IntegerField(help_text="Año de referencia de pagado_año")
+    proximo_vencimiento = models.DateField(null=True, blank=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Saldo de Unidad"
+        verbose_name_plural = "Saldos de Unidades"
+    
+    def __str__(self):
+        return f"{self.unidad} - ${self.total_pendiente}"
+
+
 class MetodoPago(models.Model):
     """Métodos de pago disponibles"""
     condominio = models.ForeignKey(Condominio, on_delete=models.CASCADE, related_name='metodos_pago')
@@ -540,16 +672,89 @@ class Pago(models.Model):
     id_transaccion_externa = models.CharField(max_length=200, blank=True, null=True)
     datos_pago_online = models.JSONField(blank=True, null=True)
     
+    # Enviada por el cliente; un reintento con la misma clave devuelve el pago original
+    clave_idempotencia = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    
     observaciones = models.TextField(blank=True, null=True)
     registrado_por = models.ForeignKey(PerfilUsuario, on_delete=models.PROTECT)
     verificado_por = models.ForeignKey(PerfilUsuario, on_delete=models.SET_NULL, 
                                      null=True, blank=True, related_name='pagos_verificados')
     fecha_verificacion = models.DateTimeField(null=True, blank=True)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name = "Pago"
         verbose_name_plural = "Pagos"
         ordering = ['-fecha_pago']
+        indexes = [
+            models.Index(fields=['cuota', 'estado', '-fecha_pago'], name='pago_cuota_estado_idx'),
+            # Paginación por cursor (fecha_pago, id)
+            models.Index(fields=['-fecha_pago', '-id'], name='pago_fecha_id_idx'),
+            # Sincronización incremental (fecha_modificacion, id)
+            models.Index(fields=['cuota', 'fecha_modificacion', 'id'], name='pago_cuota_modif_idx'),
+        ]
     
     def __str__(self):
         return f"Pago ${self.monto_pagado} - {self.cuota} - {self.fecha_pago.strftime('%d/%m/%Y')}"
+
+
+class RegistroEliminado(models.Model):
+    """
+    Lápida de una fila borrada, para que la sincronización incremental de la
+    app móvil pueda avisar qué eliminar. Guarda solo el alcance necesario para
+    filtrar por usuario: la unidad, el usuario o el condominio, según la tabla.
+    Las referencias no tienen restricción en la base: el registro sobrevive a
+    la fila a la que apuntaba.
+    """
+    tabla = models.CharField(max_length=30)
+    objeto_id = models.BigIntegerField()
+    condominio = models.ForeignKey(Condominio, on_delete=models.DO_NOTHING, db_constraint=False,
+                                   null=True, blank=True, related_name='+')
+    unidad = models.ForeignKey(Unidad, on_delete=models.DO_NOTHING, db_constraint=False,
+                               null=True, blank=True, related_name='+')
+    usuario = models.ForeignKey(PerfilUsuario, on_delete=models.DO_NOTHING, db_constraint=False,
+                                null=True, blank=True, related_name='+')
+    fecha_eliminacion = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        verbose_name = "Registro Eliminado"
+        verbose_name_plural = "Registros Eliminados"
+        indexes = [
+            models.Index(fields=['fecha_eliminacion', 'id'], name='eliminado_fecha_id_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.tabla} #{self.objeto_id} - {self.fecha_eliminacion.strftime('%d/%m/%Y %H:%M')}"
+
+
+class VersionIndice(models.Model):
+    """
+    Versión de un índice que cada proceso arma en memoria (rostros, placas)
+    por condominio. Los cambios que lo afectan la incrementan en la base, así
+    todos los procesos los ven sin depender de un cache compartido, y como
+    no se pierde nunca vuelve a un número ya usado.
+    """
+    INDICES = [
+        ('FACIAL', 'Reconocimiento facial'),
+        ('PLACAS', 'Placas vehiculares'),
+    ]
+    
+    condominio = models.ForeignKey(Condominio, on_delete=models.CASCADE, related_name='+')
+    indice = models.CharField(max_length=10, choices=INDICES)
+    version = models.BigIntegerField(default=0)
+    
+    class Meta:
+        verbose_name = "Versión de Índice"
+        verbose_name_plural = "Versiones de Índices"
+        unique_together = ['condominio', 'indice']
+    
+    def __str__(self):
+        return f"{self.get_indice_display()} - {self.condominio_id}: {self.version}"
+
+
+# Comunicados, mantenimiento y notificaciones
+from .models_comunicacion import (  # noqa: E402
+    TipoComunicado, Comunicado, LecturaComunicado, ComentarioComunicado, TipoMantenimiento,
+    PersonalMantenimiento, SolicitudMantenimiento, MantenimientoPreventivo, NotificacionPush,
+    NotificacionUsuario, ConfiguracionNotificaciones
+)
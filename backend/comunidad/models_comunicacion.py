@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinValueValidator, MaxValueValidator
+from django.utils import timezone
 from .models import Condominio, PerfilUsuario, Unidad, AreaComun
 import uuid
 
@@ -84,6 +85,15 @@ class Comunicado(models.Model):
         verbose_name = "Comunicado"
         verbose_name_plural = "Comunicados"
         ordering = ['-fecha_publicacion', '-fecha_creacion']
+        indexes = [
+            # Sincronización incremental (fecha_actualizacion, id)
+            models.Index(fields=['condominio', 'fecha_actualizacion', 'id'], name='comunicado_modif_idx'),
+            # Solo los que esperan publicación o vencimiento, para el programador
+            models.Index(fields=['fecha_programada', 'id'], name='comunicado_programado_idx',
+                         condition=models.Q(estado='BORRADOR', fecha_programada__isnull=False)),
+            models.Index(fields=['fecha_expiracion', 'id'], name='comunicado_expiracion_idx',
+                         condition=models.Q(estado='PUBLICADO', fecha_expiracion__isnull=False)),
+        ]
     
     def __str__(self):
         return f"{self.titulo} - {self.condominio.nombre}"
@@ -115,11 +125,25 @@ class ComentarioComunicado(models.Model):
     moderado = models.BooleanField(default=True)
     padre = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, 
                              related_name='respuestas')
+    # Comentario raíz del hilo (vacío en las raíces): todo un hilo se lee con un filtro
+    hilo = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True,
+                             related_name='+', editable=False)
     
     class Meta:
         verbose_name = "Comentario"
         verbose_name_plural = "Comentarios"
         ordering = ['fecha_creacion']
+        indexes = [
+            # Hilos de un comunicado paginados por id
+            models.Index(fields=['comunicado', 'id'], name='comentario_raiz_idx',
+                         condition=models.Q(padre__isnull=True)),
+        ]
+    
+    def save(self, *args, **kwargs):
+        if self.padre_id and not self.hilo_id:
+            raiz = ComentarioComunicado.objects.values_list('hilo_id', flat=True).get(pk=self.padre_id)
+            self.hilo_id = raiz or self.padre_id
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"Comentario de {self.usuario.user.get_full_name()} en {self.comunicado.titulo}"
@@ -327,17 +351,78 @@ class NotificacionPush(models.Model):
     total_entregadas = models.IntegerField(default=0)
     total_leidas = models.IntegerField(default=0)
     
-    creada_por = models.ForeignKey(PerfilUsuario, on_delete=models.PROTECT, related_name='notificaciones_creadas')
+    # Vacío en las que genera el sistema (alertas de seguridad)
+    creada_por = models.ForeignKey(PerfilUsuario, on_delete=models.PROTECT, related_name='notificaciones_creadas',
+                                   null=True, blank=True)
     
     class Meta:
         verbose_name = "Notificación Push"
         verbose_name_plural = "Notificaciones Push"
         ordering = ['-fecha_creacion']
+        indexes = [
+            # Solo las pendientes, que son las que recorre el despachador
+            models.Index(fields=['fecha_programada', 'id'], name='push_pendiente_idx',
+                         condition=models.Q(estado='PENDIENTE')),
+        ]
     
     def __str__(self):
         return f"{self.titulo} - {self.get_tipo_display()}"
 
 
+class NotificacionUsuario(models.Model):
+    """
+    Bandeja de entrada de cada usuario. Las notificaciones se escriben una vez
+    por destinatario al producirse el evento (alerta, comunicado, vencimiento),
+    así que leer la bandeja es un recorrido por índice sobre (usuario, fecha).
+    """
+    TIPOS = [
+        ('AVISO', 'Aviso Administrativo'),
+        ('ALERTA', 'Alerta de Seguridad'),
+        ('EMERGENCIA', 'Emergencia'),
+        ('PAGO', 'Notificación de Pago'),
+        ('RESERVA', 'Reserva de Área'),
+    ]
+    
+    PRIORIDADES = [
+        ('BAJA', 'Baja'),
+        ('MEDIA', 'Media'),
+        ('ALTA', 'Alta'),
+        ('CRITICA', 'Crítica'),
+    ]
+    
+    usuario = models.ForeignKey(PerfilUsuario, on_delete=models.CASCADE, related_name='bandeja')
+    tipo = models.CharField(max_length=10, choices=TIPOS)
+    prioridad = models.CharField(max_length=10, choices=PRIORIDADES, default='MEDIA')
+    titulo = models.CharField(max_length=200)
+    mensaje = models.TextField()
+    datos = models.JSONField(blank=True, null=True, help_text="Datos para deep linking")
+    referencia = models.CharField(max_length=50,
+                                  help_text="Evento de origen, p. ej. 'alerta:12'; evita duplicados al reintentar")
+    
+    leida = models.BooleanField(default=False)
+    fecha_lectura = models.DateTimeField(null=True, blank=True)
+    fecha = models.DateTimeField(default=timezone.now)
+    fecha_modificacion = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Notificación de Usuario"
+        verbose_name_plural = "Notificaciones de Usuarios"
+        ordering = ['-fecha', '-id']
+        constraints = [
+            models.UniqueConstraint(fields=['referencia', 'usuario'], name='notificacion_referencia_usuario_uniq'),
+        ]
+        indexes = [
+            # Bandeja paginada por cursor (fecha, id)
+            models.Index(fields=['usuario', '-fecha', '-id'], name='bandeja_usuario_fecha_idx'),
+            models.Index(fields=['usuario', 'tipo', '-fecha', '-id'], name='bandeja_usuario_tipo_idx'),
+            # Solo las no leídas, para el contador
+            models.Index(fields=['usuario'], name='bandeja_no_leidas_idx', condition=models.Q(leida=False)),
+        ]
+    
+    def __str__(self):
+        return f"{self.titulo} - {self.usuario.user.get_full_name()}"
+
+
 class ConfiguracionNotificaciones(models.Model):
     """Configuración de notificaciones por usuario"""
     usuario = models.OneToOneField(PerfilUsuario, on_delete=models.CASCADE, related_name='config_notificaciones')
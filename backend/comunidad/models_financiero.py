@@ -4,7 +4,7 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from decimal import Decimal
 import uuid
-from .models import Condominio, PerfilUsuario, Unidad
+from .models import Condominio, PerfilUsuario, Unidad, CuotaMantenimiento
 
 
 class TipoGasto(models.Model):
@@ -90,71 +90,6 @@ class ConfiguracionExpensa(models.Model):
         return f"Expensas {self.periodo_mes}/{self.periodo_año} - {self.condominio.nombre}"
 
 
-class CuotaMantenimiento(models.Model):
-    """Cuotas de mantenimiento por unidad"""
-    ESTADOS = [
-        ('PENDIENTE', 'Pendiente'),
-        ('PAGADA', 'Pagada'),
-        ('VENCIDA', 'Vencida'),
-        ('PAGADA_PARCIAL', 'Pagada Parcial'),
-        ('CONDONADA', 'Condonada'),
-    ]
-    
-    unidad = models.ForeignKey(Unidad, on_delete=models.CASCADE, related_name='cuotas')
-    configuracion = models.ForeignKey(ConfiguracionExpensa, on_delete=models.CASCADE, related_name='cuotas')
-    
-    # Montos calculados
-    monto_administracion = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    monto_mantenimiento = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    monto_seguridad = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    monto_limpieza = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    monto_gastos_extras = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    monto_multas = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    monto_mora = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    monto_total = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    monto_pagado = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    monto_pendiente = models.DecimalField(max_digits=10, decimal_places=2, default=0)
-    
-    estado = models.CharField(max_length=15, choices=ESTADOS, default='PENDIENTE')
-    fecha_vencimiento = models.DateField()
-    fecha_generacion = models.DateTimeField(auto_now_add=True)
-    fecha_ultimo_pago = models.DateTimeField(null=True, blank=True)
-    
-    # Para IA - Predicción de morosidad
-    riesgo_morosidad = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True,
-                                          help_text="Porcentaje de riesgo predicho por IA")
-    factores_riesgo = models.JSONField(blank=True, null=True,
-                                      help_text="Factores considerados por IA para predicción")
-    
-    class Meta:
-        verbose_name = "Cuota de Mantenimiento"
-        verbose_name_plural = "Cuotas de Mantenimiento"
-        unique_together = ['unidad', 'configuracion']
-        ordering = ['-configuracion__periodo_año', '-configuracion__periodo_mes']
-    
-    def save(self, *args, **kwargs):
-        # Calcular monto total
-        self.monto_total = (self.monto_administracion + self.monto_mantenimiento + 
-                           self.monto_seguridad + self.monto_limpieza + 
-                           self.monto_gastos_extras + self.monto_multas + self.monto_mora)
-        self.monto_pendiente = self.monto_total - self.monto_pagado
-        
-        # Actualizar estado
-        if self.monto_pendiente <= 0:
-            self.estado = 'PAGADA'
-        elif self.monto_pagado > 0:
-            self.estado = 'PAGADA_PARCIAL'
-        elif self.fecha_vencimiento < timezone.now().date():
-            self.estado = 'VENCIDA'
-        else:
-            self.estado = 'PENDIENTE'
-            
-        super().save(*args, **kwargs)
-    
-    def __str__(self):
-        return f"{self.unidad} - {self.configuracion.periodo_mes}/{self.configuracion.periodo_año}"
-
-
 class MetodoPago(models.Model):
     """Métodos de pago disponibles"""
     condominio = models.ForeignKey(Condominio, on_delete=models.CASCADE, related_name='metodos_pago')
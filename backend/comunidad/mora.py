@@ -0,0 +1,121 @@
+import math
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Value
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from .models import Condominio, CuotaMantenimiento, estado_cuota_sql
+from .saldos import recalcular_saldos
+
+
+# Estados de una cuota impaga ya vencida a la que se le aplica multa y mora
+ESTADOS_CON_MORA = ['VENCIDA', 'PAGADA_PARCIAL']
+
+DIAS_POR_MES = 30
+
+LOTE_SALDOS = 500
+
+MONTO = DecimalField(max_digits=10, decimal_places=2)
+
+# Suma de los conceptos de la cuota sin multas ni mora
+MONTO_BASE = ExpressionWrapper(
+    F('monto_administracion') + F('monto_mantenimiento') + F('monto_seguridad') +
+    F('monto_limpieza') + F('monto_gastos_extras'),
+    output_field=MONTO
+)
+
+
+def meses_de_mora(fecha_vencimiento, dias_gracia, hoy):
+    """
+    Meses de mora de una cuota a la fecha: 0 dentro del período de gracia y,
+    pasado éste, un mes por cada 30 días (o fracción) desde el vencimiento.
+    """
+    if hoy <= fecha_vencimiento + timedelta(days=dias_gracia):
+        return 0
+    return math.ceil((hoy - fecha_vencimiento).days / DIAS_POR_MES)
+
+
+def recalcular_mora_condominio(condominio_id, hoy=None):
+    """
+    Marca como vencidas las cuotas pendientes cuyo vencimiento ya pasó y fija
+    multa y mora de las cuotas vencidas con UPDATE en bloque: uno para el
+    cambio de estado y uno por cada (configuración, fecha de vencimiento).
+
+    Los montos se calculan a la fecha y no de forma acumulativa, así que
+    ejecutarlo varias veces el mismo día no cambia el resultado.
+    """
+    hoy = hoy or date.today()
+    inicio = time.perf_counter()
+    cuotas = CuotaMantenimiento.objects.filter(unidad__condominio_id=condominio_id)
+    
+    with transaction.atomic():
+        por_vencer = cuotas.filter(estado='PENDIENTE', fecha_vencimiento__lt=hoy)
+        unidad_ids = set(por_vencer.order_by().values_list('unidad_id', flat=True).distinct())
+        vencidas = por_vencer.update(estado=estado_cuota_sql(hoy), fecha_modificacion=timezone.now())
+        
+        grupos = cuotas.filter(
+            estado__in=ESTADOS_CON_MORA,
+            fecha_vencimiento__lt=hoy
+        ).order_by().values_list(
+            'configuracion_id', 'fecha_vencimiento',
+            'configuracion__dias_gracia', 'configuracion__multa_retraso_pago',
+            'configuracion__porcentaje_mora'
+        ).distinct()
+        
+        con_mora = 0
+        for configuracion_id, fecha_vencimiento, dias_gracia, multa, porcentaje in grupos:
+            meses = meses_de_mora(fecha_vencimiento, dias_gracia, hoy)
+            if meses == 0:
+                multa = Decimal('0')
+            
+            monto_mora = Round(
+                MONTO_BASE * Value(porcentaje * meses / 100, output_field=MONTO),
+                2, output_field=MONTO
+            )
+            monto_total = ExpressionWrapper(MONTO_BASE + Value(multa, output_field=MONTO) + monto_mora,
+                                            output_field=MONTO)
+            
+            grupo = cuotas.filter(
+                configuracion_id=configuracion_id,
+                fecha_vencimiento=fecha_vencimiento,
+                estado__in=ESTADOS_CON_MORA
+            ).exclude(monto_multas=multa, monto_mora=monto_mora)
+            
+            unidad_ids.update(grupo.values_list('unidad_id', flat=True))
+            monto_pendiente = ExpressionWrapper(monto_total - F('monto_pagado'), output_field=MONTO)
+            con_mora += grupo.update(
+                monto_multas=multa,
+                monto_mora=monto_mora,
+                monto_total=monto_total,
+                monto_pendiente=monto_pendiente,
+                estado=estado_cuota_sql(hoy, monto_pendiente=monto_pendiente),
+                fecha_modificacion=timezone.now()
+            )
+        
+        unidad_ids = sorted(unidad_ids)
+        for desde in range(0, len(unidad_ids), LOTE_SALDOS):
+            recalcular_saldos(unidad_ids[desde:desde + LOTE_SALDOS])
+    
+    return {
+        'condominio': str(condominio_id),
+        'cuotas_vencidas': vencidas,
+        'cuotas_con_mora': con_mora,
+        'unidades': len(unidad_ids),
+        'segundos': round(time.perf_counter() - inicio, 3),
+    }
+
+
+def recalcular_mora(hoy=None, condominio_ids=None):
+    """Recalcula estado, multas y mora de cada condominio activo"""
+    condominios = Condominio.objects.filter(activo=True)
+    if condominio_ids:
+        condominios = condominios.filter(pk__in=condominio_ids)
+    
+    return [
+        recalcular_mora_condominio(condominio_id, hoy)
+        for condominio_id in condominios.values_list('pk', flat=True)
+    ]
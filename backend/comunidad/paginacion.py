@@ -0,0 +1,148 @@
+import base64
+import json
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class PaginacionKeyset(BasePagination):
+    """
+    Paginación por cursor (keyset) para registros que solo crecen.
+
+    Ordena de más reciente a más antiguo por (campo_orden, id) y cada página se
+    pide con WHERE (campo_orden, id) < (último visto) en lugar de OFFSET, así que
+    el costo no depende de qué tan profundo se navegue y las inserciones nuevas
+    no desplazan las páginas siguientes. No ejecuta COUNT(*) salvo que el cliente
+    lo pida con ?total=true.
+    """
+    campo_orden = None
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    total_query_param = 'total'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        tamaño = self.get_page_size(request)
+        cursor = self.decodificar_cursor(request)
+
+        self.total = queryset.count() if self.incluir_total(request) else None
+
+        hacia_atras = cursor is not None and cursor['direccion'] == 'anterior'
+        if cursor is not None:
+            valor, pk = cursor['valor'], cursor['id']
+            if hacia_atras:
+                queryset = queryset.filter(
+                    Q(**{f'{self.campo_orden}__gt': valor}) | Q(**{self.campo_orden: valor, 'id__gt': pk})
+                )
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{self.campo_orden}__lt': valor}) | Q(**{self.campo_orden: valor, 'id__lt': pk})
+                )
+
+        if hacia_atras:
+            queryset = queryset.order_by(self.campo_orden, 'id')
+        else:
+            queryset = queryset.order_by(f'-{self.campo_orden}', '-id')
+
+        # Se pide una fila de más para saber si hay otra página en esa dirección
+        filas = list(queryset[:tamaño + 1])
+        hay_mas = len(filas) > tamaño
+        filas = filas[:tamaño]
+        if hacia_atras:
+            filas.reverse()
+
+        if hacia_atras:
+            self.hay_siguiente, self.hay_anterior = True, hay_mas
+        else:
+            self.hay_siguiente, self.hay_anterior = hay_mas, cursor is not None
+
+        self.pagina = filas
+        return filas
+
+    def get_paginated_response(self, data):
+        respuesta = {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+        if self.total is not None:
+            respuesta = {'count': self.total, **respuesta}
+        return Response(respuesta)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            tamaño = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if tamaño <= 0:
+            return self.page_size
+        return min(tamaño, self.max_page_size)
+
+    def incluir_total(self, request):
+        return request.query_params.get(self.total_query_param, '').lower() in ('1', 'true', 'si', 'sí')
+
+    def get_next_link(self):
+        if not self.hay_siguiente or not self.pagina:
+            return None
+        return self.enlace(self.pagina[-1], 'siguiente')
+
+    def get_previous_link(self):
+        if not self.hay_anterior or not self.pagina:
+            return None
+        return self.enlace(self.pagina[0], 'anterior')
+
+    def enlace(self, fila, direccion):
+        valor = getattr(fila, self.campo_orden)
+        contenido = json.dumps({'v': valor.isoformat(), 'id': fila.pk, 'd': direccion})
+        cursor = base64.urlsafe_b64encode(contenido.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decodificar_cursor(self, request):
+        codificado = request.query_params.get(self.cursor_query_param)
+        if not codificado:
+            return None
+        try:
+            contenido = json.loads(base64.urlsafe_b64decode(codificado.encode()).decode())
+            return {
+                'valor': datetime.fromisoformat(contenido['v']),
+                'id': int(contenido['id']),
+                'direccion': 'anterior' if contenido['d'] == 'anterior' else 'siguiente',
+            }
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class PaginacionPorFechaHora(PaginacionKeyset):
+    """Para RegistroAcceso y AlertaSeguridad"""
+    campo_orden = 'fecha_hora'
+
+
+class PaginacionPorFechaPago(PaginacionKeyset):
+    """Para Pago"""
+    campo_orden = 'fecha_pago'
+
+
+class PaginacionPorFecha(PaginacionKeyset):
+    """Para NotificacionUsuario"""
+    campo_orden = 'fecha'
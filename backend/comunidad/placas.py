@@ -0,0 +1,203 @@
+import re
+import threading
+from collections import defaultdict, namedtuple
+from datetime import datetime
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .models import RegistroAcceso, Vehiculo, Visitante
+from .versiones import incrementar_version_indice, version_indice
+
+
+VEHICULO = 'vehiculo'
+VISITANTE = 'visitante'
+
+# Niveles de coincidencia, del más al menos confiable
+EXACTA = 'EXACTA'
+OCR = 'OCR'
+APROXIMADA = 'APROXIMADA'
+
+# Caracteres que el OCR confunde entre sí, llevados a un mismo representante
+CONFUSIONES_OCR = str.maketrans({
+    'O': '0', 'Q': '0', 'D': '0',
+    'I': '1', 'L': '1',
+    'Z': '2',
+    'S': '5',
+    'G': '6',
+    'B': '8',
+})
+
+# Una misma placa leída de nuevo por la misma cámara en este lapso no genera otro registro
+SEGUNDOS_SIN_REPETIR = 60
+
+Entrada = namedtuple('Entrada', ['tipo', 'id', 'placa', 'usuario_id'])
+Resultado = namedtuple('Resultado', ['lectura', 'entrada', 'coincidencia'])
+
+
+def normalizar_placa(texto):
+    """Mayúsculas y solo letras y números: 'abc-123 ' -> 'ABC123'"""
+    return re.sub(r'[^A-Z0-9]', '', (texto or '').upper())
+
+
+def forma_ocr(placa):
+    return placa.translate(CONFUSIONES_OCR)
+
+
+def _borrados(forma):
+    """(posición, forma sin ese carácter) para cada carácter de la forma"""
+    return [(i, forma[:i] + forma[i + 1:]) for i in range(len(forma))]
+
+
+class IndicePlacas:
+    """
+    Placas de los vehículos activos del condominio y de los visitantes del día
+    que llegan en vehículo. Cada lectura se resuelve con búsquedas en
+    diccionarios: la placa exacta, su forma OCR (caracteres confundibles
+    unificados) y las formas con un carácter menos. Con estas últimas se
+    encuentra, además de las confusiones del OCR, un carácter sobrante o
+    faltante (la forma sin un carácter es igual a la otra) o cambiado (las
+    dos formas sin el carácter de la misma posición son iguales).
+    """
+
+    def __init__(self, condominio_id, version, dia):
+        self.condominio_id = condominio_id
+        self.version = version
+        self.dia = dia
+        self.exactas = {}
+        self.por_forma = defaultdict(set)
+        self.por_borrado = defaultdict(set)
+        self.por_sustitucion = defaultdict(set)
+
+    def agregar(self, entrada):
+        if not entrada.placa:
+            return
+        self.exactas[entrada.placa] = entrada
+        forma = forma_ocr(entrada.placa)
+        self.por_forma[forma].add(entrada)
+        for posicion, borrado in _borrados(forma):
+            self.por_borrado[borrado].add(entrada)
+            self.por_sustitucion[posicion, borrado].add(entrada)
+
+    def cargar(self):
+        """Dos consultas: vehículos activos y visitantes de hoy que siguen dentro"""
+        inicio_dia = timezone.make_aware(datetime.combine(self.dia, datetime.min.time()))
+        vehiculos = Vehiculo.objects.filter(
+            propietario__condominio_id=self.condominio_id, propietario__activo=True, activo=True
+        ).values_list('id', 'placa', 'propietario_id')
+        for pk, placa, propietario_id in vehiculos.iterator():
+            self.agregar(Entrada(VEHICULO, pk, normalizar_placa(placa), propietario_id))
+
+        visitantes = Visitante.objects.filter(
+            unidad_destino__condominio_id=self.condominio_id, activo=True,
+            fecha_hora_entrada__gte=inicio_dia, fecha_hora_salida__isnull=True,
+            vehiculo_placa__isnull=False
+        ).values_list('id', 'vehiculo_placa')
+        for pk, placa in visitantes.iterator():
+            placa = normalizar_placa(placa)
+            # Un vehículo registrado tiene prioridad sobre la visita con la misma placa
+            if placa not in self.exactas:
+                self.agregar(Entrada(VISITANTE, pk, placa, None))
+        return self
+
+    def buscar(self, lectura):
+        """(entrada, nivel de coincidencia) o (None, None) si no hay o si es ambigua"""
+        placa = normalizar_placa(lectura)
+        if not placa:
+            return None, None
+        if placa in self.exactas:
+            return self.exactas[placa], EXACTA
+
+        forma = forma_ocr(placa)
+        candidatas = self.por_forma.get(forma, set())
+        if candidatas:
+            return (next(iter(candidatas)), OCR) if len(candidatas) == 1 else (None, None)
+
+        # Distancia 1: a la lectura le falta un carácter, le sobra uno o tiene uno cambiado
+        candidatas = set(self.por_borrado.get(forma, ()))
+        for posicion, borrado in _borrados(forma):
+            candidatas |= self.por_forma.get(borrado, set()) | self.por_sustitucion.get((posicion, borrado), set())
+        if len(candidatas) == 1:
+            return next(iter(candidatas)), APROXIMADA
+        return None, None
+
+
+# =====================================
+# ÍNDICE POR PROCESO
+# =====================================
+
+INDICE = 'PLACAS'
+
+
+def invalidar_placas(condominio_id):
+    """
+    El índice del condominio se reconstruye en cada proceso en su próxima
+    búsqueda. La versión vive en la base (VersionIndice): todos los procesos
+    la ven aunque el cache sea por proceso, y no vuelve a un número ya usado.
+    """
+    incrementar_version_indice(condominio_id, INDICE)
+
+
+_indices = {}
+_candado_indices = threading.Lock()
+
+
+def obtener_indice_placas(condominio_id):
+    """Índice del condominio en este proceso; se reconstruye si cambió la versión o el día"""
+    version = version_indice(condominio_id, INDICE)
+    hoy = timezone.localdate()
+    indice = _indices.get(condominio_id)
+    if indice is None or indice.version != version or indice.dia != hoy:
+        indice = IndicePlacas(condominio_id, version, hoy).cargar()
+        with _candado_indices:
+            _indices[condominio_id] = indice
+    return indice
+
+
+def descartar_indices_placas():
+    with _candado_indices:
+        _indices.clear()
+
+
+# =====================================
+# RESOLUCIÓN DE LECTURAS
+# =====================================
+
+def resolver_lecturas(condominio_id, lecturas):
+    """Un Resultado por lectura de placa, todas contra el mismo índice"""
+    indice = obtener_indice_placas(condominio_id)
+    return [Resultado(lectura, *indice.buscar(lectura['placa'])) for lectura in lecturas]
+
+
+def registrar_accesos_vehiculares(condominio_id, lecturas, tipo_acceso, camara_id=None):
+    """
+    Resuelve el lote de lecturas y deja un RegistroAcceso VEHICULAR por placa,
+    con un solo INSERT. Las lecturas repetidas de la misma placa (en el lote,
+    o por la misma cámara en los últimos SEGUNDOS_SIN_REPETIR) no generan
+    otro registro. Las placas desconocidas quedan como no autorizadas.
+    """
+    resultados = resolver_lecturas(condominio_id, lecturas)
+    registros, vistas = [], set()
+    for resultado in resultados:
+        placa = resultado.entrada.placa if resultado.entrada else normalizar_placa(resultado.lectura['placa'])
+        if not placa or placa in vistas:
+            continue
+        vistas.add(placa)
+        if not cache.add(f'placas:{condominio_id}:{camara_id}:{tipo_acceso}:{placa}', True, SEGUNDOS_SIN_REPETIR):
+            continue
+
+        entrada = resultado.entrada
+        registros.append(RegistroAcceso(
+            condominio_id=condominio_id,
+            usuario_id=entrada.usuario_id if entrada else None,
+            vehiculo_id=entrada.id if entrada and entrada.tipo == VEHICULO else None,
+            visitante_id=entrada.id if entrada and entrada.tipo == VISITANTE else None,
+            camara_id=camara_id,
+            tipo_acceso=tipo_acceso,
+            metodo_identificacion='VEHICULAR',
+            confianza_ia=resultado.lectura.get('confianza'),
+            autorizado=entrada is not None,
+            observaciones=None if entrada else f'Placa no registrada: {placa}',
+        ))
+    RegistroAcceso.objects.bulk_create(registros)
+    return resultados, len(registros)
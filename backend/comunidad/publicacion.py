@@ -0,0 +1,86 @@
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from .bandeja import comunicado_entregado, destinatarios_comunicado, notificar_comunicado
+from .models import Comunicado
+from .push import crear_push_comunicado
+
+
+# Comunicados por transacción al publicar (cada uno hace su fan-out)
+TAMAÑO_LOTE_PUBLICACION = 50
+
+# Comunicados por UPDATE al archivar
+TAMAÑO_LOTE_EXPIRACION = 1000
+
+
+def difundir_comunicado(comunicado):
+    """
+    Bandeja y push de un comunicado publicado. La audiencia se resuelve una
+    sola vez y sirve para los dos; si ya se difundió no hace nada.
+    """
+    if comunicado_entregado(comunicado):
+        return 0
+    usuario_ids = list(destinatarios_comunicado(comunicado))
+    if not usuario_ids:
+        return 0
+    entregadas = notificar_comunicado(comunicado, usuario_ids)
+    crear_push_comunicado(comunicado, usuario_ids)
+    return entregadas
+
+
+def publicar_programados(ahora=None, tamaño_lote=TAMAÑO_LOTE_PUBLICACION):
+    """
+    Publica los borradores cuya fecha programada ya llegó. Se leen por el
+    índice parcial de programados, de a lotes bloqueados con SKIP LOCKED (dos
+    procesos no toman el mismo), y la difusión va en la misma transacción: si
+    falla, el lote vuelve a quedar pendiente. Los que además ya expiraron se
+    archivan sin difundirse. Devuelve cuántos se publicaron.
+    """
+    ahora = ahora or timezone.now()
+    publicados = 0
+    while True:
+        with transaction.atomic():
+            comunicados = list(
+                Comunicado.objects.select_for_update(skip_locked=True)
+                .filter(estado='BORRADOR', fecha_programada__lte=ahora)
+                .order_by('fecha_programada', 'id')[:tamaño_lote]
+            )
+            if not comunicados:
+                return publicados
+
+            vencidos = [c.pk for c in comunicados if c.fecha_expiracion and c.fecha_expiracion <= ahora]
+            Comunicado.objects.filter(pk__in=vencidos).update(estado='ARCHIVADO', fecha_actualizacion=ahora)
+            vigentes = [c for c in comunicados if c.pk not in vencidos]
+            Comunicado.objects.filter(pk__in=[c.pk for c in vigentes]).update(
+                estado='PUBLICADO', fecha_publicacion=ahora, fecha_actualizacion=ahora
+            )
+            for comunicado in vigentes:
+                comunicado.estado, comunicado.fecha_publicacion = 'PUBLICADO', ahora
+                difundir_comunicado(comunicado)
+            publicados += len(vigentes)
+
+
+def archivar_expirados(ahora=None, tamaño_lote=TAMAÑO_LOTE_EXPIRACION):
+    """Archiva los comunicados publicados cuya fecha de expiración ya pasó. Devuelve cuántos"""
+    ahora = ahora or timezone.now()
+    expirados = Comunicado.objects.filter(estado='PUBLICADO', fecha_expiracion__lte=ahora)
+    archivados = 0
+    while ids := list(expirados.order_by('fecha_expiracion', 'id').values_list('id', flat=True)[:tamaño_lote]):
+        archivados += Comunicado.objects.filter(pk__in=ids, estado='PUBLICADO').update(
+            estado='ARCHIVADO', fecha_actualizacion=ahora
+        )
+    return archivados
+
+
+def procesar_programacion(ahora=None):
+    ahora = ahora or timezone.now()
+    return {'publicados': publicar_programados(ahora), 'archivados': archivar_expirados(ahora)}
+
+
+def ejecutar_programador(intervalo=60, detener=lambda: False):
+    """Bucle del proceso en segundo plano; cada vuelta solo lee los índices parciales"""
+    while not detener():
+        procesar_programacion()
+        time.sleep(intervalo)
@@ -0,0 +1,338 @@
+import json
+import logging
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import ConfiguracionNotificaciones, NotificacionPush
+
+
+logger = logging.getLogger(__name__)
+
+# Plataforma -> columna de ConfiguracionNotificaciones con el token del dispositivo
+CAMPOS_TOKEN = {
+    'FIREBASE': 'token_firebase',
+    'APNS': 'token_apns',
+}
+
+# Tipo de notificación -> preferencia que la habilita; GENERAL se envía siempre
+PREFERENCIA_POR_TIPO = {
+    'SEGURIDAD': 'alertas_seguridad',
+    'COMUNICADO': 'comunicados_generales',
+    'PAGO': 'recordatorios_pago',
+    'MANTENIMIENTO': 'mantenimiento',
+    'RESERVA': 'reservas',
+}
+
+# Las alertas de seguridad se envían también en horario de no molestar; las
+# demás se postergan hasta que termina
+TIPOS_SIN_NO_MOLESTAR = ['SEGURIDAD']
+
+# Niveles de alerta que generan notificación push además de la bandeja
+NIVELES_ALERTA_PUSH = ['ALTA', 'CRITICA']
+
+ResultadoEnvio = namedtuple('ResultadoEnvio', ['entregadas', 'tokens_invalidos'])
+
+
+def configuracion_push(clave):
+    return settings.PUSH_NOTIFICATIONS[clave]
+
+
+# =====================================
+# TRANSPORTES
+# =====================================
+
+class TransportePush:
+    """
+    Envía un mensaje a un lote de tokens de una plataforma. Las
+    implementaciones se configuran por ruta en PUSH_NOTIFICATIONS['TRANSPORTES']
+    y deben poder usarse desde varios hilos a la vez.
+    """
+
+    def enviar(self, tokens, mensaje):
+        """Devuelve ResultadoEnvio(entregadas, tokens_invalidos)"""
+        raise NotImplementedError
+
+
+class TransporteNulo(TransportePush):
+    """
+    Sin proveedor configurado: no envía nada, solo lo anota en el log. No
+    cuenta entregas, así que las notificaciones quedan como FALLIDA.
+    """
+
+    def enviar(self, tokens, mensaje):
+        logger.info('Push sin transporte configurado: %s tokens, "%s"', len(tokens), mensaje['titulo'])
+        return ResultadoEnvio(0, [])
+
+
+class TransporteFCM(TransportePush):
+    """
+    Firebase Cloud Messaging (API HTTP v1), un pedido por token. Requiere
+    google-auth y la cuenta de servicio en FCM_CREDENCIALES.
+    """
+    URL = 'https://fcm.googleapis.com/v1/projects/{proyecto}/messages:send'
+    ERRORES_TOKEN_INVALIDO = ('UNREGISTERED', 'INVALID_ARGUMENT')
+
+    def __init__(self):
+        try:
+            from google.oauth2 import service_account
+        except ImportError:
+            raise ImproperlyConfigured('TransporteFCM requiere el paquete google-auth')
+        archivo = configuracion_push('FCM_CREDENCIALES')
+        if not archivo:
+            raise ImproperlyConfigured('Falta PUSH_NOTIFICATIONS["FCM_CREDENCIALES"]')
+        self.credenciales = service_account.Credentials.from_service_account_file(
+            archivo, scopes=['https://www.googleapis.com/auth/firebase.messaging']
+        )
+        self.url = self.URL.format(proyecto=self.credenciales.project_id)
+
+    def _token_acceso(self):
+        from google.auth.transport.requests import Request
+        if not self.credenciales.valid:
+            self.credenciales.refresh(Request())
+        return self.credenciales.token
+
+    def enviar(self, tokens, mensaje):
+        cabeceras = {'Authorization': f'Bearer {self._token_acceso()}', 'Content-Type': 'application/json'}
+        entregadas, invalidos = 0, []
+        for token in tokens:
+            cuerpo = json.dumps({'message': {
+                'token': token,
+                'notification': {'title': mensaje['titulo'], 'body': mensaje['mensaje']},
+                'data': {clave: str(valor) for clave, valor in (mensaje['datos'] or {}).items()},
+            }}).encode()
+            try:
+                urllib.request.urlopen(urllib.request.Request(self.url, cuerpo, cabeceras), timeout=10)
+                entregadas += 1
+            except urllib.error.HTTPError as error:
+                if any(codigo in error.read().decode(errors='ignore') for codigo in self.ERRORES_TOKEN_INVALIDO):
+                    invalidos.append(token)
+            except urllib.error.URLError as error:
+                logger.warning('FCM no disponible: %s', error)
+        return ResultadoEnvio(entregadas, invalidos)
+
+
+@lru_cache(maxsize=None)
+def obtener_transporte(plataforma):
+    return import_string(configuracion_push('TRANSPORTES')[plataforma])()
+
+
+# =====================================
+# AUDIENCIA
+# =====================================
+
+def en_no_molestar(hora):
+    """Configuraciones cuyo horario de no molestar incluye `hora` (puede cruzar la medianoche)"""
+    mismo_dia = Q(no_molestar_inicio__lte=F('no_molestar_fin')) & Q(no_molestar_inicio__lte=hora, no_molestar_fin__gt=hora)
+    cruza_medianoche = Q(no_molestar_inicio__gt=F('no_molestar_fin')) & (
+        Q(no_molestar_inicio__lte=hora) | Q(no_molestar_fin__gt=hora)
+    )
+    return mismo_dia | cruza_medianoche
+
+
+def _audiencia(notificacion):
+    """Configuraciones de la audiencia que aceptan el tipo de notificación"""
+    configuraciones = ConfiguracionNotificaciones.objects.filter(usuario__activo=True)
+    if notificacion.enviar_a_todos:
+        configuraciones = configuraciones.filter(usuario__condominio_id=notificacion.condominio_id)
+    else:
+        configuraciones = configuraciones.filter(usuario__in=notificacion.usuarios_destino.values('pk'))
+
+    preferencia = PREFERENCIA_POR_TIPO.get(notificacion.tipo)
+    if notificacion.tipo == 'COMUNICADO' and (notificacion.datos_adicionales or {}).get('urgente'):
+        preferencia = 'comunicados_urgentes'
+    if preferencia:
+        configuraciones = configuraciones.filter(**{preferencia: True})
+    return configuraciones
+
+
+def destinatarios(notificacion, ahora=None):
+    """
+    Tokens (firebase, apns) de los destinatarios con una sola consulta: la
+    audiencia, la preferencia del tipo y el horario de no molestar se filtran
+    en la base de datos.
+    """
+    configuraciones = _audiencia(notificacion)
+    if notificacion.tipo not in TIPOS_SIN_NO_MOLESTAR:
+        configuraciones = configuraciones.exclude(en_no_molestar(timezone.localtime(ahora).time()))
+    return configuraciones.values_list(*CAMPOS_TOKEN.values())
+
+
+def postergar_no_molestar(notificacion, ahora=None):
+    """
+    Los destinatarios que están en horario de no molestar la reciben cuando
+    termina: una copia programada para cada hora de fin distinta, solo para
+    ellos. Una consulta para encontrarlos y una transacción por copia.
+    Devuelve cuántos destinatarios se postergaron.
+    """
+    if notificacion.tipo in TIPOS_SIN_NO_MOLESTAR:
+        return 0
+    local = timezone.localtime(ahora)
+    por_fin = defaultdict(list)
+    en_pausa = _audiencia(notificacion).filter(en_no_molestar(local.time())).filter(
+        Q(token_firebase__isnull=False) | Q(token_apns__isnull=False)
+    )
+    for usuario_id, fin in en_pausa.values_list('usuario_id', 'no_molestar_fin').iterator():
+        por_fin[fin].append(usuario_id)
+
+    for fin, usuario_ids in por_fin.items():
+        fecha = timezone.make_aware(datetime.combine(local.date(), fin))
+        if fecha <= local:
+            fecha += timedelta(days=1)
+        with transaction.atomic():
+            copia = NotificacionPush.objects.create(
+                condominio_id=notificacion.condominio_id,
+                tipo=notificacion.tipo,
+                titulo=notificacion.titulo,
+                mensaje=notificacion.mensaje,
+                datos_adicionales=notificacion.datos_adicionales,
+                fecha_programada=fecha,
+                creada_por_id=notificacion.creada_por_id,
+            )
+            Destino = NotificacionPush.usuarios_destino.through
+            Destino.objects.bulk_create(
+                (Destino(notificacionpush_id=copia.pk, perfilusuario_id=usuario_id) for usuario_id in usuario_ids),
+                batch_size=1000
+            )
+    return sum(len(usuario_ids) for usuario_ids in por_fin.values())
+
+
+# =====================================
+# DESPACHO
+# =====================================
+
+def _lotes(tokens, tamaño):
+    tokens = iter(tokens)
+    while lote := list(islice(tokens, tamaño)):
+        yield lote
+
+
+def _enviar_lote(plataforma, tokens, mensaje):
+    try:
+        return obtener_transporte(plataforma).enviar(tokens, mensaje)
+    except Exception:
+        logger.exception('Falló el envío de %s notificaciones por %s', len(tokens), plataforma)
+        return ResultadoEnvio(0, [])
+
+
+def despachar(notificacion, ahora=None):
+    """
+    Envía una NotificacionPush pendiente. La notificación se toma con un UPDATE
+    condicional, así que dos despachadores no la envían dos veces. Los lotes
+    de tokens salen en paralelo (hasta CONCURRENCIA a la vez) y los contadores
+    se actualizan con un solo UPDATE al final. Los tokens que el proveedor
+    rechaza se borran de la configuración, y los destinatarios en horario de
+    no molestar quedan en una copia programada para cuando termina.
+    """
+    ahora = ahora or timezone.now()
+    tomada = NotificacionPush.objects.filter(pk=notificacion.pk, estado='PENDIENTE').update(
+        estado='ENVIADA', fecha_enviada=ahora
+    )
+    if not tomada:
+        return None
+
+    postergados = postergar_no_molestar(notificacion, ahora)
+    tokens = defaultdict(list)
+    for fila in destinatarios(notificacion, ahora).iterator():
+        for plataforma, token in zip(CAMPOS_TOKEN, fila):
+            if token:
+                tokens[plataforma].append(token)
+
+    mensaje = {
+        'titulo': notificacion.titulo,
+        'mensaje': notificacion.mensaje,
+        'datos': {'tipo': notificacion.tipo, **(notificacion.datos_adicionales or {})},
+    }
+    lotes = [
+        (plataforma, lote)
+        for plataforma, lista in tokens.items()
+        for lote in _lotes(lista, configuracion_push('TAMAÑO_LOTE'))
+    ]
+    with ThreadPoolExecutor(max_workers=configuracion_push('CONCURRENCIA')) as ejecutor:
+        resultados = list(ejecutor.map(lambda envio: _enviar_lote(envio[0], envio[1], mensaje), lotes))
+
+    invalidos = defaultdict(list)
+    for (plataforma, _), resultado in zip(lotes, resultados):
+        invalidos[plataforma].extend(resultado.tokens_invalidos)
+    for plataforma, lista in invalidos.items():
+        if lista:
+            campo = CAMPOS_TOKEN[plataforma]
+            ConfiguracionNotificaciones.objects.filter(**{f'{campo}__in': lista}).update(**{campo: None})
+
+    enviadas = sum(len(lote) for _, lote in lotes)
+    entregadas = sum(resultado.entregadas for resultado in resultados)
+    NotificacionPush.objects.filter(pk=notificacion.pk).update(
+        total_enviadas=F('total_enviadas') + enviadas,
+        total_entregadas=F('total_entregadas') + entregadas,
+        estado='FALLIDA' if enviadas and not entregadas else 'ENVIADA',
+    )
+    return {'notificacion': notificacion.pk, 'enviadas': enviadas, 'entregadas': entregadas,
+            'postergados': postergados}
+
+
+def despachar_pendientes(limite=100, ahora=None):
+    """Despacha las notificaciones pendientes cuya fecha programada ya llegó"""
+    ahora = ahora or timezone.now()
+    pendientes = NotificacionPush.objects.filter(
+        Q(fecha_programada__isnull=True) | Q(fecha_programada__lte=ahora),
+        estado='PENDIENTE'
+    ).order_by('fecha_programada', 'id')[:limite]
+    return [resumen for resumen in (despachar(notificacion, ahora) for notificacion in list(pendientes)) if resumen]
+
+
+def ejecutar_despachador(intervalo=2, detener=lambda: False):
+    """Bucle del proceso en segundo plano"""
+    while not detener():
+        if not despachar_pendientes():
+            time.sleep(intervalo)
+
+
+def crear_push_alerta(alerta):
+    """Push a todo el condominio para las alertas de nivel alto"""
+    if alerta.nivel not in NIVELES_ALERTA_PUSH:
+        return None
+    return NotificacionPush.objects.create(
+        condominio_id=alerta.condominio_id,
+        tipo='SEGURIDAD',
+        titulo=alerta.get_tipo_alerta_display()[:100],
+        mensaje=alerta.descripcion[:200],
+        datos_adicionales={'alerta_id': alerta.pk},
+        enviar_a_todos=True,
+    )
+
+
+def crear_push_comunicado(comunicado, usuario_ids):
+    """
+    Push del comunicado publicado para la audiencia ya resuelta. Con audiencia
+    TODOS alcanza con enviar_a_todos; si no, los destinatarios se insertan por
+    lotes en la misma transacción, así el despachador no la ve a medias.
+    """
+    with transaction.atomic():
+        notificacion = NotificacionPush.objects.create(
+            condominio_id=comunicado.condominio_id,
+            tipo='COMUNICADO',
+            titulo=comunicado.titulo[:100],
+            mensaje=(comunicado.resumen or comunicado.contenido)[:200],
+            datos_adicionales={'comunicado_id': comunicado.pk, 'urgente': comunicado.es_urgente},
+            enviar_a_todos=comunicado.audiencia == 'TODOS',
+            creada_por_id=comunicado.autor_id,
+        )
+        if not notificacion.enviar_a_todos:
+            Destino = NotificacionPush.usuarios_destino.through
+            Destino.objects.bulk_create(
+                (Destino(notificacionpush_id=notificacion.pk, perfilusuario_id=usuario_id) for usuario_id in usuario_ids),
+                batch_size=1000
+            )
+    return notificacion
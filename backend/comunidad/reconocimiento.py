@@ -0,0 +1,274 @@
+import logging
+import threading
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import PerfilUsuario, RegistroAcceso, Visitante
+from .versiones import incrementar_version_indice, version_indice
+
+
+logger = logging.getLogger(__name__)
+
+USUARIO = 'usuario'
+VISITANTE = 'visitante'
+
+# Cambios que un proceso aplica uno por uno antes de preferir recargar todo
+MAXIMO_CAMBIOS_INCREMENTALES = 200
+
+# Los cambios quedan en el cache este tiempo para los demás procesos
+RETENCION_CAMBIOS = 60 * 60
+
+INDICE = 'FACIAL'
+
+# Formato de facial_encoding en la base: float32 little-endian
+TIPO_ENCODING = np.dtype('<f4')
+
+Coincidencia = namedtuple('Coincidencia', ['tipo', 'id', 'distancia', 'confianza'])
+
+
+def configuracion_facial(clave):
+    return settings.AI_SERVICES['FACE_RECOGNITION'][clave]
+
+
+def _encodings(tipo, condominio_id, ids=None):
+    """Filas (id, encoding) activas con encoding de un tipo, todo el condominio o solo `ids`"""
+    if tipo == USUARIO:
+        filas = PerfilUsuario.objects.filter(condominio_id=condominio_id, activo=True)
+    else:
+        filas = Visitante.objects.filter(unidad_destino__condominio_id=condominio_id, activo=True)
+    if ids is not None:
+        filas = filas.filter(pk__in=ids)
+    return filas.filter(facial_encoding__isnull=False).values_list('id', 'facial_encoding')
+
+
+def codificar_encoding(encoding):
+    """Lista o arreglo de números -> bytes para facial_encoding"""
+    return np.asarray(encoding, dtype=TIPO_ENCODING).tobytes()
+
+
+def decodificar_encoding(binario, dimension=None):
+    """Vista float32 (sin copia) sobre el valor de facial_encoding; None si no tiene la dimensión"""
+    dimension = dimension or configuracion_facial('DIMENSION')
+    if binario is None or len(binario) != dimension * TIPO_ENCODING.itemsize:
+        return None
+    return np.frombuffer(binario, dtype=TIPO_ENCODING)
+
+
+# =====================================
+# VERSIONES ENTRE PROCESOS
+# =====================================
+
+def _clave_cambio(condominio_id, version):
+    return f'facial:{condominio_id}:cambio:{version}'
+
+
+def registrar_cambio(condominio_id, tipo, pk):
+    """
+    Anota que cambió el encoding (o el estado) de un usuario o visitante. La
+    versión se incrementa en la base, así todos los procesos se enteran en su
+    próxima búsqueda. Qué fila cambió queda en el cache: con un cache
+    compartido los demás procesos releen solo esa fila; si no la encuentran
+    (cache por proceso o clave descartada) recargan el índice completo.
+    """
+    version = incrementar_version_indice(condominio_id, INDICE)
+    cache.set(_clave_cambio(condominio_id, version), (tipo, pk), RETENCION_CAMBIOS)
+
+
+# =====================================
+# ÍNDICE
+# =====================================
+
+class IndiceFacial:
+    """
+    Encodings activos de un condominio en una matriz float32 contigua, con la
+    norma de cada fila precalculada. La matriz es una vista de numpy sobre un
+    bytearray al que se copian tal cual los bytes de facial_encoding: cargar
+    el índice no convierte ni un número. La búsqueda del vecino más cercano
+    de un lote de rostros es una multiplicación de matrices:
+    |q - m|² = |q|² + |m|² - 2 q·m. Las altas, cambios y bajas se aplican
+    sobre la matriz sin recargarla (la capacidad crece al doble).
+    """
+
+    def __init__(self, condominio_id, dimension):
+        self.condominio_id = condominio_id
+        self.dimension = dimension
+        self.version = 0
+        # Reentrante: sincronizar() llama a cargar() y actualizar() con el candado tomado
+        self._candado = threading.RLock()
+        self._vaciar()
+
+    def _vaciar(self, capacidad=16):
+        self.datos = bytearray(capacidad * self.dimension * TIPO_ENCODING.itemsize)
+        self.matriz = np.frombuffer(self.datos, dtype=TIPO_ENCODING).reshape(capacidad, self.dimension)
+        self.normas = np.zeros(capacidad, dtype=np.float32)
+        self.claves = []
+        self.posiciones = {}
+
+    def __len__(self):
+        return len(self.claves)
+
+    def cargar(self):
+        """Carga completa: dos consultas, una por tipo, y los bytes de cada fila copiados en orden"""
+        tamaño = self.dimension * TIPO_ENCODING.itemsize
+        with self._candado:
+            version = version_indice(self.condominio_id, INDICE)
+            claves, binarios = [], []
+            for tipo in (USUARIO, VISITANTE):
+                for pk, binario in _encodings(tipo, self.condominio_id).iterator():
+                    if len(binario) != tamaño:
+                        logger.warning('Encoding facial inválido: %s %s', tipo, pk)
+                        continue
+                    claves.append((tipo, pk))
+                    binarios.append(binario)
+
+            self._vaciar(max(16, len(claves)))
+            for fila, binario in enumerate(binarios):
+                self.datos[fila * tamaño:(fila + 1) * tamaño] = binario
+            self.normas[:len(claves)] = np.einsum('ij,ij->i', self.matriz[:len(claves)], self.matriz[:len(claves)])
+            self.claves = claves
+            self.posiciones = {clave: fila for fila, clave in enumerate(claves)}
+            self.version = version
+
+    def sincronizar(self):
+        """
+        Aplica los cambios registrados desde la última versión vista, o
+        recarga. Todo con el candado tomado: dos hilos no aplican los mismos
+        cambios a la vez ni dejan una versión más vieja sobre una más nueva.
+        """
+        with self._candado:
+            version = version_indice(self.condominio_id, INDICE)
+            if version == self.version:
+                return
+            pendientes = range(self.version + 1, version + 1)
+            cambios = cache.get_many([_clave_cambio(self.condominio_id, v) for v in pendientes])
+            if (version < self.version or len(pendientes) > MAXIMO_CAMBIOS_INCREMENTALES
+                    or len(cambios) < len(pendientes)):
+                self.cargar()
+                return
+
+            ids = defaultdict(set)
+            for tipo, pk in cambios.values():
+                ids[tipo].add(pk)
+            for tipo, pks in ids.items():
+                vigentes = dict(_encodings(tipo, self.condominio_id, pks))
+                for pk in pks:
+                    self.actualizar((tipo, pk), vigentes.get(pk))
+            self.version = version
+
+    def actualizar(self, clave, binario):
+        """Alta o cambio del encoding de `clave` (bytes de facial_encoding); sin encoding válido es una baja"""
+        vector = decodificar_encoding(binario, self.dimension)
+        with self._candado:
+            fila = self.posiciones.get(clave)
+            if vector is None:
+                if fila is not None:
+                    self._quitar(fila)
+                return
+            if fila is None:
+                fila = len(self.claves)
+                if fila == len(self.matriz):
+                    self._crecer()
+                self.claves.append(clave)
+                self.posiciones[clave] = fila
+            self.matriz[fila] = vector
+            self.normas[fila] = vector @ vector
+
+    def _crecer(self):
+        capacidad = len(self.matriz) * 2
+        datos = bytearray(capacidad * self.dimension * TIPO_ENCODING.itemsize)
+        datos[:len(self.datos)] = self.datos
+        normas = np.zeros(capacidad, dtype=np.float32)
+        normas[:len(self.normas)] = self.normas
+        self.datos, self.normas = datos, normas
+        self.matriz = np.frombuffer(datos, dtype=TIPO_ENCODING).reshape(capacidad, self.dimension)
+
+    def _quitar(self, fila):
+        """La última fila ocupa el lugar de la que se va"""
+        ultima = len(self.claves) - 1
+        del self.posiciones[self.claves[fila]]
+        if fila != ultima:
+            self.matriz[fila], self.normas[fila] = self.matriz[ultima], self.normas[ultima]
+            self.claves[fila] = self.claves[ultima]
+            self.posiciones[self.claves[fila]] = fila
+        self.claves.pop()
+
+    def buscar(self, consultas):
+        """(clave, distancia) del encoding más cercano a cada fila de `consultas`"""
+        with self._candado:
+            n = len(self.claves)
+            if not n:
+                return [(None, None)] * len(consultas)
+            productos = consultas @ self.matriz[:n].T
+            distancias = self.normas[:n][None, :] - 2 * productos + np.einsum('ij,ij->i', consultas, consultas)[:, None]
+            cercanos = distancias.argmin(axis=1)
+            minimas = np.sqrt(np.maximum(distancias[np.arange(len(consultas)), cercanos], 0))
+            return [(self.claves[fila], float(distancia)) for fila, distancia in zip(cercanos, minimas)]
+
+
+_indices = {}
+_candado_indices = threading.Lock()
+
+
+def obtener_indice(condominio_id):
+    """Índice del condominio en este proceso, cargado la primera vez y al día con los cambios"""
+    with _candado_indices:
+        indice = _indices.get(condominio_id)
+        if indice is None:
+            indice = _indices[condominio_id] = IndiceFacial(condominio_id, configuracion_facial('DIMENSION'))
+            indice.cargar()
+    indice.sincronizar()
+    return indice
+
+
+def descartar_indices():
+    """Olvida los índices cargados en este proceso (se recargan al usarse)"""
+    with _candado_indices:
+        _indices.clear()
+
+
+# =====================================
+# IDENTIFICACIÓN
+# =====================================
+
+def identificar(condominio_id, encodings, umbral=None):
+    """
+    Una Coincidencia (o None si nadie está a menos de `umbral`) por cada
+    encoding del lote. La confianza es 1 - distancia, en porcentaje.
+    """
+    umbral = configuracion_facial('UMBRAL_DISTANCIA') if umbral is None else umbral
+    consultas = np.asarray(encodings, dtype=TIPO_ENCODING).reshape(-1, configuracion_facial('DIMENSION'))
+    resultados = []
+    for clave, distancia in obtener_indice(condominio_id).buscar(consultas):
+        if clave is None or distancia > umbral:
+            resultados.append(None)
+            continue
+        confianza = Decimal(max(0.0, 1 - distancia) * 100).quantize(Decimal('0.01'))
+        resultados.append(Coincidencia(clave[0], clave[1], distancia, confianza))
+    return resultados
+
+
+def registrar_accesos_faciales(condominio_id, encodings, tipo_acceso, camara_id=None):
+    """
+    Identifica el lote de rostros y deja un RegistroAcceso por cada uno, con
+    un solo INSERT. Los rostros sin coincidencia quedan como no autorizados.
+    """
+    coincidencias = identificar(condominio_id, encodings)
+    registros = RegistroAcceso.objects.bulk_create([
+        RegistroAcceso(
+            condominio_id=condominio_id,
+            usuario_id=coincidencia.id if coincidencia and coincidencia.tipo == USUARIO else None,
+            visitante_id=coincidencia.id if coincidencia and coincidencia.tipo == VISITANTE else None,
+            camara_id=camara_id,
+            tipo_acceso=tipo_acceso,
+            metodo_identificacion='FACIAL',
+            confianza_ia=coincidencia.confianza if coincidencia else None,
+            autorizado=coincidencia is not None,
+            observaciones=None if coincidencia else 'Rostro no reconocido',
+        )
+        for coincidencia in coincidencias
+    ])
+    return list(zip(coincidencias, registros))
@@ -0,0 +1,89 @@
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+
+from .models import CuotaMantenimiento, SaldoUnidad
+
+
+ESTADOS_ABIERTOS = ['PENDIENTE', 'VENCIDA']
+
+CAMPOS_SALDO = [
+    'total_pendiente', 'total_vencido', 'cuotas_pendientes',
+    'pagado_año', 'año', 'proximo_vencimiento',
+]
+
+
+def calcular_saldos(unidad_ids, año=None):
+    """
+    Calcula desde las cuotas el saldo de cada unidad con una sola consulta
+    agregada. Devuelve {unidad_id: SaldoUnidad} sin guardar; las unidades sin
+    cuotas quedan con saldo cero.
+    """
+    año = año or date.today().year
+    agregados = CuotaMantenimiento.objects.filter(
+        unidad_id__in=unidad_ids
+    ).order_by().values('unidad_id').annotate(
+        total_pendiente=Sum('monto_pendiente', filter=Q(estado__in=ESTADOS_ABIERTOS)),
+        total_vencido=Sum('monto_pendiente', filter=Q(estado='VENCIDA')),
+        cuotas_pendientes=Count('id', filter=Q(estado__in=ESTADOS_ABIERTOS)),
+        pagado_año=Sum('monto_pagado', filter=Q(estado='PAGADA', configuracion__periodo_año=año)),
+        proximo_vencimiento=Min('fecha_vencimiento', filter=Q(estado__in=ESTADOS_ABIERTOS)),
+    )
+    
+    saldos = {
+        unidad_id: SaldoUnidad(unidad_id=unidad_id, año=año, total_pendiente=Decimal('0'),
+                               total_vencido=Decimal('0'), pagado_año=Decimal('0'))
+        for unidad_id in unidad_ids
+    }
+    for fila in agregados:
+        saldos[fila['unidad_id']] = SaldoUnidad(
+            unidad_id=fila['unidad_id'],
+            total_pendiente=fila['total_pendiente'] or Decimal('0'),
+            total_vencido=fila['total_vencido'] or Decimal('0'),
+            cuotas_pendientes=fila['cuotas_pendientes'],
+            pagado_año=fila['pagado_año'] or Decimal('0'),
+            año=año,
+            proximo_vencimiento=fila['proximo_vencimiento'],
+        )
+    return saldos
+
+
+def recalcular_saldos(unidad_ids, año=None):
+    """
+    Recalcula y guarda el saldo de las unidades indicadas.
+
+    Se ejecuta dentro de la transacción de quien modifica las cuotas: primero se
+    bloquean las filas de saldo existentes para que dos transacciones sobre la
+    misma unidad no se pisen, luego se agrega y se hace un upsert en lote.
+    """
+    unidad_ids = list(set(unidad_ids))
+    if not unidad_ids:
+        return {}
+    
+    with transaction.atomic():
+        list(SaldoUnidad.objects.select_for_update().filter(pk__in=unidad_ids).values_list('pk'))
+        saldos = calcular_saldos(unidad_ids, año)
+        SaldoUnidad.objects.bulk_create(
+            saldos.values(),
+            update_conflicts=True,
+            unique_fields=['unidad'],
+            update_fields=CAMPOS_SALDO + ['fecha_actualizacion'],
+        )
+    return saldos
+
+
+def obtener_saldo(unidad):
+    """
+    Lectura del saldo de una unidad por clave primaria (o sin consulta si vino
+    con select_related('saldo')). Si la unidad aún no tiene fila, o la fila es
+    de otro año, se recalcula en el momento.
+    """
+    try:
+        saldo = unidad.saldo
+    except SaldoUnidad.DoesNotExist:
+        saldo = None
+    if saldo is None or saldo.año != date.today().year:
+        saldo = recalcular_saldos([unidad.pk])[unidad.pk]
+    return saldo
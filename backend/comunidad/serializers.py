@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
+from django.conf import settings
 from .models import *
 import uuid
 
@@ -31,7 +32,7 @@ class PerfilUsuarioSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = PerfilUsuario
-        fields = '__all__'
+        exclude = ['facial_encoding']
 
 
 class TipoUnidadSerializer(serializers.ModelSerializer):
@@ -107,7 +108,7 @@ class VisitanteSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Visitante
-        fields = '__all__'
+        exclude = ['facial_encoding']
 
 
 class AlertaSeguridadSerializer(serializers.ModelSerializer):
@@ -164,9 +165,178 @@ class PagoSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Pago
+        exclude = ['clave_idempotencia']
+
+
+class TipoComunicadoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = TipoComunicado
         fields = '__all__'
 
 
+class ComunicadoSerializer(serializers.ModelSerializer):
+    tipo = TipoComunicadoSerializer(read_only=True)
+    autor_nombre = serializers.CharField(source='autor.user.get_full_name', read_only=True)
+    
+    class Meta:
+        model = Comunicado
+        exclude = ['unidades_especificas']
+
+
+class ComentarioComunicadoSerializer(serializers.ModelSerializer):
+    usuario_nombre = serializers.CharField(source='usuario.user.get_full_name', read_only=True)
+    
+    class Meta:
+        model = ComentarioComunicado
+        fields = ['id', 'usuario', 'usuario_nombre', 'contenido', 'fecha_creacion', 'padre']
+
+
+class NotificacionUsuarioSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = NotificacionUsuario
+        fields = ['id', 'tipo', 'prioridad', 'titulo', 'mensaje', 'datos', 'leida', 'fecha_lectura', 'fecha']
+
+
+# =====================================
+# SERIALIZERS COMPACTOS (?view=compact)
+# =====================================
+# Versiones planas de los serializers anteriores: las relaciones se devuelven
+# como id más un texto descriptivo en lugar del objeto anidado completo.
+
+class PerfilUsuarioCompactoSerializer(serializers.ModelSerializer):
+    nombre_completo = serializers.CharField(source='user.get_full_name', read_only=True)
+    email = serializers.EmailField(source='user.email', read_only=True)
+    tipo_usuario = serializers.CharField(source='tipo_usuario.tipo', read_only=True)
+    condominio_nombre = serializers.CharField(source='condominio.nombre', read_only=True)
+    
+    class Meta:
+        model = PerfilUsuario
+        fields = ['id', 'nombre_completo', 'email', 'ci', 'telefono', 'tipo_usuario',
+                  'condominio', 'condominio_nombre', 'foto_perfil', 'activo']
+
+
+class UnidadCompactoSerializer(serializers.ModelSerializer):
+    tipo_unidad = serializers.CharField(source='tipo_unidad.nombre', read_only=True)
+    
+    class Meta:
+        model = Unidad
+        fields = ['id', 'condominio', 'numero', 'bloque', 'piso', 'tipo_unidad',
+                  'metros_cuadrados', 'porcentaje_propiedad', 'activa']
+
+
+class ResidenciaUnidadCompactoSerializer(serializers.ModelSerializer):
+    usuario_nombre = serializers.CharField(source='usuario.user.get_full_name', read_only=True)
+    unidad_nombre = serializers.CharField(source='unidad', read_only=True)
+    
+    class Meta:
+        model = ResidenciaUnidad
+        fields = '__all__'
+
+
+class VehiculoCompactoSerializer(serializers.ModelSerializer):
+    propietario_nombre = serializers.CharField(source='propietario.user.get_full_name', read_only=True)
+    
+    class Meta:
+        model = Vehiculo
+        fields = '__all__'
+
+
+class ReservaAreaComunCompactoSerializer(serializers.ModelSerializer):
+    area_comun_nombre = serializers.CharField(source='area_comun.nombre', read_only=True)
+    usuario_nombre = serializers.CharField(source='usuario.user.get_full_name', read_only=True)
+    
+    class Meta:
+        model = ReservaAreaComun
+        fields = '__all__'
+
+
+class RegistroAccesoCompactoSerializer(serializers.ModelSerializer):
+    usuario_nombre = serializers.CharField(source='usuario.user.get_full_name', read_only=True, allow_null=True)
+    vehiculo_placa = serializers.CharField(source='vehiculo.placa', read_only=True, allow_null=True)
+    camara_nombre = serializers.CharField(source='camara.nombre', read_only=True, allow_null=True)
+    
+    class Meta:
+        model = RegistroAcceso
+        fields = '__all__'
+
+
+class VisitanteCompactoSerializer(serializers.ModelSerializer):
+    unidad_destino_nombre = serializers.CharField(source='unidad_destino', read_only=True)
+    autorizado_por_nombre = serializers.CharField(source='autorizado_por.user.get_full_name', read_only=True)
+    
+    class Meta:
+        model = Visitante
+        exclude = ['facial_encoding']
+
+
+class AlertaSeguridadCompactoSerializer(serializers.ModelSerializer):
+    camara_nombre = serializers.CharField(source='camara.nombre', read_only=True)
+    revisada_por_nombre = serializers.CharField(source='revisada_por.user.get_full_name', read_only=True, allow_null=True)
+    
+    class Meta:
+        model = AlertaSeguridad
+        fields = '__all__'
+
+
+class CuotaMantenimientoCompactoSerializer(serializers.ModelSerializer):
+    unidad_nombre = serializers.CharField(source='unidad', read_only=True)
+    periodo_mes = serializers.IntegerField(source='configuracion.periodo_mes', read_only=True)
+    periodo_año = serializers.IntegerField(source='configuracion.periodo_año', read_only=True)
+    
+    class Meta:
+        model = CuotaMantenimiento
+        fields = '__all__'
+
+
+class PagoCompactoSerializer(serializers.ModelSerializer):
+    unidad_nombre = serializers.CharField(source='cuota.unidad', read_only=True)
+    metodo_pago_nombre = serializers.CharField(source='metodo_pago.nombre', read_only=True)
+    registrado_por_nombre = serializers.CharField(source='registrado_por.user.get_full_name', read_only=True)
+    
+    class Meta:
+        model = Pago
+        exclude = ['clave_idempotencia']
+
+
+class ComunicadoCompactoSerializer(serializers.ModelSerializer):
+    tipo = serializers.CharField(source='tipo.tipo', read_only=True)
+    autor_nombre = serializers.CharField(source='autor.user.get_full_name', read_only=True)
+    
+    class Meta:
+        model = Comunicado
+        exclude = ['unidades_especificas']
+
+
+class AreaComunCompactoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AreaComun
+        fields = '__all__'
+
+
+class CamaraSeguridadCompactoSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CamaraSeguridad
+        fields = '__all__'
+
+
+# Serializer compacto equivalente a cada serializer anidado
+SERIALIZERS_COMPACTOS = {
+    PerfilUsuarioSerializer: PerfilUsuarioCompactoSerializer,
+    UnidadSerializer: UnidadCompactoSerializer,
+    ResidenciaUnidadSerializer: ResidenciaUnidadCompactoSerializer,
+    VehiculoSerializer: VehiculoCompactoSerializer,
+    AreaComunSerializer: AreaComunCompactoSerializer,
+    ReservaAreaComunSerializer: ReservaAreaComunCompactoSerializer,
+    CamaraSeguridadSerializer: CamaraSeguridadCompactoSerializer,
+    RegistroAccesoSerializer: RegistroAccesoCompactoSerializer,
+    VisitanteSerializer: VisitanteCompactoSerializer,
+    AlertaSeguridadSerializer: AlertaSeguridadCompactoSerializer,
+    CuotaMantenimientoSerializer: CuotaMantenimientoCompactoSerializer,
+    PagoSerializer: PagoCompactoSerializer,
+    ComunicadoSerializer: ComunicadoCompactoSerializer,
+}
+
+
 # =====================================
 # SERIALIZERS PARA AUTENTICACIÓN
 # =====================================
@@ -284,7 +454,7 @@ class QuickActionSerializer(serializers.Serializer):
 # =====================================
 
 class CrearReservaSerializer(serializers.Serializer):
-    area_comun_id = serializers.UUIDField()
+    area_comun_id = serializers.IntegerField()
     fecha_reserva = serializers.DateField()
     hora_inicio = serializers.TimeField()
     hora_fin = serializers.TimeField()
@@ -305,13 +475,118 @@ class CrearReservaSerializer(serializers.Serializer):
         return data
 
 
+class CrearReservaRecurrenteSerializer(serializers.Serializer):
+    FRECUENCIAS = ['DIARIA', 'SEMANAL', 'MENSUAL']
+    
+    area_comun_id = serializers.IntegerField()
+    fecha_inicio = serializers.DateField()
+    fecha_fin = serializers.DateField()
+    frecuencia = serializers.ChoiceField(choices=FRECUENCIAS)
+    intervalo = serializers.IntegerField(min_value=1, max_value=12, default=1)
+    dias_semana = serializers.ListField(child=serializers.IntegerField(min_value=0, max_value=6),
+                                        required=False, allow_empty=True,
+                                        help_text="0 = lunes ... 6 = domingo (solo SEMANAL)")
+    hora_inicio = serializers.TimeField()
+    hora_fin = serializers.TimeField()
+    numero_personas = serializers.IntegerField(min_value=1)
+    proposito = serializers.CharField(max_length=200)
+    observaciones = serializers.CharField(required=False, allow_blank=True)
+    omitir_conflictos = serializers.BooleanField(default=True,
+                                                 help_text="Crear las fechas libres aunque otras tengan conflicto")
+    
+    def validate(self, data):
+        from datetime import date
+        from .disponibilidad import MAX_DIAS_RECURRENCIA, MAX_OCURRENCIAS, fechas_recurrentes
+        
+        if data['fecha_inicio'] < date.today():
+            raise serializers.ValidationError('No se puede reservar para fechas pasadas.')
+        if data['fecha_fin'] < data['fecha_inicio']:
+            raise serializers.ValidationError('La fecha final debe ser posterior a la inicial.')
+        if (data['fecha_fin'] - data['fecha_inicio']).days > MAX_DIAS_RECURRENCIA:
+            raise serializers.ValidationError(
+                f'La regla no puede abarcar más de {MAX_DIAS_RECURRENCIA} días.'
+            )
+        if data['hora_fin'] <= data['hora_inicio']:
+            raise serializers.ValidationError('La hora de fin debe ser mayor que la hora de inicio.')
+        
+        data['fechas'] = fechas_recurrentes(
+            data['fecha_inicio'], data['fecha_fin'], data['frecuencia'],
+            data['intervalo'], data.get('dias_semana')
+        )
+        if not data['fechas']:
+            raise serializers.ValidationError('La regla no genera ninguna fecha.')
+        if len(data['fechas']) > MAX_OCURRENCIAS:
+            raise serializers.ValidationError(f'La regla no puede generar más de {MAX_OCURRENCIAS} reservas.')
+        return data
+
+
+class DisponibilidadSerializer(serializers.Serializer):
+    """Parámetros ?desde=&hasta= de la consulta de disponibilidad"""
+    desde = serializers.DateField(required=False)
+    hasta = serializers.DateField(required=False)
+    
+    def validate(self, data):
+        from datetime import date, timedelta
+        from .disponibilidad import MAX_DIAS_CONSULTA
+        
+        data['desde'] = data.get('desde') or date.today()
+        data['hasta'] = data.get('hasta') or data['desde'] + timedelta(days=30)
+        if data['hasta'] < data['desde']:
+            raise serializers.ValidationError('La fecha final debe ser posterior a la inicial.')
+        if (data['hasta'] - data['desde']).days >= MAX_DIAS_CONSULTA:
+            raise serializers.ValidationError(f'El rango no puede superar {MAX_DIAS_CONSULTA} días.')
+        return data
+
+
 class CrearPagoSerializer(serializers.Serializer):
-    cuota_id = serializers.UUIDField()
-    metodo_pago_id = serializers.UUIDField()
+    cuota_id = serializers.IntegerField()
+    metodo_pago_id = serializers.IntegerField()
     monto_pagado = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0.01)
     numero_comprobante = serializers.CharField(required=False, allow_blank=True)
     comprobante_imagen = serializers.ImageField(required=False)
     observaciones = serializers.CharField(required=False, allow_blank=True)
+    # También se acepta en la cabecera Idempotency-Key
+    clave_idempotencia = serializers.CharField(max_length=100, required=False, allow_blank=True)
+
+
+class MarcarLeidasSerializer(serializers.Serializer):
+    """Sin ids se marcan todas las notificaciones del usuario"""
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=500)
+
+
+class RegistrarLecturaSerializer(serializers.Serializer):
+    confirmar = serializers.BooleanField(default=False)
+
+
+class ReconocimientoFacialSerializer(serializers.Serializer):
+    """Encodings de los rostros detectados en una captura, todos de la dimensión configurada"""
+    encodings = serializers.ListField(child=serializers.ListField(allow_empty=False), min_length=1, max_length=50)
+    tipo_acceso = serializers.ChoiceField(choices=RegistroAcceso.TIPOS_ACCESO)
+    camara_id = serializers.IntegerField(required=False)
+    
+    def validate_encodings(self, value):
+        dimension = settings.AI_SERVICES['FACE_RECOGNITION']['DIMENSION']
+        for encoding in value:
+            if len(encoding) != dimension or not all(isinstance(x, (int, float)) for x in encoding):
+                raise serializers.ValidationError(f"Cada encoding debe tener {dimension} números")
+        return value
+
+
+class LecturaPlacaSerializer(serializers.Serializer):
+    placa = serializers.CharField(max_length=20)
+    confianza = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0, max_value=100, required=False)
+
+
+class DeteccionVehiculosSerializer(serializers.Serializer):
+    """Lecturas de placas de una cámara de barrera, en lote"""
+    lecturas = LecturaPlacaSerializer(many=True, allow_empty=False, max_length=200)
+    tipo_acceso = serializers.ChoiceField(choices=RegistroAcceso.TIPOS_ACCESO)
+    camara_id = serializers.IntegerField(required=False)
+
+
+class GenerarCuotasSerializer(serializers.Serializer):
+    periodo_mes = serializers.IntegerField(min_value=1, max_value=12)
+    periodo_año = serializers.IntegerField(min_value=2020, max_value=2050)
 
 
 class ActualizarPerfilSerializer(serializers.Serializer):
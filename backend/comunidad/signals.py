@@ -1,8 +1,21 @@
-from django.db.models.signals import post_save, pre_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.utils import timezone
-from .models import PerfilUsuario, CuotaMantenimiento
+from .models import (
+    PerfilUsuario, CuotaMantenimiento, Unidad, AreaComun, ReservaAreaComun, MetodoPago,
+    TipoUnidad, TipoUsuario, AlertaSeguridad, Comunicado, Vehiculo, Visitante
+)
+from .bandeja import notificar_alerta
+from .publicacion import difundir_comunicado
+from .placas import invalidar_placas
+from .reconocimiento import USUARIO, VISITANTE, registrar_cambio
+from .push import crear_push_alerta
+from .catalogos import invalidar_catalogo
+from .disponibilidad import invalidar_disponibilidad
+from .saldos import recalcular_saldos
+from .sincronizacion import ALCANCE_ELIMINADO, registrar_eliminacion
 
 
 @receiver(post_save, sender=User)
@@ -14,17 +27,81 @@ def crear_perfil_usuario(sender, instance, created, **kwargs):
         pass
 
 
-@receiver(pre_save, sender=CuotaMantenimiento)
-def actualizar_estado_cuota(sender, instance, **kwargs):
-    """Actualizar automáticamente el estado de las cuotas"""
-    if instance.monto_pendiente <= 0:
-        instance.estado = 'PAGADA'
-    elif instance.monto_pagado > 0:
-        instance.estado = 'PAGADA_PARCIAL'
-    elif instance.fecha_vencimiento < timezone.now().date():
-        instance.estado = 'VENCIDA'
-    else:
-        instance.estado = 'PENDIENTE'
+@receiver(post_save, sender=CuotaMantenimiento)
+def actualizar_saldo_unidad(sender, instance, **kwargs):
+    """Mantener el saldo de la unidad dentro de la misma transacción que la cuota"""
+    recalcular_saldos([instance.unidad_id])
+
+
+@receiver(post_delete, sender=CuotaMantenimiento)
+def actualizar_saldo_unidad_eliminada(sender, instance, **kwargs):
+    """Al borrar una cuota el saldo se recalcula al confirmar, si la unidad sigue existiendo"""
+    def recalcular():
+        if Unidad.objects.filter(pk=instance.unidad_id).exists():
+            recalcular_saldos([instance.unidad_id])
+    transaction.on_commit(recalcular)
+
+
+@receiver(post_save, sender=ReservaAreaComun)
+@receiver(post_delete, sender=ReservaAreaComun)
+def invalidar_disponibilidad_reserva(sender, instance, **kwargs):
+    """La disponibilidad en cache del área deja de valer cuando se confirma el cambio"""
+    transaction.on_commit(lambda: invalidar_disponibilidad(instance.area_comun_id))
+
+
+@receiver(post_save, sender=AreaComun)
+def invalidar_disponibilidad_area(sender, instance, **kwargs):
+    """Cambios de horario o días de atención"""
+    transaction.on_commit(lambda: invalidar_disponibilidad(instance.pk))
+
+
+@receiver(post_save, sender=AreaComun)
+@receiver(post_delete, sender=AreaComun)
+def invalidar_catalogo_areas(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidar_catalogo('areas', instance.condominio_id))
+
+
+@receiver(post_save, sender=MetodoPago)
+@receiver(post_delete, sender=MetodoPago)
+def invalidar_catalogo_metodos_pago(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidar_catalogo('metodos_pago', instance.condominio_id))
+
+
+@receiver(post_save, sender=TipoUnidad)
+@receiver(post_delete, sender=TipoUnidad)
+def invalidar_catalogo_tipos_unidad(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidar_catalogo('tipos_unidad'))
+
+
+@receiver(post_save, sender=TipoUsuario)
+@receiver(post_delete, sender=TipoUsuario)
+def invalidar_catalogo_tipos_usuario(sender, instance, **kwargs):
+    transaction.on_commit(lambda: invalidar_catalogo('tipos_usuario'))
+
+
+@receiver(post_save, sender=AlertaSeguridad)
+def entregar_alerta(sender, instance, created, **kwargs):
+    """Fan-out de la alerta a la bandeja de los usuarios del condominio, y push si es grave"""
+    if created:
+        transaction.on_commit(lambda: notificar_alerta(instance))
+        transaction.on_commit(lambda: crear_push_alerta(instance))
+
+
+@receiver(post_save, sender=Comunicado)
+def entregar_comunicado(sender, instance, **kwargs):
+    """Fan-out del comunicado a su audiencia cuando queda publicado"""
+    if instance.estado == 'PUBLICADO':
+        transaction.on_commit(lambda: difundir_comunicado(instance))
+
+
+def registrar_eliminacion_sincronizada(sender, instance, **kwargs):
+    """Lápida para que la app móvil borre la fila en la próxima sincronización"""
+    registrar_eliminacion(instance)
+
+
+for modelo in ALCANCE_ELIMINADO:
+    post_delete.connect(registrar_eliminacion_sincronizada, sender=modelo,
+                        dispatch_uid=f'registrar_eliminacion_{modelo.__name__}')
 
 
 @receiver(post_save, sender=PerfilUsuario)
@@ -32,4 +109,53 @@ def actualizar_ultimo_acceso(sender, instance, **kwargs):
     """Actualizar último acceso del usuario"""
     if hasattr(instance, '_actualizar_acceso'):
         instance.ultimo_acceso = timezone.now()
-        instance.save(update_fields=['ultimo_acceso'])
\ No newline at end of file
+        instance.save(update_fields=['ultimo_acceso'])
+
+
+# Campos que cambian lo que hay en el índice facial
+CAMPOS_FACIALES = {'facial_encoding', 'activo', 'condominio', 'unidad_destino'}
+
+
+def _afecta_indice_facial(instance, created=False, update_fields=None):
+    if update_fields is not None and not CAMPOS_FACIALES & set(update_fields):
+        return False
+    return not (created and instance.facial_encoding is None)
+
+
+@receiver(post_save, sender=PerfilUsuario)
+@receiver(post_delete, sender=PerfilUsuario)
+def actualizar_indice_facial_usuario(sender, instance, created=False, update_fields=None, **kwargs):
+    """El índice facial del condominio se pone al día al confirmarse el cambio"""
+    if _afecta_indice_facial(instance, created, update_fields):
+        condominio_id, pk = instance.condominio_id, instance.pk
+        transaction.on_commit(lambda: registrar_cambio(condominio_id, USUARIO, pk))
+
+
+@receiver(post_save, sender=Visitante)
+@receiver(post_delete, sender=Visitante)
+def actualizar_indice_facial_visitante(sender, instance, created=False, update_fields=None, **kwargs):
+    if _afecta_indice_facial(instance, created, update_fields):
+        # Se lee aquí: si la unidad se está borrando en cascada, al confirmar ya no existe
+        condominio_id, pk = instance.unidad_destino.condominio_id, instance.pk
+        transaction.on_commit(lambda: registrar_cambio(condominio_id, VISITANTE, pk))
+
+
+@receiver(post_save, sender=Vehiculo)
+@receiver(post_delete, sender=Vehiculo)
+def invalidar_placas_vehiculo(sender, instance, **kwargs):
+    """
+    El índice de placas del condominio se reconstruye al confirmarse el
+    cambio. El condominio se lee aquí, mientras el propietario existe aunque
+    se esté borrando en cascada.
+    """
+    condominio_id = instance.propietario.condominio_id
+    transaction.on_commit(lambda: invalidar_placas(condominio_id))
+
+
+@receiver(post_save, sender=Visitante)
+@receiver(post_delete, sender=Visitante)
+def invalidar_placas_visitante(sender, instance, created=False, **kwargs):
+    if created and not instance.vehiculo_placa:
+        return
+    condominio_id = instance.unidad_destino.condominio_id
+    transaction.on_commit(lambda: invalidar_placas(condominio_id))
@@ -0,0 +1,233 @@
+import base64
+import json
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .consultas import optimizar_queryset
+from .models import (
+    AlertaSeguridad, Comunicado, CuotaMantenimiento, Pago, RegistroAcceso, RegistroEliminado,
+    ReservaAreaComun, ResidenciaUnidad
+)
+from .serializers import (
+    AlertaSeguridadSerializer, ComunicadoSerializer, CuotaMantenimientoSerializer, PagoSerializer,
+    RegistroAccesoSerializer, ReservaAreaComunSerializer
+)
+
+
+# Filas por tabla en cada respuesta; si alguna llega al límite el cliente
+# vuelve a pedir con el cursor nuevo (hay_mas)
+LIMITE_POR_TABLA = 500
+
+# El cursor queda un poco antes del inicio de la consulta: lo que confirme
+# tarde con una marca anterior llega en la sincronización siguiente en lugar
+# de perderse. El cliente reemplaza por id, así que repetir filas no molesta.
+MARGEN_CURSOR = timedelta(seconds=5)
+
+# Las lápidas más viejas se purgan; un cursor anterior obliga a empezar de cero
+RETENCION_ELIMINADOS = timedelta(days=90)
+
+ESTADOS_COMUNICADO_VISIBLES = ['PUBLICADO', 'ARCHIVADO']
+
+
+class CursorInvalido(ValueError):
+    """El cursor de sincronización no se puede decodificar"""
+
+
+# Lo que el usuario puede ver: su perfil, sus unidades activas y su rol en ellas
+Alcance = namedtuple('Alcance', ['perfil', 'unidades', 'propietario', 'inquilino'])
+
+
+def _comunicados_visibles(alcance):
+    perfil = alcance.perfil
+    audiencias = ['TODOS']
+    if alcance.propietario:
+        audiencias.append('PROPIETARIOS')
+    if alcance.inquilino:
+        audiencias.append('INQUILINOS')
+    if perfil.tipo_usuario.tipo == 'ADMINISTRADOR':
+        audiencias.append('ADMINISTRACION')
+    para_sus_unidades = Exists(Comunicado.unidades_especificas.through.objects.filter(
+        comunicado=OuterRef('pk'), unidad__in=alcance.unidades
+    ))
+    return Q(condominio=perfil.condominio_id, estado__in=ESTADOS_COMUNICADO_VISIBLES) & (
+        Q(audiencia__in=audiencias) | Q(para_sus_unidades, audiencia='PERSONALIZADA')
+    )
+
+
+Tabla = namedtuple('Tabla', ['modelo', 'campo_fecha', 'serializer', 'filtro'])
+
+# nombre en la respuesta -> tabla, con su marca de cambio y el filtro por usuario
+TABLAS = {
+    'cuotas': Tabla(CuotaMantenimiento, 'fecha_modificacion', CuotaMantenimientoSerializer,
+                    lambda alcance: Q(unidad__in=alcance.unidades)),
+    'pagos': Tabla(Pago, 'fecha_modificacion', PagoSerializer,
+                   lambda alcance: Q(cuota__unidad__in=alcance.unidades)),
+    'reservas': Tabla(ReservaAreaComun, 'fecha_modificacion', ReservaAreaComunSerializer,
+                      lambda alcance: Q(usuario=alcance.perfil)),
+    'alertas': Tabla(AlertaSeguridad, 'fecha_modificacion', AlertaSeguridadSerializer,
+                     lambda alcance: Q(condominio=alcance.perfil.condominio_id)),
+    # Los accesos solo se insertan: fecha_hora es auto_now_add
+    'accesos': Tabla(RegistroAcceso, 'fecha_hora', RegistroAccesoSerializer,
+                     lambda alcance: Q(usuario=alcance.perfil)),
+    'comunicados': Tabla(Comunicado, 'fecha_actualizacion', ComunicadoSerializer, _comunicados_visibles),
+}
+
+ELIMINADOS = 'eliminados'
+
+
+# =====================================
+# LÁPIDAS
+# =====================================
+
+def _unidad_del_pago(pago):
+    return CuotaMantenimiento.objects.filter(pk=pago.cuota_id).values_list('unidad_id', flat=True).first()
+
+
+# modelo -> (nombre de la tabla, alcance de la lápida)
+ALCANCE_ELIMINADO = {
+    CuotaMantenimiento: ('cuotas', lambda cuota: {'unidad_id': cuota.unidad_id}),
+    Pago: ('pagos', lambda pago: {'unidad_id': _unidad_del_pago(pago)}),
+    ReservaAreaComun: ('reservas', lambda reserva: {'usuario_id': reserva.usuario_id}),
+    AlertaSeguridad: ('alertas', lambda alerta: {'condominio_id': alerta.condominio_id}),
+    RegistroAcceso: ('accesos', lambda acceso: {'usuario_id': acceso.usuario_id}),
+    Comunicado: ('comunicados', lambda comunicado: {'condominio_id': comunicado.condominio_id}),
+}
+
+
+def registrar_eliminacion(instancia):
+    """Deja la lápida de una fila borrada de alguna de las tablas sincronizadas"""
+    tabla, alcance = ALCANCE_ELIMINADO[type(instancia)]
+    RegistroEliminado.objects.create(tabla=tabla, objeto_id=instancia.pk, **alcance(instancia))
+
+
+def purgar_eliminados(antes_de=None):
+    """Borra las lápidas fuera del período de retención. Devuelve cuántas"""
+    antes_de = antes_de or timezone.now() - RETENCION_ELIMINADOS
+    borradas, _ = RegistroEliminado.objects.filter(fecha_eliminacion__lt=antes_de).delete()
+    return borradas
+
+
+# =====================================
+# CURSOR
+# =====================================
+
+def codificar_cursor(desde, unidades, posiciones):
+    contenido = {
+        'd': desde.isoformat(),
+        'u': unidades,
+        'p': {tabla: [fecha.isoformat(), pk] for tabla, (fecha, pk) in posiciones.items()},
+    }
+    return base64.urlsafe_b64encode(json.dumps(contenido, separators=(',', ':')).encode()).decode()
+
+
+def decodificar_cursor(cursor):
+    try:
+        contenido = json.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+        return {
+            'desde': datetime.fromisoformat(contenido['d']),
+            'unidades': [list(unidad) for unidad in contenido['u']],
+            'posiciones': {
+                tabla: (datetime.fromisoformat(fecha), None if pk is None else int(pk))
+                for tabla, (fecha, pk) in contenido['p'].items()
+            },
+        }
+    except (TypeError, ValueError, KeyError, UnicodeDecodeError) as error:
+        raise CursorInvalido(str(error))
+
+
+# =====================================
+# SINCRONIZACIÓN
+# =====================================
+
+def _cambios_desde(queryset, campo_fecha, posicion):
+    """
+    Filas posteriores a (campo_fecha, id) en orden, con una de más para saber
+    si quedaron pendientes. Una posición sin id es un corte: desde esa marca
+    inclusive.
+    """
+    if posicion is not None:
+        fecha, pk = posicion
+        if pk is None:
+            queryset = queryset.filter(**{f'{campo_fecha}__gte': fecha})
+        else:
+            queryset = queryset.filter(Q(**{f'{campo_fecha}__gt': fecha}) | Q(**{campo_fecha: fecha, 'id__gt': pk}))
+    return list(queryset.order_by(campo_fecha, 'id')[:LIMITE_POR_TABLA + 1])
+
+
+def _siguiente_posicion(filas, campo_fecha, posicion, corte):
+    """
+    Si la tabla quedó truncada se sigue desde la última fila enviada; si no,
+    desde el corte (inicio menos el margen), sin retroceder
+    """
+    if len(filas) > LIMITE_POR_TABLA:
+        ultima = filas[LIMITE_POR_TABLA - 1]
+        return (getattr(ultima, campo_fecha), ultima.pk), True
+    if posicion is not None and posicion[0] > corte:
+        return posicion, False
+    return (corte, None), False
+
+
+def sincronizar(perfil, cursor=None, elegir_serializer=lambda serializer: serializer):
+    """
+    Cambios de las tablas de la app móvil para el usuario desde el cursor.
+
+    Cada tabla se lee con WHERE (marca de cambio, id) > (posición del cursor)
+    sobre un índice por usuario, unidad o condominio, y las filas borradas
+    salen del registro de lápidas. Sin cursor, con un cursor de otras
+    unidades (cambió la residencia) o más viejo que la retención de lápidas,
+    la respuesta es completa: el cliente debe reemplazar su copia local.
+    """
+    inicio = timezone.now()
+    corte = inicio - MARGEN_CURSOR
+    anterior = decodificar_cursor(cursor) if cursor else None
+
+    residencias = ResidenciaUnidad.objects.filter(usuario=perfil, activa=True).order_by('unidad_id')
+    unidades = [[str(unidad_id), propietario] for unidad_id, propietario in residencias.values_list('unidad_id', 'es_propietario')]
+    alcance = Alcance(
+        perfil=perfil,
+        unidades=[unidad_id for unidad_id, _ in unidades],
+        propietario=any(propietario for _, propietario in unidades),
+        inquilino=any(not propietario for _, propietario in unidades),
+    )
+
+    completa = (
+        anterior is None
+        or anterior['unidades'] != unidades
+        or anterior['desde'] < inicio - RETENCION_ELIMINADOS
+    )
+    posiciones_anteriores = {} if completa else anterior['posiciones']
+
+    cambios, posiciones, hay_mas = {}, {}, False
+    eliminados = {nombre: [] for nombre in TABLAS}
+    for nombre, tabla in TABLAS.items():
+        serializer = elegir_serializer(tabla.serializer)
+        queryset = optimizar_queryset(tabla.modelo.objects.filter(tabla.filtro(alcance)), serializer)
+        posicion = posiciones_anteriores.get(nombre)
+        filas = _cambios_desde(queryset, tabla.campo_fecha, posicion)
+        posiciones[nombre], truncada = _siguiente_posicion(filas, tabla.campo_fecha, posicion, corte)
+        hay_mas = hay_mas or truncada
+        cambios[nombre] = serializer(filas[:LIMITE_POR_TABLA], many=True).data
+
+    if not completa:
+        lapidas = RegistroEliminado.objects.filter(
+            Q(unidad__in=alcance.unidades) | Q(usuario=perfil) | Q(condominio=perfil.condominio_id)
+        )
+        posicion = posiciones_anteriores.get(ELIMINADOS)
+        filas = _cambios_desde(lapidas, 'fecha_eliminacion', posicion)
+        posiciones[ELIMINADOS], truncada = _siguiente_posicion(filas, 'fecha_eliminacion', posicion, corte)
+        hay_mas = hay_mas or truncada
+        for lapida in filas[:LIMITE_POR_TABLA]:
+            eliminados[lapida.tabla].append(lapida.objeto_id)
+    else:
+        posiciones[ELIMINADOS] = (corte, None)
+
+    return {
+        'cursor': codificar_cursor(corte, unidades, posiciones),
+        'completa': completa,
+        'hay_mas': hay_mas,
+        'cambios': cambios,
+        'eliminados': eliminados,
+    }
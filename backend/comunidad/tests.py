@@ -1,3 +1,1692 @@
-from django.test import TestCase
+import threading
+import unittest
+from datetime import date, time, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection, connections
+from django.db.models import F
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .catalogos import invalidar_catalogo
+from .consultas import plan_de_carga
+from .disponibilidad import (
+    DIAS_SEMANA, calcular_disponibilidad, fechas_recurrentes, franjas_libres, invalidar_disponibilidad
+)
+from .importacion_pagos import importar_pagos
+from .models import *
+from .lecturas import BufferLecturas, buffer_lecturas
+from .placas import descartar_indices_placas, resolver_lecturas
+from .publicacion import procesar_programacion
+from .reconocimiento import codificar_encoding, decodificar_encoding, descartar_indices, identificar, obtener_indice
+from .push import ResultadoEnvio, TransportePush, despachar, despachar_pendientes, obtener_transporte
+from .serializers import PagoSerializer, PagoCompactoSerializer
+
+
+class DatosPruebaMixin:
+    """Crea un condominio mínimo con un residente y su unidad"""
+
+    def crear_datos_base(self):
+        self.condominio = Condominio.objects.create(
+            nombre='Condominio Prueba', direccion='Calle 1', nit='1000001'
+        )
+        self.tipo_propietario = TipoUsuario.objects.create(tipo='PROPIETARIO')
+        self.tipo_unidad = TipoUnidad.objects.create(nombre='Departamento')
+        self.user = User.objects.create_user(
+            username='residente', email='residente@test.com', password='secreto123',
+            first_name='Ana', last_name='Pérez'
+        )
+        self.perfil = PerfilUsuario.objects.create(
+            user=self.user, condominio=self.condominio,
+            tipo_usuario=self.tipo_propietario, ci='1234567'
+        )
+        self.unidad = Unidad.objects.create(
+            condominio=self.condominio, numero='101', tipo_unidad=self.tipo_unidad,
+            piso=1, porcentaje_propiedad=Decimal('10.00')
+        )
+        ResidenciaUnidad.objects.create(
+            usuario=self.perfil, unidad=self.unidad, es_propietario=True,
+            fecha_inicio=date(2024, 1, 1)
+        )
+        self.area = AreaComun.objects.create(
+            condominio=self.condominio, nombre='Piscina', capacidad_maxima=20,
+            hora_apertura=time(8, 0), hora_cierre=time(22, 0)
+        )
+        self.camara = CamaraSeguridad.objects.create(
+            condominio=self.condominio, nombre='Portería', ubicacion='Entrada',
+            ip_address='10.0.0.1'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def crear_cuota(self, mes, año=2030, monto=Decimal('100.00'), unidad=None):
+        configuracion, _ = ConfiguracionExpensa.objects.get_or_create(
+            condominio=self.condominio, periodo_mes=mes, periodo_año=año,
+            defaults={'fecha_vencimiento': date.today() + timedelta(days=mes)}
+        )
+        return CuotaMantenimiento.objects.create(
+            unidad=unidad or self.unidad, configuracion=configuracion,
+            monto_administracion=monto, fecha_vencimiento=configuracion.fecha_vencimiento
+        )
+
+    def crear_registros(self, cantidad):
+        """
+        Agrega `cantidad` cuotas, pagos, reservas, alertas, accesos y visitantes
+        al residente, más otros tantos vecinos con su unidad
+        """
+        inicio = CuotaMantenimiento.objects.count()
+        metodo_pago, _ = MetodoPago.objects.get_or_create(
+            condominio=self.condominio, nombre='Transferencia'
+        )
+        for i in range(cantidad):
+            numero = inicio + i
+            cuota = self.crear_cuota(mes=numero + 1)
+            Pago.objects.create(
+                cuota=cuota, metodo_pago=metodo_pago, monto_pagado=Decimal('10.00'),
+                numero_transaccion=f'TRX-{numero}', fecha_pago=timezone.now(),
+                estado='COMPLETADO', registrado_por=self.perfil
+            )
+            vecino = User.objects.create_user(username=f'vecino{numero}', first_name='Vecino')
+            PerfilUsuario.objects.create(
+                user=vecino, condominio=self.condominio,
+                tipo_usuario=self.tipo_propietario, ci=f'900{numero}'
+            )
+            unidad = Unidad.objects.create(
+                condominio=self.condominio, numero=f'2{numero:02d}', tipo_unidad=self.tipo_unidad,
+                piso=2, porcentaje_propiedad=Decimal('5.00')
+            )
+            Visitante.objects.create(
+                nombre='Visita', ci=f'800{numero}', motivo_visita='Entrega',
+                unidad_destino=unidad, autorizado_por=self.perfil
+            )
+            AreaComun.objects.create(
+                condominio=self.condominio, nombre=f'Salón {numero}', capacidad_maxima=10,
+                hora_apertura=time(8, 0), hora_cierre=time(22, 0)
+            )
+            CamaraSeguridad.objects.create(
+                condominio=self.condominio, nombre=f'Cámara {numero}', ubicacion='Bloque',
+                ip_address='10.0.0.2'
+            )
+            ReservaAreaComun.objects.create(
+                area_comun=self.area, usuario=self.perfil,
+                fecha_reserva=date.today() + timedelta(days=numero + 1),
+                hora_inicio=time(10, 0), hora_fin=time(11, 0), numero_personas=2,
+                proposito='Cumpleaños', estado='CONFIRMADA'
+            )
+            AlertaSeguridad.objects.create(
+                condominio=self.condominio, camara=self.camara,
+                tipo_alerta='OTRO', nivel='BAJA', descripcion='Movimiento',
+                revisada_por=self.perfil
+            )
+            vehiculo = Vehiculo.objects.create(
+                propietario=self.perfil, placa=f'ABC{inicio + i:03d}', tipo='AUTO',
+                marca='Toyota', modelo='Corolla', año=2020, color='Rojo'
+            )
+            RegistroAcceso.objects.create(
+                condominio=self.condominio, usuario=self.perfil, vehiculo=vehiculo,
+                camara=self.camara, tipo_acceso='ENTRADA', metodo_identificacion='VEHICULAR'
+            )
+
+
+class DashboardMovilTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+
+    def contar_consultas(self):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get('/api/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        return len(consultas), response
+
+    def test_numero_de_consultas_constante(self):
+        self.crear_registros(1)
+        consultas_pocos, _ = self.contar_consultas()
+
+        self.crear_registros(4)
+        consultas_muchos, response = self.contar_consultas()
+
+        self.assertEqual(consultas_pocos, consultas_muchos)
+        self.assertLessEqual(consultas_muchos, 6)
+        self.assertEqual(len(response.data['reservas_activas']), 3)
+        self.assertEqual(len(response.data['accesos_recientes']), 5)
+
+    def test_balance_y_vencimientos(self):
+        self.crear_registros(3)
+        _, response = self.contar_consultas()
+
+        self.assertEqual(response.data['balance_total'], Decimal('300.00'))
+        self.assertEqual(response.data['cuota_pendiente']['id'],
+                         CuotaMantenimiento.objects.order_by('fecha_vencimiento').first().id)
+        self.assertEqual(len(response.data['proximos_vencimientos']), 3)
+
+
+class VistaCompactaTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+        self.crear_registros(3)
+
+    def test_alertas_compactas_sin_anidar(self):
+        completa = self.client.get('/api/alertas/')
+        compacta = self.client.get('/api/alertas/?view=compact')
+
+        alerta = compacta.data['results'][0]
+        self.assertEqual(alerta['camara'], self.camara.id)
+        self.assertEqual(alerta['camara_nombre'], 'Portería')
+        self.assertEqual(alerta['revisada_por_nombre'], 'Ana Pérez')
+        self.assertLess(len(compacta.content), len(completa.content))
+
+    def test_dashboard_compacto(self):
+        response = self.client.get('/api/dashboard/?view=compact')
+
+        self.assertEqual(response.data['usuario']['condominio'], self.condominio.id)
+        self.assertEqual(response.data['accesos_recientes'][0]['vehiculo_placa'][:3], 'ABC')
+        self.assertIsInstance(response.data['cuota_pendiente']['configuracion'], int)
+
+    def test_comparar_serializers(self):
+        salida = StringIO()
+        call_command('comparar_serializers', repeticiones=1, stdout=salida)
+        self.assertIn('RegistroAccesoSerializer', salida.getvalue())
+
+
+class ConsultasRouterTests(DatosPruebaMixin, TestCase):
+    """El número de consultas de cada endpoint del router no depende del tamaño de la página"""
+
+    ENDPOINTS = [
+        'usuarios', 'unidades', 'areas-comunes', 'camaras', 'alertas',
+        'pagos', 'reservas', 'visitantes', 'vehiculos', 'accesos',
+    ]
+
+    def setUp(self):
+        self.crear_datos_base()
+
+    def contar_consultas(self):
+        conteos = {}
+        for endpoint in self.ENDPOINTS:
+            for vista in ['full', 'compact']:
+                with CaptureQueriesContext(connection) as consultas:
+                    response = self.client.get(f'/api/{endpoint}/?view={vista}')
+                self.assertEqual(response.status_code, 200, endpoint)
+                self.assertTrue(response.data['results'], endpoint)
+                conteos[endpoint, vista] = len(consultas)
+        return conteos
+
+    def test_consultas_constantes_por_endpoint(self):
+        self.crear_registros(1)
+        pocos = self.contar_consultas()
+
+        self.crear_registros(5)
+        muchos = self.contar_consultas()
+
+        for clave, cantidad in muchos.items():
+            with self.subTest(endpoint=clave):
+                self.assertEqual(pocos[clave], cantidad)
+
+    def test_plan_de_carga(self):
+        select, prefetch = plan_de_carga(PagoSerializer)
+        self.assertIn('cuota__unidad__condominio', select)
+        self.assertIn('registrado_por__user', select)
+        self.assertEqual(prefetch, ())
+
+        select, _ = plan_de_carga(PagoCompactoSerializer)
+        self.assertIn('cuota__unidad', select)
+        self.assertNotIn('cuota__unidad__condominio', select)
+
+
+class PaginacionKeysetTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+        self.crear_registros(7)
+        # Mismo instante para todas: el desempate por id debe mantener el orden
+        RegistroAcceso.objects.update(fecha_hora=timezone.now())
+
+    def recorrer(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            ids.extend(fila['id'] for fila in response.data['results'])
+            url = response.data['next']
+        return ids
+
+    def test_recorre_todo_sin_repetir_ni_saltar(self):
+        ids = self.recorrer('/api/accesos/?page_size=3&view=compact')
+
+        esperados = list(RegistroAcceso.objects.order_by('-fecha_hora', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, esperados)
+
+    def test_inserciones_concurrentes_no_desplazan_paginas(self):
+        primera = self.client.get('/api/accesos/?page_size=3').data
+        RegistroAcceso.objects.create(
+            condominio=self.condominio, usuario=self.perfil, tipo_acceso='SALIDA',
+            metodo_identificacion='MANUAL'
+        )
+        segunda = self.client.get(primera['next']).data
+
+        vistos = [fila['id'] for fila in primera['results'] + segunda['results']]
+        self.assertEqual(len(vistos), len(set(vistos)))
+        self.assertEqual(segunda['results'][0]['id'], primera['results'][-1]['id'] - 1)
+
+    def test_pagina_anterior(self):
+        primera = self.client.get('/api/pagos/?page_size=2').data
+        segunda = self.client.get(primera['next']).data
+        vuelta = self.client.get(segunda['previous']).data
+
+        self.assertEqual([f['id'] for f in vuelta['results']], [f['id'] for f in primera['results']])
+        self.assertIsNone(vuelta['previous'])
+
+    def test_total_solo_si_se_pide(self):
+        self.assertNotIn('count', self.client.get('/api/alertas/').data)
+        self.assertEqual(self.client.get('/api/alertas/?total=true').data['count'], 7)
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.client.get('/api/accesos/?cursor=basura').status_code, 404)
+
+
+class IndicesConsultasTests(DatosPruebaMixin, TestCase):
+    """
+    Verifica con EXPLAIN que las consultas frecuentes de views.py usan índices
+    sobre un volumen de datos parecido al de producción.
+    """
+    UNIDADES = 2000
+    PERIODOS = 12
+    EVENTOS = 20000
+
+    def setUp(self):
+        self.crear_datos_base()
+        users = User.objects.bulk_create(
+            User(username=f'masivo{i}', password='!') for i in range(self.UNIDADES)
+        )
+        perfiles = PerfilUsuario.objects.bulk_create(
+            PerfilUsuario(user=user, condominio=self.condominio,
+                          tipo_usuario=self.tipo_propietario, ci=f'M{i}')
+            for i, user in enumerate(users)
+        )
+        unidades = Unidad.objects.bulk_create(
+            Unidad(condominio=self.condominio, numero=f'M{i}', tipo_unidad=self.tipo_unidad,
+                   piso=1, porcentaje_propiedad=Decimal('0.05'))
+            for i in range(self.UNIDADES)
+        )
+        ResidenciaUnidad.objects.bulk_create(
+            ResidenciaUnidad(usuario=perfil, unidad=unidad, fecha_inicio=date(2024, 1, 1))
+            for perfil, unidad in zip(perfiles, unidades)
+        )
+        configuraciones = ConfiguracionExpensa.objects.bulk_create(
+            ConfiguracionExpensa(condominio=self.condominio, periodo_mes=mes, periodo_año=2024,
+                                 fecha_vencimiento=date(2024, mes, 10))
+            for mes in range(1, self.PERIODOS + 1)
+        )
+        CuotaMantenimiento.objects.bulk_create(
+            CuotaMantenimiento(unidad=unidad, configuracion=configuracion, estado='PAGADA',
+                               fecha_vencimiento=configuracion.fecha_vencimiento)
+            for unidad in unidades for configuracion in configuraciones
+        )
+        areas = AreaComun.objects.bulk_create(
+            AreaComun(condominio=self.condominio, nombre=f'Área {i}', capacidad_maxima=10,
+                      hora_apertura=time(8, 0), hora_cierre=time(22, 0))
+            for i in range(10)
+        )
+        ReservaAreaComun.objects.bulk_create(
+            ReservaAreaComun(area_comun=areas[i % 10], usuario=perfiles[i % self.UNIDADES],
+                             fecha_reserva=date(2024, 1, 1) + timedelta(days=i % 700),
+                             hora_inicio=time(10, 0), hora_fin=time(11, 0), numero_personas=1,
+                             proposito='Evento', estado='COMPLETADA')
+            for i in range(self.EVENTOS // 2)
+        )
+        AlertaSeguridad.objects.bulk_create(
+            AlertaSeguridad(condominio=self.condominio, camara=self.camara, tipo_alerta='OTRO',
+                            nivel='BAJA', descripcion='Movimiento', revisada=i % 50 != 0)
+            for i in range(self.EVENTOS)
+        )
+        RegistroAcceso.objects.bulk_create(
+            RegistroAcceso(condominio=self.condominio, usuario=perfiles[i % self.UNIDADES],
+                           tipo_acceso='ENTRADA', metodo_identificacion='TARJETA')
+            for i in range(self.EVENTOS)
+        )
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def assertUsaIndice(self, queryset):
+        tabla = queryset.model._meta.db_table
+        plan = queryset.explain()
+        if connection.vendor == 'postgresql':
+            self.assertNotIn(f'Seq Scan on {tabla}', plan, plan)
+            self.assertIn('Index', plan, plan)
+        else:
+            recorridos = [linea for linea in plan.splitlines() if f'SCAN {tabla}' in linea]
+            for linea in recorridos:
+                self.assertIn('INDEX', linea, plan)
+            self.assertIn(f'{tabla} USING', plan, plan)
+
+    def test_consultas_frecuentes_usan_indices(self):
+        perfil = self.perfil
+        unidad = self.unidad
+        hoy = date.today()
+        consultas = {
+            'residencia activa': ResidenciaUnidad.objects.filter(usuario=perfil, activa=True),
+            'cuotas abiertas': CuotaMantenimiento.objects.filter(
+                unidad=unidad, estado__in=['PENDIENTE', 'VENCIDA']
+            ).order_by('fecha_vencimiento', 'id'),
+            'cuotas por vencer': CuotaMantenimiento.objects.filter(
+                unidad=unidad, estado='PENDIENTE', fecha_vencimiento__lte=hoy + timedelta(days=7)
+            ),
+            'reservas activas': ReservaAreaComun.objects.filter(
+                usuario=perfil, estado='CONFIRMADA', fecha_reserva__gte=hoy
+            ).order_by('fecha_reserva')[:3],
+            'disponibilidad de área': ReservaAreaComun.objects.filter(
+                area_comun=self.area, fecha_reserva=hoy, estado__in=['PENDIENTE', 'CONFIRMADA'],
+                hora_inicio__lt=time(12, 0), hora_fin__gt=time(10, 0)
+            ),
+            'alertas sin revisar': AlertaSeguridad.objects.filter(
+                condominio=self.condominio, revisada=False
+            ).order_by('-fecha_hora')[:5],
+            'accesos del usuario': RegistroAcceso.objects.filter(
+                usuario=perfil
+            ).order_by('-fecha_hora')[:5],
+            'historial de accesos': RegistroAcceso.objects.order_by('-fecha_hora', '-id')[:21],
+            'historial de alertas': AlertaSeguridad.objects.filter(
+                fecha_hora__lt=timezone.now()
+            ).order_by('-fecha_hora', '-id')[:21],
+            'pagos por cursor': Pago.objects.order_by('-fecha_pago', '-id')[:21],
+        }
+        for nombre, queryset in consultas.items():
+            with self.subTest(consulta=nombre):
+                self.assertUsaIndice(queryset)
+
+
+class SaldoUnidadTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+
+    def test_saldo_se_mantiene_con_las_cuotas(self):
+        cuota = self.crear_cuota(mes=1)
+        otra = self.crear_cuota(mes=2, monto=Decimal('50.00'))
+
+        saldo = SaldoUnidad.objects.get(pk=self.unidad.pk)
+        self.assertEqual(saldo.total_pendiente, Decimal('150.00'))
+        self.assertEqual(saldo.cuotas_pendientes, 2)
+        self.assertEqual(saldo.proximo_vencimiento, cuota.fecha_vencimiento)
+
+        cuota.monto_pagado = Decimal('100.00')
+        cuota.save()
+
+        saldo.refresh_from_db()
+        self.assertEqual(saldo.total_pendiente, Decimal('50.00'))
+        self.assertEqual(saldo.cuotas_pendientes, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            otra.delete()
+        self.assertEqual(SaldoUnidad.objects.get(pk=self.unidad.pk).total_pendiente, Decimal('0.00'))
+
+    def test_finanzas_lee_el_saldo(self):
+        self.crear_cuota(mes=1)
+        response = self.client.get('/api/finanzas/')
+
+        self.assertEqual(response.data['saldo_actual'], Decimal('100.00'))
+        self.assertEqual(response.data['cuotas_pendientes'], 1)
+        self.assertEqual(response.data['proxima_cuota']['monto_pendiente'], '100.00')
+
+    def test_finanzas_consultas_constantes(self):
+        def contar():
+            with CaptureQueriesContext(connection) as consultas:
+                response = self.client.get('/api/finanzas/')
+            self.assertEqual(response.status_code, 200)
+            return len(consultas), response
+
+        self.crear_registros(1)
+        contar()  # llena el cache del catálogo de métodos de pago
+        consultas_pocos, _ = contar()
+        self.crear_registros(4)
+        consultas_muchos, response = contar()
+
+        self.assertEqual(consultas_pocos, consultas_muchos)
+        self.assertEqual(len(response.data['historial_pagos']), 5)
+
+    def test_conciliar_saldos(self):
+        self.crear_cuota(mes=1)
+        SaldoUnidad.objects.filter(pk=self.unidad.pk).update(total_pendiente=Decimal('1.00'))
+
+        salida = StringIO()
+        call_command('conciliar_saldos', stdout=salida)
+        self.assertIn('Diferencias: 1', salida.getvalue())
+
+        call_command('conciliar_saldos', corregir=True, stdout=StringIO())
+        self.assertEqual(SaldoUnidad.objects.get(pk=self.unidad.pk).total_pendiente, Decimal('100.00'))
+
+
+class GenerarCuotasTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+        grande = TipoUnidad.objects.create(nombre='Penthouse', factor_costo=Decimal('1.50'))
+        Unidad.objects.bulk_create([
+            Unidad(condominio=self.condominio, numero=f'2{i:02d}', tipo_unidad=grande,
+                   piso=2, porcentaje_propiedad=Decimal('5.00'))
+            for i in range(30)
+        ])
+        Unidad.objects.create(condominio=self.condominio, numero='999', tipo_unidad=self.tipo_unidad,
+                              piso=9, porcentaje_propiedad=Decimal('5.00'), activa=False)
+        self.configuracion = ConfiguracionExpensa.objects.create(
+            condominio=self.condominio, periodo_mes=3, periodo_año=2030,
+            monto_base_administracion=Decimal('1000.00'), monto_base_seguridad=Decimal('333.33'),
+            fecha_vencimiento=date.today() + timedelta(days=10)
+        )
+
+    def test_genera_en_bloque_e_idempotente(self):
+        # Lectura de unidades y existentes, un INSERT por lote y el saldo
+        with CaptureQueriesContext(connection) as consultas:
+            call_command('generar_cuotas', mes=3, año=2030, lote=10, stdout=StringIO())
+        self.assertLessEqual(len(consultas), 15)
+
+        cuotas = CuotaMantenimiento.objects.filter(configuracion=self.configuracion)
+        self.assertEqual(cuotas.count(), 31)
+
+        propia = cuotas.get(unidad=self.unidad)
+        self.assertEqual(propia.monto_administracion, Decimal('100.00'))
+        self.assertEqual(propia.monto_seguridad, Decimal('33.33'))
+        self.assertEqual(propia.monto_total, Decimal('133.33'))
+        self.assertEqual(propia.estado, 'PENDIENTE')
+
+        vecina = cuotas.get(unidad__numero='200')
+        self.assertEqual(vecina.monto_administracion, Decimal('75.00'))
+        self.assertEqual(vecina.monto_pendiente, Decimal('100.00'))
+
+        self.assertEqual(SaldoUnidad.objects.get(pk=self.unidad.pk).total_pendiente, Decimal('133.33'))
+
+        salida = StringIO()
+        call_command('generar_cuotas', mes=3, año=2030, stdout=salida)
+        self.assertIn('0 cuotas creadas, 31 ya existían', salida.getvalue())
+        self.assertEqual(cuotas.count(), 31)
+
+    def test_api_solo_administradores(self):
+        datos = {'periodo_mes': 3, 'periodo_año': 2030}
+        response = self.client.post('/api/finanzas/generar-cuotas/', datos, format='json')
+        self.assertEqual(response.status_code, 403)
+
+        self.perfil.tipo_usuario = TipoUsuario.objects.create(tipo='ADMINISTRADOR')
+        self.perfil.save()
+        response = self.client.post('/api/finanzas/generar-cuotas/', datos, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['cuotas_creadas'], 31)
+
+
+class RecalcularMoraTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+        self.hoy = date.today()
+        self.configuracion = ConfiguracionExpensa.objects.create(
+            condominio=self.condominio, periodo_mes=1, periodo_año=2030,
+            multa_retraso_pago=Decimal('20.00'), dias_gracia=5, porcentaje_mora=Decimal('2.00'),
+            fecha_vencimiento=self.hoy - timedelta(days=45)
+        )
+        # Se crean antes del vencimiento y se "atrasan" sin pasar por save()
+        self.cuotas = [
+            CuotaMantenimiento.objects.create(
+                unidad=Unidad.objects.create(
+                    condominio=self.condominio, numero=f'3{i:02d}', tipo_unidad=self.tipo_unidad,
+                    piso=3, porcentaje_propiedad=Decimal('1.00')
+                ),
+                configuracion=self.configuracion, monto_administracion=Decimal('100.00'),
+                monto_pagado=Decimal('30.00') if i == 0 else Decimal('0'),
+                fecha_vencimiento=self.hoy + timedelta(days=1)
+            )
+            for i in range(5)
+        ]
+        CuotaMantenimiento.objects.update(fecha_vencimiento=self.configuracion.fecha_vencimiento)
+        self.en_gracia = self.crear_cuota(mes=2)
+        CuotaMantenimiento.objects.filter(pk=self.en_gracia.pk).update(
+            fecha_vencimiento=self.hoy - timedelta(days=2)
+        )
+
+    def test_actualiza_en_bloque_e_idempotente(self):
+        with CaptureQueriesContext(connection) as consultas:
+            call_command('recalcular_mora', stdout=StringIO())
+        self.assertLessEqual(len(consultas), 15)
+
+        parcial, vencida = (CuotaMantenimiento.objects.get(pk=c.pk) for c in self.cuotas[:2])
+        self.assertEqual(vencida.estado, 'VENCIDA')
+        # 45 días de atraso: 2 meses de mora al 2%
+        self.assertEqual(vencida.monto_multas, Decimal('20.00'))
+        self.assertEqual(vencida.monto_mora, Decimal('4.00'))
+        self.assertEqual(vencida.monto_pendiente, Decimal('124.00'))
+        self.assertEqual(parcial.estado, 'PAGADA_PARCIAL')
+        self.assertEqual(parcial.monto_pendiente, Decimal('94.00'))
+
+        en_gracia = CuotaMantenimiento.objects.get(pk=self.en_gracia.pk)
+        self.assertEqual(en_gracia.estado, 'VENCIDA')
+        self.assertEqual(en_gracia.monto_multas, Decimal('0.00'))
+        self.assertEqual(SaldoUnidad.objects.get(pk=self.unidad.pk).total_vencido, Decimal('100.00'))
+
+        salida = StringIO()
+        call_command('recalcular_mora', stdout=salida)
+        self.assertIn('Cuotas vencidas: 0 - Con mora: 0', salida.getvalue())
+        self.assertEqual(CuotaMantenimiento.objects.get(pk=vencida.pk).monto_pendiente, Decimal('124.00'))
+
+
+class EstadoCuotaTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+
+    def test_regla_en_python_y_en_sql_coinciden(self):
+        hoy = date.today()
+        casos = [
+            # (monto_pagado, dias hasta el vencimiento, estado previo)
+            (Decimal('0'), 5, 'PENDIENTE'),
+            (Decimal('0'), -5, 'PENDIENTE'),
+            (Decimal('40.00'), -5, 'VENCIDA'),
+            (Decimal('100.00'), 5, 'PENDIENTE'),
+            (Decimal('0'), -5, 'CONDONADA'),
+        ]
+        cuotas = []
+        for mes, (pagado, dias, estado) in enumerate(casos, start=1):
+            cuota = self.crear_cuota(mes=mes)
+            CuotaMantenimiento.objects.filter(pk=cuota.pk).update(
+                monto_pagado=pagado, estado=estado, fecha_vencimiento=hoy + timedelta(days=dias)
+            )
+            cuotas.append(cuota)
+
+        CuotaMantenimiento.objects.update(
+            monto_pendiente=F('monto_total') - F('monto_pagado'),
+            estado=estado_cuota_sql(hoy, monto_pendiente=F('monto_total') - F('monto_pagado'))
+        )
+
+        estados = []
+        for cuota, (pagado, dias, estado) in zip(cuotas, casos):
+            cuota.refresh_from_db()
+            self.assertEqual(cuota.estado, derivar_estado_cuota(
+                estado, Decimal('100.00') - pagado, pagado, hoy + timedelta(days=dias), hoy
+            ))
+            estados.append(cuota.estado)
+        self.assertEqual(estados, ['PENDIENTE', 'VENCIDA', 'PAGADA_PARCIAL', 'PAGADA', 'CONDONADA'])
+
+    def test_condonada_se_conserva_al_guardar(self):
+        cuota = self.crear_cuota(mes=1)
+        cuota.estado = 'CONDONADA'
+        cuota.save()
+        cuota.refresh_from_db()
+        self.assertEqual(cuota.estado, 'CONDONADA')
+
+
+class ProcesarPagoTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+        self.cuota = self.crear_cuota(mes=1)
+        self.metodo_pago = MetodoPago.objects.create(condominio=self.condominio, nombre='Transferencia')
+        self.datos = {'cuota_id': self.cuota.id, 'metodo_pago_id': self.metodo_pago.id, 'monto_pagado': '40.00'}
+
+    def test_reintento_con_la_misma_clave_devuelve_el_pago_original(self):
+        primera = self.client.post('/api/finanzas/pagar/', self.datos, format='json',
+                                   HTTP_IDEMPOTENCY_KEY='pago-1')
+        repetida = self.client.post('/api/finanzas/pagar/', self.datos, format='json',
+                                    HTTP_IDEMPOTENCY_KEY='pago-1')
+
+        self.assertEqual(primera.status_code, 201)
+        self.assertEqual(repetida.status_code, 201)
+        self.assertEqual(repetida['Idempotent-Replayed'], 'true')
+        self.assertEqual(repetida.data['pago']['id'], primera.data['pago']['id'])
+        self.assertEqual(Pago.objects.count(), 1)
+        self.cuota.refresh_from_db()
+        self.assertEqual(self.cuota.monto_pagado, Decimal('40.00'))
+
+        otra = self.client.post('/api/finanzas/pagar/', {**self.datos, 'monto_pagado': '10.00'},
+                                format='json', HTTP_IDEMPOTENCY_KEY='pago-1')
+        self.assertEqual(otra.status_code, 422)
+
+    def test_sin_clave_cada_solicitud_es_un_pago(self):
+        self.client.post('/api/finanzas/pagar/', self.datos, format='json')
+        self.client.post('/api/finanzas/pagar/', {**self.datos, 'clave_idempotencia': ''}, format='json')
+        self.cuota.refresh_from_db()
+        self.assertEqual(self.cuota.monto_pagado, Decimal('80.00'))
+        self.assertEqual(self.cuota.estado, 'PAGADA_PARCIAL')
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'Requiere bloqueo de filas de PostgreSQL')
+class ProcesarPagoConcurrenteTests(DatosPruebaMixin, TransactionTestCase):
+    HILOS = 25
+
+    def setUp(self):
+        self.crear_datos_base()
+        self.cuota = self.crear_cuota(mes=1, monto=Decimal('250.00'))
+        self.metodo_pago = MetodoPago.objects.create(condominio=self.condominio, nombre='Transferencia')
+
+    def pagar_en_paralelo(self, clave=None):
+        barrera = threading.Barrier(self.HILOS)
+        respuestas = []
+
+        def pagar(numero):
+            cliente = APIClient()
+            cliente.force_authenticate(self.user)
+            encabezados = {'HTTP_IDEMPOTENCY_KEY': clave} if clave else {}
+            try:
+                barrera.wait()
+                respuestas.append(cliente.post('/api/finanzas/pagar/', {
+                    'cuota_id': self.cuota.id, 'metodo_pago_id': self.metodo_pago.id,
+                    'monto_pagado': '10.00'
+                }, format='json', **encabezados))
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=pagar, args=(n,)) for n in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return respuestas
+
+    def test_pagos_simultaneos_no_pierden_actualizaciones(self):
+        respuestas = self.pagar_en_paralelo()
+
+        self.assertEqual([r.status_code for r in respuestas], [201] * self.HILOS)
+        self.cuota.refresh_from_db()
+        self.assertEqual(self.cuota.monto_pagado, Decimal('250.00'))
+        self.assertEqual(self.cuota.estado, 'PAGADA')
+        self.assertEqual(Pago.objects.filter(cuota=self.cuota).count(), self.HILOS)
+
+    def test_reintentos_simultaneos_cobran_una_vez(self):
+        respuestas = self.pagar_en_paralelo(clave='reintento-movil')
+
+        self.assertEqual({r.data['pago']['id'] for r in respuestas}, {Pago.objects.get().id})
+        self.cuota.refresh_from_db()
+        self.assertEqual(self.cuota.monto_pagado, Decimal('10.00'))
+
+
+class ImportarPagosTests(DatosPruebaMixin, TestCase):
+    EXTRACTO = (
+        "fecha;monto;referencia;descripcion\n"
+        "2030-01-05;100,00;BNC-1;Transferencia unidad 101\n"
+        "2030-01-05;40.00;BNC-2;Pago Depto 102\n"
+        "2030-01-06;999.00;BNC-3;Unidad 101\n"
+        "2030-01-06;50.00;BNC-4;Sin datos\n"
+        "06/01/2030;abc;BNC-5;Unidad 101\n"
+    ).encode()
+
+    def setUp(self):
+        self.crear_datos_base()
+        self.vecina = Unidad.objects.create(
+            condominio=self.condominio, numero='102', tipo_unidad=self.tipo_unidad,
+            piso=1, porcentaje_propiedad=Decimal('10.00')
+        )
+        self.cuota = self.crear_cuota(mes=1)
+        self.cuota_vecina = self.crear_cuota(mes=1, unidad=self.vecina)
+        self.metodo_pago = MetodoPago.objects.create(condominio=self.condominio, nombre='Transferencia')
+
+    def importar(self, contenido, **kwargs):
+        return importar_pagos(BytesIO(contenido), self.condominio.id, self.metodo_pago, self.perfil, **kwargs)
+
+    def test_simulacion_no_escribe(self):
+        resumen = self.importar(self.EXTRACTO, simulacion=True)
+
+        self.assertEqual((resumen['lineas'], resumen['conciliadas'], resumen['rechazadas']), (5, 2, 3))
+        self.assertEqual(resumen['monto_conciliado'], Decimal('140.00'))
+        self.assertFalse(Pago.objects.exists())
+
+    def test_importa_en_bloque_y_no_duplica(self):
+        with CaptureQueriesContext(connection) as consultas:
+            resumen = self.importar(self.EXTRACTO)
+        self.assertEqual(resumen['conciliadas'], 2)
+        self.assertLessEqual(len(consultas), 12)
+
+        self.cuota.refresh_from_db()
+        self.cuota_vecina.refresh_from_db()
+        self.assertEqual(self.cuota.estado, 'PAGADA')
+        self.assertEqual(self.cuota_vecina.estado, 'PAGADA_PARCIAL')
+        self.assertEqual(self.cuota_vecina.monto_pendiente, Decimal('60.00'))
+        self.assertEqual(SaldoUnidad.objects.get(pk=self.unidad.pk).total_pendiente, Decimal('0.00'))
+
+        resumen = self.importar(self.EXTRACTO)
+        self.assertEqual((resumen['conciliadas'], resumen['duplicadas']), (0, 2))
+        self.assertEqual(Pago.objects.count(), 2)
+
+    def test_debitos_se_rechazan(self):
+        resumen = self.importar(
+            "fecha;monto;referencia;descripcion\n"
+            "2030-01-05;-30,00;BNC-9;Comisión unidad 101\n"
+            "2030-01-05;0.00;BNC-10;Unidad 101\n"
+            "2030-01-05;30.00;BNC-11;Unidad 101\n".encode()
+        )
+        self.assertEqual((resumen['lineas'], resumen['conciliadas'], resumen['rechazadas']), (3, 1, 2))
+        self.assertIn('no es un crédito', resumen['detalle_rechazos'][0])
+        self.assertEqual(list(Pago.objects.values_list('monto_pagado', flat=True)), [Decimal('30.00')])
+        self.cuota.refresh_from_db()
+        self.assertEqual(self.cuota.monto_pendiente, Decimal('70.00'))
+
+    def test_unidad_por_bloque_y_numero(self):
+        Unidad.objects.filter(pk=self.unidad.pk).update(bloque='A')
+        resumen = self.importar(
+            "fecha;monto;referencia;descripcion;bloque\n"
+            "2030-01-05;10.00;BNC-1;Unidad B-101;\n"
+            "2030-01-05;10.00;BNC-2;Unidad 101;B\n"
+            "2030-01-05;10.00;BNC-3;Unidad A-101;\n"
+            "2030-01-05;10.00;BNC-4;Unidad 101;A\n"
+            "2030-01-05;10.00;BNC-5;Unidad 101;\n".encode()
+        )
+        self.assertEqual((resumen['conciliadas'], resumen['rechazadas']), (3, 2))
+        self.assertEqual(Pago.objects.filter(cuota=self.cuota).count(), 3)
+
+    def test_ofx(self):
+        contenido = (
+            "OFXHEADER:100\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n"
+            "<STMTTRN>\n<TRNTYPE>CREDIT\n<DTPOSTED>20300105120000\n<TRNAMT>100.00\n"
+            "<FITID>OFX-1\n<MEMO>DEPTO 101 EXPENSAS\n</STMTTRN>\n"
+            "<STMTTRN>\n<TRNTYPE>DEBIT\n<DTPOSTED>20300105\n<TRNAMT>-20.00\n"
+            "<FITID>OFX-2\n<MEMO>Comisión\n</STMTTRN>\n"
+            "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+        ).encode()
+        resumen = self.importar(contenido, formato='ofx')
+
+        self.assertEqual((resumen['lineas'], resumen['conciliadas']), (1, 1))
+        self.assertEqual(Pago.objects.get().numero_transaccion, 'OFX-1')
+
+    def test_carga_desde_el_admin(self):
+        self.user.is_staff = self.user.is_superuser = True
+        self.user.save()
+        self.client.force_login(self.user)
+        archivo = BytesIO(self.EXTRACTO)
+        archivo.name = 'extracto.csv'
+
+        response = self.client.post('/admin/comunidad/pago/importar/', {
+            'archivo': archivo, 'metodo_pago': self.metodo_pago.id, 'simulacion': 'on'
+        })
+        self.assertContains(response, 'Simulación')
+        self.assertFalse(Pago.objects.exists())
+
+
+class DisponibilidadTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.crear_datos_base()
+        self.fecha = date.today() + timedelta(days=7)
+        self.area.dias_disponibles = [DIAS_SEMANA[self.fecha.weekday()], DIAS_SEMANA[(self.fecha.weekday() + 1) % 7]]
+        self.area.save()
+        for inicio, fin in [(time(10), time(12)), (time(12), time(13)), (time(20), time(23))]:
+            self.reservar(self.fecha, inicio, fin)
+
+    def reservar(self, fecha, inicio, fin):
+        return ReservaAreaComun.objects.create(
+            area_comun=self.area, usuario=self.perfil, fecha_reserva=fecha, hora_inicio=inicio,
+            hora_fin=fin, numero_personas=2, proposito='Cumpleaños', estado='CONFIRMADA'
+        )
+
+    def consultar(self, desde, hasta):
+        return self.client.get(f'/api/areas/{self.area.id}/disponibilidad/', {'desde': desde, 'hasta': hasta})
+
+    def test_franjas_libres_respetan_horario_y_dias(self):
+        response = self.consultar(self.fecha, self.fecha + timedelta(days=2))
+        dias = response.data['area']['dias']
+
+        self.assertEqual(dias[0]['libres'], [
+            {'hora_inicio': '08:00:00', 'hora_fin': '10:00:00'},
+            {'hora_inicio': '13:00:00', 'hora_fin': '20:00:00'},
+        ])
+        self.assertEqual(dias[1]['libres'], [{'hora_inicio': '08:00:00', 'hora_fin': '22:00:00'}])
+        self.assertFalse(dias[2]['disponible'])
+
+        # Reservas solapadas (datos anteriores a la restricción) se fusionan
+        self.assertEqual(
+            franjas_libres(time(8), time(22), [(time(10), time(12)), (time(11), time(13))]),
+            [(time(8), time(10)), (time(13), time(22))]
+        )
+
+    def test_cache_se_invalida_al_reservar(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.consultar(self.fecha, self.fecha)
+        with self.assertNumQueries(2):  # Perfil y área, sin reservas
+            self.consultar(self.fecha, self.fecha)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reservar(self.fecha, time(8), time(9))
+        dias = self.consultar(self.fecha, self.fecha).data['area']['dias']
+        self.assertEqual(dias[0]['libres'][0], {'hora_inicio': '09:00:00', 'hora_fin': '10:00:00'})
+
+    def test_version_descartada_no_revive_entradas_viejas(self):
+        invalidar_disponibilidad(self.area.id)
+        self.consultar(self.fecha, self.fecha)
+        cache.delete(f'disponibilidad:version:{self.area.id}')  # el cache descarta la versión
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reservar(self.fecha, time(8), time(9))
+        dias = self.consultar(self.fecha, self.fecha).data['area']['dias']
+        self.assertEqual(dias[0]['libres'][0], {'hora_inicio': '09:00:00', 'hora_fin': '10:00:00'})
+
+    def test_todas_las_areas_con_una_consulta_de_reservas(self):
+        for numero in range(10):
+            AreaComun.objects.create(condominio=self.condominio, nombre=f'Sala {numero}', capacidad_maxima=5,
+                                     hora_apertura=time(8), hora_cierre=time(22))
+        areas = list(AreaComun.objects.all())
+        with self.assertNumQueries(1):
+            disponibilidad = calcular_disponibilidad(areas, self.fecha, self.fecha + timedelta(days=30))
+        self.assertEqual(len(disponibilidad), 11)
+        self.assertTrue(all(len(dias) == 31 for dias in disponibilidad.values()))
+
+    def test_reserva_solapada_responde_409(self):
+        datos = {'area_comun_id': self.area.id, 'fecha_reserva': self.fecha, 'hora_inicio': '12:30',
+                 'hora_fin': '14:00', 'numero_personas': 2, 'proposito': 'Cena'}
+        self.assertEqual(self.client.post('/api/areas/reservar/', datos, format='json').status_code, 409)
+
+        response = self.client.post('/api/areas/reservar/', {**datos, 'hora_inicio': '13:00'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['reserva']['monto_total'], '0.00')
+
+    def test_reserva_fuera_de_horario(self):
+        response = self.client.post('/api/areas/reservar/', {
+            'area_comun_id': self.area.id, 'fecha_reserva': self.fecha, 'hora_inicio': '21:00',
+            'hora_fin': '23:30', 'numero_personas': 2, 'proposito': 'Cena'
+        }, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+@unittest.skipUnless(connection.vendor == 'postgresql', 'La restricción de exclusión solo existe en PostgreSQL')
+class ReservaConcurrenteTests(DatosPruebaMixin, TransactionTestCase):
+    HILOS = 20
+
+    def setUp(self):
+        self.crear_datos_base()
+
+    def test_reservas_simultaneas_sin_doble_reserva(self):
+        fecha = date.today() + timedelta(days=3)
+        barrera = threading.Barrier(self.HILOS)
+        codigos = []
+
+        def reservar(numero):
+            cliente = APIClient()
+            cliente.force_authenticate(self.user)
+            try:
+                barrera.wait()
+                # Horarios distintos pero todos solapados con 15:00-16:00
+                codigos.append(cliente.post('/api/areas/reservar/', {
+                    'area_comun_id': self.area.id, 'fecha_reserva': fecha,
+                    'hora_inicio': f'{14 + numero % 2}:30', 'hora_fin': '16:00',
+                    'numero_personas': 1, 'proposito': 'Clase'
+                }, format='json').status_code)
+            finally:
+                connections.close_all()
+
+        hilos = [threading.Thread(target=reservar, args=(n,)) for n in range(self.HILOS)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual(sorted(codigos), [201] + [409] * (self.HILOS - 1))
+        self.assertEqual(ReservaAreaComun.objects.filter(area_comun=self.area, fecha_reserva=fecha).count(), 1)
+
+
+class ReservaRecurrenteTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.crear_datos_base()
+        self.perfil.tipo_usuario = TipoUsuario.objects.create(tipo='ADMINISTRADOR')
+        self.perfil.save()
+        # Próximo lunes
+        self.inicio = date.today() + timedelta(days=7 - date.today().weekday())
+        self.area.precio_por_hora = Decimal('10.00')
+        self.area.save()
+
+    def datos(self, **extra):
+        return {
+            'area_comun_id': self.area.id, 'fecha_inicio': self.inicio,
+            'fecha_fin': self.inicio + timedelta(weeks=10) - timedelta(days=1), 'frecuencia': 'SEMANAL',
+            'dias_semana': [0, 2], 'hora_inicio': '18:00', 'hora_fin': '19:30',
+            'numero_personas': 15, 'proposito': 'Clase de yoga', **extra
+        }
+
+    def test_crea_todas_en_bloque_con_conflictos_por_fecha(self):
+        ocupada = self.inicio + timedelta(weeks=2, days=2)
+        ReservaAreaComun.objects.create(
+            area_comun=self.area, usuario=self.perfil, fecha_reserva=ocupada, hora_inicio=time(19),
+            hora_fin=time(20), numero_personas=2, proposito='Reunión', estado='CONFIRMADA'
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/areas/reservar/recurrente/', self.datos(), format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['creadas'], 19)
+        self.assertEqual(response.data['conflictos'], [
+            {'fecha': ocupada, 'motivo': 'El área ya está reservada en ese horario'}
+        ])
+        self.assertEqual(response.data['reservas'][0]['monto_total'], '15.00')
+        self.assertEqual(ReservaAreaComun.objects.filter(proposito='Clase de yoga').count(), 19)
+
+        # Con conflictos y sin omitirlos no se crea nada
+        response = self.client.post('/api/areas/reservar/recurrente/',
+                                    self.datos(omitir_conflictos=False, proposito='Otra'), format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(len(response.data['conflictos']), 20)
+        self.assertFalse(ReservaAreaComun.objects.filter(proposito='Otra').exists())
+
+    def test_fechas_mensuales_omiten_meses_cortos(self):
+        self.assertEqual(
+            fechas_recurrentes(date(2030, 1, 31), date(2030, 5, 31), 'MENSUAL'),
+            [date(2030, 1, 31), date(2030, 3, 31), date(2030, 5, 31)]
+        )
+
+    def test_limite_de_fechas_y_de_rango(self):
+        self.assertEqual(len(fechas_recurrentes(date(2030, 1, 1), date(9999, 12, 31), 'DIARIA')), 367)
+
+        for fecha_fin in [self.inicio + timedelta(days=800), date(9999, 12, 31)]:
+            response = self.client.post('/api/areas/reservar/recurrente/',
+                                        self.datos(frecuencia='MENSUAL', intervalo=12, fecha_fin=fecha_fin),
+                                        format='json')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('abarcar', str(response.data))
+
+    def test_solo_administradores(self):
+        self.perfil.tipo_usuario = self.tipo_propietario
+        self.perfil.save()
+        response = self.client.post('/api/areas/reservar/recurrente/', self.datos(), format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class CatalogosTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.crear_datos_base()
+        self.metodo_pago = MetodoPago.objects.create(condominio=self.condominio, nombre='QR')
+
+    def test_catalogo_en_cache_con_etag(self):
+        primera = self.client.get('/api/catalogos/areas/')
+        self.assertEqual([area['nombre'] for area in primera.data], ['Piscina'])
+
+        with self.assertNumQueries(1):  # Solo el perfil
+            segunda = self.client.get('/api/catalogos/areas/', HTTP_IF_NONE_MATCH=primera['ETag'])
+        self.assertEqual(segunda.status_code, 304)
+
+    def test_invalidacion_por_senales(self):
+        respuesta = self.client.get('/api/catalogos/')
+        self.assertEqual([m['nombre'] for m in respuesta.data['metodos_pago']], ['QR'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MetodoPago.objects.create(condominio=self.condominio, nombre='Efectivo')
+        nueva = self.client.get('/api/catalogos/', HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(nueva.status_code, 200)
+        self.assertEqual([m['nombre'] for m in nueva.data['metodos_pago']], ['Efectivo', 'QR'])
+
+    def test_version_descartada_no_revive_el_catalogo(self):
+        invalidar_catalogo('metodos_pago', self.condominio.id)
+        self.client.get('/api/catalogos/metodos_pago/')
+        cache.delete(f'catalogo:metodos_pago:{self.condominio.id}:version')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            MetodoPago.objects.create(condominio=self.condominio, nombre='Efectivo')
+        respuesta = self.client.get('/api/catalogos/metodos_pago/')
+        self.assertEqual([m['nombre'] for m in respuesta.data], ['Efectivo', 'QR'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.area.delete()
+        self.assertEqual(self.client.get('/api/areas/').data['areas_comunes'], [])
+
+    def test_acciones_rapidas_304(self):
+        etag = self.client.get('/api/quick-actions/')['ETag']
+        self.assertEqual(self.client.get('/api/quick-actions/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+
+class VistasCondicionalesTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.crear_datos_base()
+        self.crear_registros(3)
+
+    def test_304_con_una_consulta(self):
+        for url in ['/api/dashboard/', '/api/finanzas/', '/api/notificaciones/', '/api/perfil/']:
+            respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200)
+            with self.assertNumQueries(1):  # Solo las versiones
+                repetida = self.client.get(url, HTTP_IF_NONE_MATCH=respuesta['ETag'])
+            self.assertEqual(repetida.status_code, 304)
+            self.assertEqual(repetida['ETag'], respuesta['ETag'])
+
+    def test_etag_cambia_con_los_datos(self):
+        dashboard = self.client.get('/api/dashboard/')['ETag']
+        finanzas = self.client.get('/api/finanzas/')['ETag']
+        perfil = self.client.get('/api/perfil/')['ETag']
+
+        cuota = CuotaMantenimiento.objects.filter(unidad=self.unidad).first()
+        cuota.monto_extraordinario = Decimal('5.00')
+        cuota.save()
+        self.assertEqual(self.client.get('/api/dashboard/', HTTP_IF_NONE_MATCH=dashboard).status_code, 200)
+        self.assertEqual(self.client.get('/api/finanzas/', HTTP_IF_NONE_MATCH=finanzas).status_code, 200)
+        self.assertEqual(self.client.get('/api/perfil/', HTTP_IF_NONE_MATCH=perfil).status_code, 304)
+
+        self.client.put('/api/perfil/', {'telefono': '70000000'}, format='json')
+        self.assertEqual(self.client.get('/api/perfil/', HTTP_IF_NONE_MATCH=perfil).status_code, 200)
+
+    def test_etag_cambia_con_los_datos_anidados(self):
+        def etags():
+            return {url: self.client.get(url)['ETag'] for url in ['/api/dashboard/', '/api/finanzas/', '/api/perfil/']}
+
+        def vigentes(anteriores):
+            return {
+                url for url, etag in anteriores.items()
+                if self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+            }
+
+        anteriores = etags()
+        self.condominio.nombre = 'Condominio Renombrado'
+        self.condominio.save()
+        self.assertEqual(vigentes(anteriores), set())
+
+        anteriores = etags()
+        self.tipo_unidad.nombre = 'Dúplex'
+        self.tipo_unidad.save()
+        self.assertEqual(vigentes(anteriores), set())
+
+        anteriores = etags()
+        self.tipo_propietario.descripcion = 'Dueño'
+        self.tipo_propietario.save()
+        self.assertEqual(vigentes(anteriores), {'/api/finanzas/'})
+
+        anteriores = etags()
+        configuracion = CuotaMantenimiento.objects.filter(unidad=self.unidad).first().configuracion
+        configuracion.dias_gracia = 10
+        configuracion.save()
+        self.assertEqual(vigentes(anteriores), {'/api/perfil/'})
+
+        for objeto in [self.area, self.camara]:
+            anteriores = etags()
+            objeto.nombre = 'Renombrada'
+            objeto.save()
+            self.assertEqual(vigentes(anteriores), {'/api/finanzas/', '/api/perfil/'})
+
+    def test_etag_depende_de_la_vista_compacta(self):
+        completa = self.client.get('/api/dashboard/')['ETag']
+        self.assertEqual(
+            self.client.get('/api/dashboard/?view=compact', HTTP_IF_NONE_MATCH=completa).status_code, 200
+        )
+
+
+@mock.patch('comunidad.sincronizacion.MARGEN_CURSOR', timedelta(0))
+class SincronizacionTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+        self.crear_registros(3)
+        tipo = TipoComunicado.objects.create(tipo='GENERAL')
+        for estado in ['PUBLICADO', 'BORRADOR']:
+            Comunicado.objects.create(
+                condominio=self.condominio, tipo=tipo, titulo=estado, contenido='Aviso',
+                estado=estado, autor=self.perfil
+            )
+
+    def sincronizar(self, cursor=None):
+        respuesta = self.client.get('/api/sync/', {'since': cursor} if cursor else {})
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.data
+
+    def test_sincronizacion_completa(self):
+        datos = self.sincronizar()
+        self.assertTrue(datos['completa'])
+        self.assertFalse(datos['hay_mas'])
+        self.assertEqual(len(datos['cambios']['cuotas']), 3)
+        self.assertEqual(len(datos['cambios']['pagos']), 3)
+        self.assertEqual(len(datos['cambios']['reservas']), 3)
+        self.assertEqual([c['titulo'] for c in datos['cambios']['comunicados']], ['PUBLICADO'])
+
+    def test_solo_cambios_y_eliminados_desde_el_cursor(self):
+        cursor = self.sincronizar()['cursor']
+        vacia = self.sincronizar(cursor)
+        self.assertFalse(vacia['completa'])
+        self.assertTrue(all(not filas for filas in vacia['cambios'].values()))
+
+        cuota = CuotaMantenimiento.objects.filter(unidad=self.unidad).first()
+        cuota.monto_extraordinario = Decimal('5.00')
+        cuota.save()
+        reserva = ReservaAreaComun.objects.filter(usuario=self.perfil).first()
+        reserva_id = reserva.pk
+        reserva.delete()
+
+        datos = self.sincronizar(vacia['cursor'])
+        self.assertEqual([c['id'] for c in datos['cambios']['cuotas']], [cuota.id])
+        self.assertEqual(datos['eliminados']['reservas'], [reserva_id])
+        self.assertEqual(self.sincronizar(datos['cursor'])['eliminados']['reservas'], [])
+
+    def test_cambio_de_residencia_obliga_a_sincronizacion_completa(self):
+        cursor = self.sincronizar()['cursor']
+        ResidenciaUnidad.objects.filter(usuario=self.perfil).update(activa=False)
+        datos = self.sincronizar(cursor)
+        self.assertTrue(datos['completa'])
+        self.assertEqual(datos['cambios']['cuotas'], [])
+
+    def test_tablas_grandes_se_piden_en_varias_respuestas(self):
+        with mock.patch('comunidad.sincronizacion.LIMITE_POR_TABLA', 2):
+            primera = self.sincronizar()
+            self.assertTrue(primera['hay_mas'])
+            segunda = self.sincronizar(primera['cursor'])
+        self.assertFalse(segunda['completa'])
+        self.assertFalse(segunda['hay_mas'])
+        ids = [c['id'] for c in primera['cambios']['cuotas'] + segunda['cambios']['cuotas']]
+        self.assertEqual(sorted(ids), sorted(CuotaMantenimiento.objects.filter(unidad=self.unidad).values_list('id', flat=True)))
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.client.get('/api/sync/', {'since': 'no-es-un-cursor'}).status_code, 400)
+
+
+class BandejaNotificacionesTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+        self.vecino = PerfilUsuario.objects.create(
+            user=User.objects.create_user(username='vecino'), condominio=self.condominio,
+            tipo_usuario=self.tipo_propietario, ci='7654321'
+        )
+
+    def crear_alerta(self, nivel='ALTA'):
+        with self.captureOnCommitCallbacks(execute=True):
+            return AlertaSeguridad.objects.create(
+                condominio=self.condominio, camara=self.camara, tipo_alerta='OTRO',
+                nivel=nivel, descripcion='Movimiento en portería'
+            )
+
+    def test_alerta_llega_a_la_bandeja_de_todo_el_condominio(self):
+        self.crear_alerta()
+        self.crear_alerta(nivel='CRITICA')
+        self.assertEqual(NotificacionUsuario.objects.filter(usuario=self.vecino).count(), 2)
+
+        with self.assertNumQueries(3):  # Perfil con versiones, página y no leídas
+            respuesta = self.client.get('/api/notificaciones/')
+        self.assertEqual(respuesta.data['no_leidas'], 2)
+        self.assertEqual([n['tipo'] for n in respuesta.data['results']], ['EMERGENCIA', 'ALERTA'])
+
+        emergencias = self.client.get('/api/notificaciones/', {'tipo': 'emergencia'})
+        self.assertEqual(len(emergencias.data['results']), 1)
+
+    def test_marcar_leidas(self):
+        self.crear_alerta()
+        self.crear_alerta()
+        primera = NotificacionUsuario.objects.filter(usuario=self.perfil).first()
+
+        respuesta = self.client.post('/api/notificaciones/leer/', {'ids': [primera.id]}, format='json')
+        self.assertEqual(respuesta.data, {'actualizadas': 1, 'no_leidas': 1})
+        respuesta = self.client.post('/api/notificaciones/leer/', {}, format='json')
+        self.assertEqual(respuesta.data, {'actualizadas': 1, 'no_leidas': 0})
+        self.assertEqual(NotificacionUsuario.objects.filter(usuario=self.vecino, leida=False).count(), 2)
+
+    def test_comunicado_se_entrega_una_vez_a_su_audiencia(self):
+        tipo = TipoComunicado.objects.create(tipo='GENERAL')
+        with self.captureOnCommitCallbacks(execute=True):
+            comunicado = Comunicado.objects.create(
+                condominio=self.condominio, tipo=tipo, titulo='Asamblea', contenido='El jueves',
+                audiencia='PROPIETARIOS', estado='PUBLICADO', autor=self.perfil
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            comunicado.save()
+
+        self.assertEqual(
+            list(NotificacionUsuario.objects.values_list('usuario_id', 'tipo')), [(self.perfil.id, 'AVISO')]
+        )
+
+    def test_recordatorios_de_vencimiento(self):
+        self.crear_cuota(mes=1)
+        self.crear_cuota(mes=20)
+        call_command('recordar_vencimientos', stdout=StringIO())
+        call_command('recordar_vencimientos', stdout=StringIO())
+
+        recordatorios = NotificacionUsuario.objects.filter(usuario=self.perfil, tipo='PAGO')
+        self.assertEqual(recordatorios.count(), 1)
+        self.assertEqual(recordatorios.get().prioridad, 'ALTA')
+
+
+class TransporteMemoria(TransportePush):
+    """Guarda los envíos en memoria y los da por entregados"""
+    enviados = []
+
+    def enviar(self, tokens, mensaje):
+        self.enviados.append((list(tokens), mensaje))
+        return ResultadoEnvio(len(tokens), [])
+
+
+PUSH_PRUEBAS = {
+    **settings.PUSH_NOTIFICATIONS,
+    'TRANSPORTES': {'FIREBASE': 'comunidad.tests.TransporteMemoria', 'APNS': 'comunidad.tests.TransporteMemoria'},
+}
+
+
+@override_settings(PUSH_NOTIFICATIONS=PUSH_PRUEBAS)
+class DespachoPushTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+        TransporteMemoria.enviados.clear()
+        obtener_transporte.cache_clear()
+        self.addCleanup(obtener_transporte.cache_clear)
+        self.mediodia = timezone.make_aware(timezone.datetime(2030, 1, 10, 12, 0))
+        self.medianoche = self.mediodia.replace(hour=23)
+        for i in range(5):
+            perfil = PerfilUsuario.objects.create(
+                user=User.objects.create_user(username=f'vecino{i}'), condominio=self.condominio,
+                tipo_usuario=self.tipo_propietario, ci=f'900{i}'
+            )
+            ConfiguracionNotificaciones.objects.create(
+                usuario=perfil, token_firebase=f'fcm-{i}', token_apns=f'apns-{i}' if i % 2 else None,
+                recordatorios_pago=i != 0
+            )
+
+    def crear_notificacion(self, tipo='PAGO'):
+        return NotificacionPush.objects.create(
+            condominio=self.condominio, tipo=tipo, titulo='Aviso', mensaje='Texto', enviar_a_todos=True
+        )
+
+    def tokens_enviados(self):
+        return sorted(token for tokens, _ in TransporteMemoria.enviados for token in tokens)
+
+    def test_respeta_preferencias_y_se_envia_una_sola_vez(self):
+        notificacion = self.crear_notificacion()
+        resumen = despachar(notificacion, self.mediodia)
+        self.assertIsNone(despachar(notificacion, self.mediodia))
+
+        self.assertEqual(resumen['enviadas'], 6)  # 4 firebase (uno sin recordatorios) y 2 apns
+        self.assertNotIn('fcm-0', self.tokens_enviados())
+        notificacion.refresh_from_db()
+        self.assertEqual((notificacion.estado, notificacion.total_enviadas, notificacion.total_entregadas),
+                         ('ENVIADA', 6, 6))
+
+    def test_no_molestar_salvo_seguridad(self):
+        despachar(self.crear_notificacion(), self.medianoche)
+        self.assertEqual(self.tokens_enviados(), [])
+
+        despachar(self.crear_notificacion(tipo='SEGURIDAD'), self.medianoche)
+        self.assertEqual(len(self.tokens_enviados()), 7)
+
+    def test_no_molestar_posterga_hasta_que_termina(self):
+        resumen = despachar(self.crear_notificacion(), self.medianoche)
+        self.assertEqual((resumen['enviadas'], resumen['postergados']), (0, 4))
+
+        # Fin del horario por defecto (07:00) del día siguiente
+        fin = timezone.make_aware(timezone.datetime(2030, 1, 11, 7, 0))
+        copia = NotificacionPush.objects.get(estado='PENDIENTE')
+        self.assertEqual(copia.fecha_programada, fin)
+        self.assertEqual(despachar_pendientes(ahora=fin - timedelta(minutes=1)), [])
+
+        despachados = despachar_pendientes(ahora=fin)
+        self.assertEqual([(r['enviadas'], r['postergados']) for r in despachados], [(6, 0)])
+        self.assertEqual(len(self.tokens_enviados()), 6)
+        self.assertNotIn('fcm-0', self.tokens_enviados())
+
+    @override_settings(PUSH_NOTIFICATIONS={**PUSH_PRUEBAS, 'TAMAÑO_LOTE': 2})
+    def test_envia_por_lotes(self):
+        despachar(self.crear_notificacion(tipo='SEGURIDAD'), self.mediodia)
+        self.assertEqual(sorted(len(tokens) for tokens, _ in TransporteMemoria.enviados), [1, 2, 2, 2])
+
+    @override_settings(PUSH_NOTIFICATIONS=settings.PUSH_NOTIFICATIONS)
+    def test_sin_transporte_no_cuenta_entregas(self):
+        notificacion = self.crear_notificacion()
+        despachar(notificacion, self.mediodia)
+
+        notificacion.refresh_from_db()
+        self.assertEqual((notificacion.estado, notificacion.total_enviadas, notificacion.total_entregadas),
+                         ('FALLIDA', 6, 0))
+        self.assertEqual(TransporteMemoria.enviados, [])
+
+    def test_alerta_grave_genera_push(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            AlertaSeguridad.objects.create(
+                condominio=self.condominio, camara=self.camara, tipo_alerta='OTRO',
+                nivel='CRITICA', descripcion='Intrusión'
+            )
+            AlertaSeguridad.objects.create(
+                condominio=self.condominio, camara=self.camara, tipo_alerta='OTRO',
+                nivel='BAJA', descripcion='Movimiento'
+            )
+        self.assertEqual(len(despachar_pendientes()), 1)
+        self.assertEqual(len(self.tokens_enviados()), 7)
+
+
+class PublicacionProgramadaTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+        self.tipo = TipoComunicado.objects.create(tipo='GENERAL')
+        self.ahora = timezone.now()
+
+    def crear_comunicado(self, **campos):
+        return Comunicado.objects.create(
+            condominio=self.condominio, tipo=self.tipo, titulo='Corte de agua', contenido='El lunes',
+            autor=self.perfil, **campos
+        )
+
+    def test_publica_los_programados_vencidos(self):
+        listo = self.crear_comunicado(fecha_programada=self.ahora - timedelta(minutes=1), audiencia='PERSONALIZADA')
+        listo.unidades_especificas.add(self.unidad)
+        futuro = self.crear_comunicado(fecha_programada=self.ahora + timedelta(hours=1))
+        expirado = self.crear_comunicado(fecha_programada=self.ahora - timedelta(days=2),
+                                         fecha_expiracion=self.ahora - timedelta(days=1))
+
+        self.assertEqual(procesar_programacion(self.ahora), {'publicados': 1, 'archivados': 0})
+        self.assertEqual(procesar_programacion(self.ahora), {'publicados': 0, 'archivados': 0})
+
+        estados = dict(Comunicado.objects.values_list('id', 'estado'))
+        self.assertEqual([estados[listo.id], estados[futuro.id], estados[expirado.id]],
+                         ['PUBLICADO', 'BORRADOR', 'ARCHIVADO'])
+        self.assertEqual(NotificacionUsuario.objects.filter(referencia=f'comunicado:{listo.id}').count(), 1)
+        push = NotificacionPush.objects.get(tipo='COMUNICADO')
+        self.assertEqual(list(push.usuarios_destino.values_list('id', flat=True)), [self.perfil.id])
+
+    def test_archiva_los_expirados(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            comunicado = self.crear_comunicado(estado='PUBLICADO', fecha_expiracion=self.ahora - timedelta(minutes=1))
+        self.assertTrue(NotificacionPush.objects.get(tipo='COMUNICADO').enviar_a_todos)
+
+        self.assertEqual(procesar_programacion(self.ahora), {'publicados': 0, 'archivados': 1})
+        comunicado.refresh_from_db()
+        self.assertEqual(comunicado.estado, 'ARCHIVADO')
+        self.assertEqual(comunicado.fecha_actualizacion, self.ahora)
+
+
+class LecturasComunicadoTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+        buffer_lecturas.vaciar()
+        # Sin el hilo periódico, que escribiría con otra conexión fuera de la transacción de la prueba
+        iniciar = mock.patch.object(buffer_lecturas, 'iniciar')
+        iniciar.start()
+        self.addCleanup(iniciar.stop)
+        self.comunicado = Comunicado.objects.create(
+            condominio=self.condominio, tipo=TipoComunicado.objects.create(tipo='GENERAL'),
+            titulo='Asamblea', contenido='El jueves', estado='PUBLICADO', autor=self.perfil,
+            requiere_confirmacion_lectura=True
+        )
+        self.vecinos = [
+            PerfilUsuario.objects.create(
+                user=User.objects.create_user(username=f'vecino{i}'), condominio=self.condominio,
+                tipo_usuario=self.tipo_propietario, ci=f'800{i}'
+            ) for i in range(3)
+        ]
+
+    def test_lecturas_se_escriben_por_lote(self):
+        url = f'/api/comunicados/{self.comunicado.id}/leer/'
+        self.assertEqual(self.client.post(url, {}, format='json').status_code, 202)
+        self.client.post(url, {'confirmar': True}, format='json')
+        for vecino in self.vecinos:
+            buffer_lecturas.registrar(self.comunicado.id, vecino.id)
+        buffer_lecturas.registrar(self.comunicado.id, self.vecinos[0].id, confirmar=True)
+        self.assertFalse(LecturaComunicado.objects.exists())
+
+        # Inserción, confirmaciones y contadores del comunicado, más el savepoint
+        with self.assertNumQueries(5):
+            buffer_lecturas.vaciar()
+        buffer_lecturas.registrar(self.comunicado.id, self.perfil.id, confirmar=True)
+        buffer_lecturas.vaciar()
+
+        self.comunicado.refresh_from_db()
+        self.assertEqual((self.comunicado.veces_visto, self.comunicado.confirmaciones_lectura), (7, 2))
+        self.assertEqual(LecturaComunicado.objects.count(), 4)
+        self.assertEqual(LecturaComunicado.objects.filter(confirmado=True).count(), 2)
+
+    def test_vaciado_periodico_sin_nuevas_lecturas(self):
+        buffer = BufferLecturas(intervalo=0.05)
+        self.addCleanup(buffer.detener)
+        escrito = threading.Event()
+        with mock.patch('comunidad.lecturas.escribir_lecturas', side_effect=lambda *args: escrito.set()) as escribir:
+            buffer.registrar(self.comunicado.id, self.perfil.id)
+            self.assertTrue(escrito.wait(5))
+        self.assertEqual(escribir.call_args.args[0], {(self.comunicado.id, self.perfil.id)})
+
+    def test_comunicado_de_otro_condominio(self):
+        otro = Condominio.objects.create(nombre='Otro', direccion='Calle 2', nit='1000002')
+        Comunicado.objects.filter(pk=self.comunicado.pk).update(condominio=otro)
+        respuesta = self.client.post(f'/api/comunicados/{self.comunicado.id}/leer/', {}, format='json')
+        self.assertEqual(respuesta.status_code, 404)
+
+
+class ComentariosComunicadoTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+        self.comunicado = Comunicado.objects.create(
+            condominio=self.condominio, tipo=TipoComunicado.objects.create(tipo='GENERAL'),
+            titulo='Asamblea', contenido='El jueves', estado='PUBLICADO', autor=self.perfil
+        )
+
+    def comentar(self, contenido, padre=None, **campos):
+        return ComentarioComunicado.objects.create(
+            comunicado=self.comunicado, usuario=self.perfil, contenido=contenido, padre=padre, **campos
+        )
+
+    def test_arbol_paginado_por_hilo(self):
+        primero = self.comentar('1')
+        respuesta = self.comentar('1.1', primero)
+        self.comentar('1.1.1', respuesta)
+        self.comentar('1.2', primero)
+        oculto = self.comentar('1.3', primero, moderado=False)
+        self.comentar('1.3.1', oculto)
+        segundo = self.comentar('2')
+        self.comentar('2.1', segundo)
+        self.assertEqual(respuesta.hilo_id, primero.id)
+        self.assertEqual(ComentarioComunicado.objects.get(contenido='1.1.1').hilo_id, primero.id)
+
+        url = f'/api/comunicados/{self.comunicado.id}/comentarios/'
+        with mock.patch('comunidad.comentarios.HILOS_POR_PAGINA', 1):
+            with self.assertNumQueries(2):  # Visibilidad y comentarios
+                pagina = self.client.get(url).data
+            self.assertEqual(len(pagina['results']), 1)
+            hilo = pagina['results'][0]
+            self.assertEqual([r['contenido'] for r in hilo['respuestas']], ['1.1', '1.2'])
+            self.assertEqual(hilo['respuestas'][0]['respuestas'][0]['contenido'], '1.1.1')
+
+            siguiente = self.client.get(pagina['next']).data
+            self.assertEqual([h['contenido'] for h in siguiente['results']], ['2'])
+            self.assertIsNone(siguiente['next'])
+
+
+class ReconocimientoFacialTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+        cache.clear()
+        descartar_indices()
+        self.generador = np.random.default_rng(7)
+        self.perfiles = []
+        for i in range(20):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.perfiles.append(PerfilUsuario.objects.create(
+                    user=User.objects.create_user(username=f'vecino{i}'), condominio=self.condominio,
+                    tipo_usuario=self.tipo_propietario, ci=f'700{i}',
+                    facial_encoding=codificar_encoding(self.encoding())
+                ))
+
+    def encoding(self):
+        return self.generador.normal(0, 0.1, 128).tolist()
+
+    def parecido(self, binario):
+        return (decodificar_encoding(binario) + self.generador.normal(0, 0.005, 128)).tolist()
+
+    def test_identifica_el_lote_y_descarta_desconocidos(self):
+        buscado = self.perfiles[5]
+        resultados = identificar(self.condominio.id, [self.parecido(buscado.facial_encoding), self.encoding()])
+        self.assertEqual((resultados[0].tipo, resultados[0].id), ('usuario', buscado.id))
+        self.assertGreater(resultados[0].confianza, 90)
+        self.assertIsNone(resultados[1])
+
+    def test_indice_se_actualiza_sin_recargar(self):
+        indice = obtener_indice(self.condominio.id)
+        self.assertEqual(len(indice), 20)
+        baja, cambio = self.perfiles[0], self.perfiles[1]
+        with self.captureOnCommitCallbacks(execute=True):
+            baja.activo = False
+            baja.save()
+            cambio.facial_encoding = codificar_encoding(self.encoding())
+            cambio.save()
+            visitante = Visitante.objects.create(
+                nombre='Visita', ci='555', motivo_visita='Entrega', unidad_destino=self.unidad,
+                autorizado_por=self.perfil, facial_encoding=codificar_encoding(self.encoding())
+            )
+
+        with mock.patch.object(indice, 'cargar', side_effect=AssertionError('recarga completa')):
+            resultados = identificar(self.condominio.id, [
+                decodificar_encoding(baja.facial_encoding), self.parecido(cambio.facial_encoding),
+                decodificar_encoding(visitante.facial_encoding)
+            ])
+        self.assertIsNone(resultados[0])
+        self.assertEqual(resultados[1].id, cambio.id)
+        self.assertEqual((resultados[2].tipo, resultados[2].id), ('visitante', visitante.id))
+        self.assertEqual(len(indice), 20)
+
+    def test_cambio_registrado_en_otro_proceso(self):
+        obtener_indice(self.condominio.id)
+        baja = self.perfiles[2]
+        # El otro proceso tiene su propio cache local: este solo ve la versión en la base
+        with mock.patch('comunidad.reconocimiento.cache', LocMemCache('otro-proceso', {})):
+            with self.captureOnCommitCallbacks(execute=True):
+                baja.activo = False
+                baja.save()
+        self.assertIsNone(identificar(self.condominio.id, [decodificar_encoding(baja.facial_encoding)])[0])
+
+    def test_borrar_la_unidad_saca_a_sus_visitantes(self):
+        unidad = Unidad.objects.create(condominio=self.condominio, numero='301', tipo_unidad=self.tipo_unidad,
+                                       piso=3, porcentaje_propiedad=Decimal('5.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            visitante = Visitante.objects.create(
+                nombre='Visita', ci='556', motivo_visita='Entrega', unidad_destino=unidad,
+                autorizado_por=self.perfil, facial_encoding=codificar_encoding(self.encoding())
+            )
+        rostro = decodificar_encoding(visitante.facial_encoding)
+        self.assertEqual(identificar(self.condominio.id, [rostro])[0].id, visitante.id)
+
+        with mock.patch('comunidad.reconocimiento.cache', LocMemCache('otro-proceso', {})):
+            with self.captureOnCommitCallbacks(execute=True):
+                unidad.delete()
+        self.assertIsNone(identificar(self.condominio.id, [rostro])[0])
+
+    def test_carga_desde_binario(self):
+        PerfilUsuario.objects.filter(pk=self.perfiles[0].pk).update(facial_encoding=b'corrupto')
+        descartar_indices()
+        indice = obtener_indice(self.condominio.id)
+        self.assertEqual(len(indice), 19)
+        fila = indice.posiciones[('usuario', self.perfiles[1].id)]
+        np.testing.assert_array_equal(indice.matriz[fila], decodificar_encoding(self.perfiles[1].facial_encoding))
+
+    def test_endpoint_registra_accesos(self):
+        self.perfil.tipo_usuario = TipoUsuario.objects.create(tipo='SEGURIDAD')
+        self.perfil.save()
+        respuesta = self.client.post('/api/ia/reconocimiento-facial/', {
+            'encodings': [self.parecido(self.perfiles[3].facial_encoding), self.encoding()],
+            'tipo_acceso': 'ENTRADA', 'camara_id': self.camara.id,
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual([r['reconocido'] for r in respuesta.data['resultados']], [True, False])
+
+        registros = RegistroAcceso.objects.filter(metodo_identificacion='FACIAL').order_by('id')
+        self.assertEqual([(r.usuario_id, r.autorizado) for r in registros], [(self.perfiles[3].id, True), (None, False)])
+        self.assertIsNotNone(registros[0].confianza_ia)
+
+        invalido = self.client.post('/api/ia/reconocimiento-facial/', {
+            'encodings': [[0.1, 0.2]], 'tipo_acceso': 'ENTRADA'
+        }, format='json')
+        self.assertEqual(invalido.status_code, 400)
+
+
+class PlacasTests(DatosPruebaMixin, TestCase):
+
+    def setUp(self):
+        self.crear_datos_base()
+        cache.clear()
+        descartar_indices_placas()
+        self.vehiculo = self.crear_vehiculo('ABC-123')
+        self.crear_vehiculo('ABD-129')
+        self.visitante = Visitante.objects.create(
+            nombre='Visita', ci='555', motivo_visita='Entrega', unidad_destino=self.unidad,
+            autorizado_por=self.perfil, vehiculo_placa='XYZ789'
+        )
+
+    def crear_vehiculo(self, placa):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Vehiculo.objects.create(
+                propietario=self.perfil, placa=placa, tipo='AUTO', marca='Toyota',
+                modelo='Corolla', año=2020, color='Gris'
+            )
+
+    def resolver(self, *placas):
+        return [(r.entrada and r.entrada.id, r.coincidencia)
+                for r in resolver_lecturas(self.condominio.id, [{'placa': placa} for placa in placas])]
+
+    def test_tolera_errores_de_ocr(self):
+        self.assertEqual(self.resolver('abc 123', 'A8C1Z3', 'A8C12J', 'ABC1234', 'BC123', 'CBA123', 'XYZ-789', 'QQQ000'), [
+            (self.vehiculo.id, 'EXACTA'),
+            (self.vehiculo.id, 'OCR'),
+            (self.vehiculo.id, 'APROXIMADA'),  # Confusión del OCR más un carácter cambiado
+            (self.vehiculo.id, 'APROXIMADA'),
+            (self.vehiculo.id, 'APROXIMADA'),
+            (None, None),  # Dos cambios no se aceptan
+            (self.visitante.id, 'EXACTA'),
+            (None, None),
+        ])
+        # A distancia 1 de ABC123 y de ABD129: ambigua
+        self.assertEqual(self.resolver('ABC129'), [(None, None)])
+
+    def test_se_invalida_con_los_cambios(self):
+        with self.assertNumQueries(3):  # Versión, vehículos y visitantes
+            self.resolver('ABC123')
+        with self.assertNumQueries(1):  # Solo la versión
+            self.resolver('ABC123')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.vehiculo.activo = False
+            self.vehiculo.save()
+        nuevo = self.crear_vehiculo('JKL-456')
+        self.assertEqual(self.resolver('ABC123', 'JKL456'), [(None, None), (nuevo.id, 'EXACTA')])
+
+    def test_cambio_registrado_en_otro_proceso(self):
+        self.resolver('ABC123')
+        with mock.patch('comunidad.placas.cache', LocMemCache('otro-proceso', {})):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.vehiculo.activo = False
+                self.vehiculo.save()
+        self.assertEqual(self.resolver('ABC123'), [(None, None)])
+
+    def test_borrar_propietario_o_unidad_quita_sus_placas(self):
+        dueño = User.objects.create_user(username='dueño')
+        perfil = PerfilUsuario.objects.create(user=dueño, condominio=self.condominio,
+                                              tipo_usuario=self.tipo_propietario, ci='4444')
+        with self.captureOnCommitCallbacks(execute=True):
+            Vehiculo.objects.create(propietario=perfil, placa='MNO-321', tipo='AUTO', marca='Kia',
+                                    modelo='Rio', año=2021, color='Azul')
+        unidad = Unidad.objects.create(condominio=self.condominio, numero='301', tipo_unidad=self.tipo_unidad,
+                                       piso=3, porcentaje_propiedad=Decimal('5.00'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Visitante.objects.create(nombre='Visita', ci='556', motivo_visita='Entrega', unidad_destino=unidad,
+                                     autorizado_por=self.perfil, vehiculo_placa='RST654')
+        self.assertEqual([coincidencia for _, coincidencia in self.resolver('MNO321', 'RST654')], ['EXACTA', 'EXACTA'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            dueño.delete()
+            unidad.delete()
+        self.assertEqual(self.resolver('MNO321', 'RST654'), [(None, None), (None, None)])
+
+    def test_endpoint_registra_una_vez_por_placa(self):
+        self.perfil.tipo_usuario = TipoUsuario.objects.create(tipo='SEGURIDAD')
+        self.perfil.save()
+        datos = {
+            'lecturas': [{'placa': 'ABC123', 'confianza': '97.5'}, {'placa': 'A8C123'}, {'placa': 'NNN111'}],
+            'tipo_acceso': 'ENTRADA', 'camara_id': self.camara.id,
+        }
+        respuesta = self.client.post('/api/ia/deteccion-vehiculos/', datos, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([r['autorizado'] for r in respuesta.data['resultados']], [True, True, False])
+        self.assertEqual(respuesta.data['registros_creados'], 2)
+        self.assertEqual(self.client.post('/api/ia/deteccion-vehiculos/', datos, format='json').data['registros_creados'], 0)
+
+        registros = RegistroAcceso.objects.filter(metodo_identificacion='VEHICULAR').order_by('id')
+        self.assertEqual([(r.vehiculo_id, r.usuario_id, r.autorizado) for r in registros],
+                         [(self.vehiculo.id, self.perfil.id, True), (None, None, False)])
+        self.assertEqual(registros[0].confianza_ia, Decimal('97.5'))
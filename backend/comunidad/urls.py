@@ -10,6 +10,7 @@ router.register(r'unidades', views.UnidadViewSet)
 router.register(r'areas-comunes', views.AreaComunViewSet)
 router.register(r'camaras', views.CamaraSeguridadViewSet)
 router.register(r'alertas', views.AlertaSeguridadViewSet)
+router.register(r'accesos', views.RegistroAccesoViewSet)
 router.register(r'pagos', views.PagoViewSet)
 router.register(r'reservas', views.ReservaAreaComunViewSet)
 router.register(r'visitantes', views.VisitanteViewSet)
@@ -43,28 +44,56 @@ urlpatterns = [
     path('api/dashboard/', views.DashboardMovilAPIView.as_view(), name='dashboard-movil'),
     path('api/quick-actions/', views.QuickActionsAPIView.as_view(), name='quick-actions'),
     
+    # =====================================
+    # CATÁLOGOS (CACHE + ETAG)
+    # =====================================
+    path('api/catalogos/', views.CatalogosAPIView.as_view(), name='catalogos'),
+    path('api/catalogos/<str:nombre>/', views.CatalogosAPIView.as_view(), name='catalogo'),
+    
     # =====================================
     # GESTIÓN FINANCIERA
     # =====================================
     path('api/finanzas/', views.FinanzasAPIView.as_view(), name='finanzas'),
     path('api/finanzas/pagar/', views.ProcesarPagoAPIView.as_view(), name='procesar-pago'),
+    path('api/finanzas/generar-cuotas/', views.GenerarCuotasAPIView.as_view(), name='generar-cuotas'),
     
     # =====================================
     # ÁREAS COMUNES Y RESERVAS
     # =====================================
     path('api/areas/', views.AreasAPIView.as_view(), name='areas'),
     path('api/areas/reservar/', views.CrearReservaAPIView.as_view(), name='crear-reserva'),
+    path('api/areas/reservar/recurrente/', views.CrearReservaRecurrenteAPIView.as_view(), name='crear-reserva-recurrente'),
+    path('api/areas/disponibilidad/', views.DisponibilidadAreasAPIView.as_view(), name='disponibilidad-areas'),
+    path('api/areas/<int:area_id>/disponibilidad/', views.DisponibilidadAreasAPIView.as_view(), name='disponibilidad-area'),
     
     # =====================================
     # NOTIFICACIONES
     # =====================================
     path('api/notificaciones/', views.NotificacionesAPIView.as_view(), name='notificaciones'),
+    path('api/notificaciones/leer/', views.MarcarNotificacionesLeidasAPIView.as_view(), name='notificaciones-leer'),
+    
+    # =====================================
+    # COMUNICADOS
+    # =====================================
+    path('api/comunicados/<int:comunicado_id>/leer/', views.LeerComunicadoAPIView.as_view(), name='comunicado-leer'),
+    path('api/comunicados/<int:comunicado_id>/comentarios/', views.ComentariosComunicadoAPIView.as_view(), name='comunicado-comentarios'),
     
     # =====================================
     # PERFIL DE USUARIO
     # =====================================
     path('api/perfil/', views.PerfilAPIView.as_view(), name='perfil'),
     
+    # =====================================
+    # SINCRONIZACIÓN INCREMENTAL (APP MÓVIL)
+    # =====================================
+    path('api/sync/', views.SincronizacionAPIView.as_view(), name='sincronizacion'),
+    
+    # =====================================
+    # INTELIGENCIA ARTIFICIAL
+    # =====================================
+    path('api/ia/reconocimiento-facial/', views.ReconocimientoFacialView.as_view(), name='reconocimiento-facial'),
+    path('api/ia/deteccion-vehiculos/', views.DeteccionVehiculosView.as_view(), name='deteccion-vehiculos'),
+    
     # =====================================
     # ESTADÍSTICAS (PARA FRONTEND WEB)
     # =====================================
@@ -73,8 +102,6 @@ urlpatterns = [
     # =====================================
     # URLS PARA FUTURAS IMPLEMENTACIONES
     # =====================================
-    # path('api/ia/reconocimiento-facial/', views.ReconocimientoFacialView.as_view()),
-    # path('api/ia/deteccion-vehiculos/', views.DeteccionVehiculosView.as_view()),
     # path('api/ia/prediccion-morosidad/', views.PrediccionMorosidadView.as_view()),
     # path('api/reportes/financiero/', views.ReporteFinancieroView.as_view()),
     # path('api/reportes/seguridad/', views.ReporteSeguridadView.as_view()),
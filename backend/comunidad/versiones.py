@@ -0,0 +1,145 @@
+from datetime import date
+
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+
+from .etags import etag_de
+from .models import (
+    AlertaSeguridad, Condominio, CuotaMantenimiento, NotificacionUsuario, Pago, RegistroAcceso,
+    ReservaAreaComun, ResidenciaUnidad, TipoUsuario, Unidad, Vehiculo, VersionIndice
+)
+
+
+# Cada componente es (queryset correlacionado con el perfil, campo por el que
+# se agrupa, agregados). Max(fecha_modificacion) cambia con cada alta o
+# modificación y Count con cada baja. Las respuestas anidan el condominio, el
+# tipo de unidad, el área, la cámara y la configuración de expensas, así que
+# su fecha_modificacion también entra, en la misma subconsulta que las filas.
+COMPONENTES = {
+    'condominio': lambda: (
+        Condominio.objects.filter(pk=OuterRef('condominio_id')),
+        'pk', {'max': Max('fecha_modificacion')}
+    ),
+    'tipo_usuario': lambda: (
+        TipoUsuario.objects.filter(pk=OuterRef('tipo_usuario_id')),
+        'pk', {'max': Max('fecha_modificacion')}
+    ),
+    'residencias': lambda: (
+        ResidenciaUnidad.objects.filter(usuario=OuterRef('pk')),
+        'usuario', {'max': Max('fecha_modificacion'), 'n': Count('id')}
+    ),
+    'unidades': lambda: (
+        Unidad.objects.filter(residentes__usuario=OuterRef('pk'), residentes__activa=True),
+        'residentes__usuario', {
+            'max': Max('fecha_modificacion'),
+            'condominio': Max('condominio__fecha_modificacion'),
+            'tipo': Max('tipo_unidad__fecha_modificacion'),
+        }
+    ),
+    'saldos': lambda: (
+        Unidad.objects.filter(residentes__usuario=OuterRef('pk'), residentes__activa=True),
+        'residentes__usuario', {'max': Max('saldo__fecha_actualizacion')}
+    ),
+    'cuotas': lambda: (
+        CuotaMantenimiento.objects.filter(unidad__residentes__usuario=OuterRef('pk'), unidad__residentes__activa=True),
+        'unidad__residentes__usuario', {
+            'max': Max('fecha_modificacion'), 'n': Count('id'),
+            'configuracion': Max('configuracion__fecha_modificacion'),
+        }
+    ),
+    'pagos': lambda: (
+        Pago.objects.filter(cuota__unidad__residentes__usuario=OuterRef('pk'), cuota__unidad__residentes__activa=True),
+        'cuota__unidad__residentes__usuario', {'max': Max('fecha_modificacion'), 'n': Count('id')}
+    ),
+    'reservas': lambda: (
+        ReservaAreaComun.objects.filter(usuario=OuterRef('pk')),
+        'usuario', {'max': Max('fecha_modificacion'), 'n': Count('id'), 'area': Max('area_comun__fecha_modificacion')}
+    ),
+    'alertas': lambda: (
+        AlertaSeguridad.objects.filter(condominio=OuterRef('condominio_id')),
+        'condominio', {'max': Max('fecha_modificacion'), 'n': Count('id'), 'camara': Max('camara__fecha_modificacion')}
+    ),
+    'bandeja': lambda: (
+        NotificacionUsuario.objects.filter(usuario=OuterRef('pk')),
+        'usuario', {'max': Max('fecha_modificacion'), 'n': Count('id')}
+    ),
+    # Los accesos solo se insertan: alcanza con el último id
+    'accesos': lambda: (
+        RegistroAcceso.objects.filter(usuario=OuterRef('pk')),
+        'usuario', {'max': Max('id'), 'camara': Max('camara__fecha_modificacion')}
+    ),
+    'vehiculos': lambda: (
+        Vehiculo.objects.filter(propietario=OuterRef('pk')),
+        'propietario', {'max': Max('fecha_modificacion'), 'n': Count('id')}
+    ),
+}
+
+# Qué datos arma cada vista
+COMPONENTES_POR_VISTA = {
+    'dashboard': [
+        'condominio', 'tipo_usuario', 'residencias', 'unidades', 'saldos', 'cuotas', 'reservas', 'alertas', 'accesos'
+    ],
+    'finanzas': ['residencias', 'unidades', 'saldos', 'cuotas', 'pagos'],
+    'notificaciones': ['bandeja'],
+    'perfil': ['condominio', 'tipo_usuario', 'residencias', 'unidades', 'vehiculos'],
+}
+
+# Columnas propias del perfil (y de su usuario) que aparecen en las respuestas
+CAMPOS_PERFIL = ['pk', 'condominio_id', 'fecha_modificacion']
+CAMPOS_USUARIO = ['first_name', 'last_name', 'email']
+
+
+def _agregado(queryset, agrupar_por, expresion):
+    """Subconsulta escalar con un agregado sobre las filas del perfil"""
+    return Subquery(queryset.order_by().values(agrupar_por).annotate(valor=expresion).values('valor')[:1])
+
+
+def _anotaciones(vista):
+    anotaciones = {}
+    for componente in COMPONENTES_POR_VISTA[vista]:
+        queryset, agrupar_por, agregados = COMPONENTES[componente]()
+        for nombre, expresion in agregados.items():
+            anotaciones[f'version_{componente}_{nombre}'] = _agregado(queryset, agrupar_por, expresion)
+    return anotaciones
+
+
+def anotar_versiones(queryset, vista):
+    """
+    Agrega al queryset de perfiles las marcas de versión de los datos que arma
+    `vista`: subconsultas de agregados sobre índices, en la misma consulta que
+    trae el perfil. Con ellas se calcula el ETag antes de armar la respuesta.
+    """
+    return queryset.select_related('user').annotate(**_anotaciones(vista))
+
+
+def etag_vista(request, vista, perfil, *extra):
+    """
+    ETag de una vista por usuario a partir de un perfil anotado, sin armar la
+    respuesta. Incluye el día (las vistas calculan días restantes y
+    vencimientos), los parámetros de la consulta y lo que la vista agregue en
+    `extra`.
+    """
+    version = [getattr(perfil, campo) for campo in CAMPOS_PERFIL]
+    version += [getattr(perfil.user, campo) for campo in CAMPOS_USUARIO]
+    version += [valor for campo, valor in sorted(vars(perfil).items()) if campo.startswith('version_')]
+    return etag_de(vista, version, date.today(), sorted(request.query_params.lists()), *extra)
+
+
+# Versiones de los índices en memoria (comunidad.reconocimiento, comunidad.placas)
+
+def version_indice(condominio_id, indice):
+    """Versión del índice del condominio en la base; 0 si nunca cambió"""
+    return VersionIndice.objects.filter(
+        condominio_id=condominio_id, indice=indice
+    ).values_list('version', flat=True).first() or 0
+
+
+def incrementar_version_indice(condominio_id, indice):
+    """Incrementa la versión del índice con un UPDATE atómico y la devuelve"""
+    with transaction.atomic():
+        fila, creada = VersionIndice.objects.get_or_create(
+            condominio_id=condominio_id, indice=indice, defaults={'version': 1}
+        )
+        if not creada:
+            VersionIndice.objects.filter(pk=fila.pk).update(version=F('version') + 1)
+        return VersionIndice.objects.filter(pk=fila.pk).values_list('version', flat=True).get()
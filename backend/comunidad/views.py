@@ -1,6 +1,7 @@
 from django.shortcuts import render, get_object_or_404
 from django.contrib.auth.models import User
 from django.contrib.auth import login, logout
+from django.db import IntegrityError, connection, transaction
 from django.db.models import Q, Sum, Count
 from django.utils import timezone
 from datetime import date, timedelta, datetime
@@ -10,12 +11,63 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import api_view, permission_classes, action
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.authentication import JWTAuthentication
 
 from .models import *
 from .serializers import *
+from .consultas import optimizar_queryset
+from .paginacion import PaginacionPorFecha, PaginacionPorFechaHora, PaginacionPorFechaPago
+from .saldos import obtener_saldo
+from .versiones import anotar_versiones, etag_vista
+from .sincronizacion import ESTADOS_COMUNICADO_VISIBLES, CursorInvalido, sincronizar
+from .lecturas import buffer_lecturas
+from .comentarios import anidar, cargar_hilos
+from .reconocimiento import registrar_accesos_faciales
+from .placas import registrar_accesos_vehiculares
+from .catalogos import CATALOGOS, obtener_catalogo
+from .etags import coincide_etag, etag_de, respuesta_con_etag, respuesta_no_modificada
+from .expensas import generar_cuotas
+from .disponibilidad import (
+    ESTADOS_RESERVA_ACTIVOS, conflictos_recurrentes, costo_reserva, horario_permitido,
+    invalidar_disponibilidad, obtener_disponibilidad
+)
+
+
+# =====================================
+# VISTA COMPACTA (?view=compact)
+# =====================================
+
+def elegir_serializer(request, serializer_class, compacta_por_defecto=False):
+    """
+    Devuelve el serializer compacto equivalente si el cliente lo pidió con
+    ?view=compact (o ?view=full para forzar el anidado completo).
+    """
+    vista = request.query_params.get('view') if request is not None else None
+    compacta = compacta_por_defecto if vista is None else vista == 'compact'
+    if compacta:
+        return SERIALIZERS_COMPACTOS.get(serializer_class, serializer_class)
+    return serializer_class
+
+
+class VistaCompactaMixin:
+    """Permite a los ViewSets responder con serializers compactos en las lecturas"""
+    compacta_por_defecto = False
+    
+    def get_serializer_class(self):
+        serializer_class = super().get_serializer_class()
+        if self.request is not None and self.request.method in permissions.SAFE_METHODS:
+            return elegir_serializer(self.request, serializer_class, self.compacta_por_defecto)
+        return serializer_class
+
+
+class ConsultaOptimizadaMixin:
+    """Carga por adelantado las relaciones que recorre el serializer en uso"""
+    
+    def get_queryset(self):
+        return optimizar_queryset(super().get_queryset(), self.get_serializer_class())
 
 
 # =====================================
@@ -56,7 +108,7 @@ class LoginMovilAPIView(APIView):
             
             # Actualizar último acceso
             perfil.ultimo_acceso = timezone.now()
-            perfil.save()
+            perfil.save(update_fields=['ultimo_acceso', 'fecha_modificacion'])
             
             return Response({
                 'access_token': str(access_token),
@@ -107,7 +159,7 @@ class LoginWebAPIView(APIView):
             
             # Actualizar último acceso
             perfil.ultimo_acceso = timezone.now()
-            perfil.save()
+            perfil.save(update_fields=['ultimo_acceso', 'fecha_modificacion'])
             
             return Response({
                 'access_token': str(access_token),
@@ -152,7 +204,7 @@ class LoginAPIView(APIView):
             
             # Actualizar último acceso
             perfil.ultimo_acceso = timezone.now()
-            perfil.save()
+            perfil.save(update_fields=['ultimo_acceso', 'fecha_modificacion'])
             
             return Response({
                 'access_token': str(access_token),
@@ -226,91 +278,104 @@ class RegistroAPIView(APIView):
 # =====================================
 
 class DashboardMovilAPIView(APIView):
+    """
+    Dashboard de la aplicación móvil.
+
+    Se arma con un número fijo de consultas (perfil, residencia, cuotas abiertas,
+    reservas, alertas y accesos) sin importar cuántos registros tenga el residente:
+    cada consulta carga por adelantado todo lo que recorre su serializer.
+    Con ?view=compact las relaciones se devuelven como id más texto descriptivo.
+    Si el cliente manda el ETag de la respuesta anterior (If-None-Match) y nada
+    cambió, responde 304 con solo la consulta del perfil, que trae las versiones.
+    """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
+        perfil_serializer = elegir_serializer(request, PerfilUsuarioSerializer)
+        unidad_serializer = elegir_serializer(request, UnidadSerializer)
+        cuota_serializer = elegir_serializer(request, CuotaMantenimientoSerializer)
+        reserva_serializer = elegir_serializer(request, ReservaAreaComunSerializer)
+        alerta_serializer = elegir_serializer(request, AlertaSeguridadSerializer)
+        acceso_serializer = elegir_serializer(request, RegistroAccesoSerializer)
+        
         try:
-            perfil = PerfilUsuario.objects.get(user=request.user)
-            
-            # Unidad principal del usuario
-            residencia_principal = ResidenciaUnidad.objects.filter(
-                usuario=perfil, 
-                activa=True
-            ).first()
-            
-            # Cuota pendiente más próxima
-            cuota_pendiente = None
-            if residencia_principal:
-                cuota_pendiente = CuotaMantenimiento.objects.filter(
-                    unidad=residencia_principal.unidad,
-                    estado__in=['PENDIENTE', 'VENCIDA']
-                ).order_by('fecha_vencimiento').first()
-            
-            # Reservas activas
-            reservas_activas = ReservaAreaComun.objects.filter(
-                usuario=perfil,
-                estado='CONFIRMADA',
-                fecha_reserva__gte=date.today()
-            ).order_by('fecha_reserva')[:3]
-            
-            # Alertas recientes
-            alertas_recientes = AlertaSeguridad.objects.filter(
-                condominio=perfil.condominio,
-                revisada=False
-            ).order_by('-fecha_hora')[:5]
-            
-            # Accesos recientes del usuario
-            accesos_recientes = RegistroAcceso.objects.filter(
-                usuario=perfil
-            ).order_by('-fecha_hora')[:5]
-            
-            # Calcular balance total
-            balance_total = 0
-            if residencia_principal:
-                cuotas_pendientes = CuotaMantenimiento.objects.filter(
-                    unidad=residencia_principal.unidad,
-                    estado__in=['PENDIENTE', 'VENCIDA']
-                )
-                balance_total = cuotas_pendientes.aggregate(
-                    total=Sum('monto_pendiente')
-                )['total'] or 0
-            
-            # Próximos vencimientos
-            proximos_vencimientos = []
-            if residencia_principal:
-                cuotas_proximas = CuotaMantenimiento.objects.filter(
-                    unidad=residencia_principal.unidad,
-                    estado='PENDIENTE',
-                    fecha_vencimiento__lte=date.today() + timedelta(days=30)
-                ).order_by('fecha_vencimiento')[:3]
-                
-                for cuota in cuotas_proximas:
-                    dias_restantes = (cuota.fecha_vencimiento - date.today()).days
-                    proximos_vencimientos.append({
-                        'id': str(cuota.id),
-                        'descripcion': f"Cuota {cuota.configuracion.periodo_mes}/{cuota.configuracion.periodo_año}",
-                        'monto': cuota.monto_total,
-                        'fecha_vencimiento': cuota.fecha_vencimiento,
-                        'dias_restantes': dias_restantes
-                    })
-            
-            dashboard_data = {
-                'usuario': PerfilUsuarioSerializer(perfil).data,
-                'unidad_principal': UnidadSerializer(residencia_principal.unidad).data if residencia_principal else None,
-                'cuota_pendiente': CuotaMantenimientoSerializer(cuota_pendiente).data if cuota_pendiente else None,
-                'reservas_activas': ReservaAreaComunSerializer(reservas_activas, many=True).data,
-                'alertas_recientes': AlertaSeguridadSerializer(alertas_recientes, many=True).data,
-                'accesos_recientes': RegistroAccesoSerializer(accesos_recientes, many=True).data,
-                'balance_total': balance_total,
-                'proximos_vencimientos': proximos_vencimientos
-            }
-            
-            return Response(dashboard_data, status=status.HTTP_200_OK)
-            
+            perfil = anotar_versiones(optimizar_queryset(
+                PerfilUsuario.objects.all(), perfil_serializer
+            ), 'dashboard').get(user=request.user)
         except PerfilUsuario.DoesNotExist:
             return Response({
                 'error': 'Perfil de usuario no encontrado'
             }, status=status.HTTP_404_NOT_FOUND)
+        
+        etag = etag_vista(request, 'dashboard', perfil)
+        if coincide_etag(request, etag):
+            return respuesta_no_modificada(etag)
+        
+        hoy = date.today()
+        
+        # Unidad principal del usuario
+        residencia_principal = ResidenciaUnidad.objects.select_related(
+            'unidad__condominio', 'unidad__tipo_unidad', 'unidad__saldo'
+        ).filter(usuario=perfil, activa=True).first()
+        
+        # Cuotas abiertas de la unidad en una sola consulta: de ellas salen la cuota
+        # pendiente más próxima y los próximos vencimientos. El balance viene del
+        # libro de saldos, traído junto con la residencia
+        cuotas_abiertas = []
+        if residencia_principal:
+            cuotas_abiertas = list(optimizar_queryset(CuotaMantenimiento.objects.filter(
+                unidad=residencia_principal.unidad,
+                estado__in=['PENDIENTE', 'VENCIDA']
+            ), cuota_serializer).select_related('configuracion').order_by('fecha_vencimiento', 'id'))
+        
+        cuota_pendiente = cuotas_abiertas[0] if cuotas_abiertas else None
+        balance_total = obtener_saldo(residencia_principal.unidad).total_pendiente if residencia_principal else 0
+        
+        limite_vencimientos = hoy + timedelta(days=30)
+        proximos_vencimientos = []
+        for cuota in cuotas_abiertas:
+            if len(proximos_vencimientos) == 3:
+                break
+            if cuota.estado != 'PENDIENTE' or cuota.fecha_vencimiento > limite_vencimientos:
+                continue
+            proximos_vencimientos.append({
+                'id': str(cuota.id),
+                'descripcion': f"Cuota {cuota.configuracion.periodo_mes}/{cuota.configuracion.periodo_año}",
+                'monto': cuota.monto_total,
+                'fecha_vencimiento': cuota.fecha_vencimiento,
+                'dias_restantes': (cuota.fecha_vencimiento - hoy).days
+            })
+        
+        # Reservas activas
+        reservas_activas = optimizar_queryset(ReservaAreaComun.objects.filter(
+            usuario=perfil,
+            estado='CONFIRMADA',
+            fecha_reserva__gte=hoy
+        ), reserva_serializer).order_by('fecha_reserva')[:3]
+        
+        # Alertas recientes
+        alertas_recientes = optimizar_queryset(AlertaSeguridad.objects.filter(
+            condominio=perfil.condominio,
+            revisada=False
+        ), alerta_serializer).order_by('-fecha_hora')[:5]
+        
+        # Accesos recientes del usuario
+        accesos_recientes = optimizar_queryset(RegistroAcceso.objects.filter(
+            usuario=perfil
+        ), acceso_serializer).order_by('-fecha_hora')[:5]
+        
+        dashboard_data = {
+            'usuario': perfil_serializer(perfil).data,
+            'unidad_principal': unidad_serializer(residencia_principal.unidad).data if residencia_principal else None,
+            'cuota_pendiente': cuota_serializer(cuota_pendiente).data if cuota_pendiente else None,
+            'reservas_activas': reserva_serializer(reservas_activas, many=True).data,
+            'alertas_recientes': alerta_serializer(alertas_recientes, many=True).data,
+            'accesos_recientes': acceso_serializer(accesos_recientes, many=True).data,
+            'balance_total': balance_total,
+            'proximos_vencimientos': proximos_vencimientos
+        }
+        
+        return Response(dashboard_data, status=status.HTTP_200_OK, headers={'ETag': etag})
 
 
 # =====================================
@@ -322,8 +387,15 @@ class FinanzasAPIView(APIView):
     
     def get(self, request):
         try:
-            perfil = PerfilUsuario.objects.get(user=request.user)
-            residencia = ResidenciaUnidad.objects.filter(
+            perfil = anotar_versiones(PerfilUsuario.objects.all(), 'finanzas').get(user=request.user)
+            
+            # Los métodos de pago vienen del catálogo en cache y tienen su propio ETag
+            metodos_pago, etag_metodos = obtener_catalogo('metodos_pago', perfil.condominio_id)
+            etag = etag_vista(request, 'finanzas', perfil, etag_metodos)
+            if coincide_etag(request, etag):
+                return respuesta_no_modificada(etag)
+            
+            residencia = ResidenciaUnidad.objects.select_related('unidad__saldo').filter(
                 usuario=perfil, 
                 activa=True
             ).first()
@@ -333,58 +405,44 @@ class FinanzasAPIView(APIView):
                     'error': 'No se encontró unidad asociada'
                 }, status=status.HTTP_404_NOT_FOUND)
             
-            # Estadísticas financieras
-            cuotas_pendientes = CuotaMantenimiento.objects.filter(
+            # Estadísticas financieras desde el libro de saldos
+            saldo = obtener_saldo(residencia.unidad)
+            
+            cuotas_pendientes = list(optimizar_queryset(CuotaMantenimiento.objects.filter(
                 unidad=residencia.unidad,
                 estado__in=['PENDIENTE', 'VENCIDA']
-            )
+            ), CuotaMantenimientoSerializer))
             
             cuotas_pagadas = CuotaMantenimiento.objects.filter(
                 unidad=residencia.unidad,
                 estado='PAGADA'
             )
             
-            saldo_actual = cuotas_pendientes.aggregate(
-                total=Sum('monto_pendiente')
-            )['total'] or 0
-            
-            total_pagado_año = cuotas_pagadas.filter(
-                configuracion__periodo_año=date.today().year
-            ).aggregate(
-                total=Sum('monto_pagado')
-            )['total'] or 0
-            
             # Próxima cuota
-            proxima_cuota = cuotas_pendientes.order_by('fecha_vencimiento').first()
+            proxima_cuota = min(cuotas_pendientes, key=lambda cuota: cuota.fecha_vencimiento, default=None)
             
             # Historial de pagos recientes
-            pagos_recientes = Pago.objects.filter(
+            pagos_recientes = optimizar_queryset(Pago.objects.filter(
                 cuota__unidad=residencia.unidad,
                 estado='COMPLETADO'
-            ).order_by('-fecha_pago')[:10]
-            
-            # Métodos de pago disponibles
-            metodos_pago = MetodoPago.objects.filter(
-                condominio=perfil.condominio,
-                activo=True
-            )
+            ), PagoSerializer).order_by('-fecha_pago')[:10]
             
             datos_financieros = {
-                'saldo_actual': saldo_actual,
-                'cuotas_pendientes': cuotas_pendientes.count(),
-                'total_pendiente': saldo_actual,
+                'saldo_actual': saldo.total_pendiente,
+                'cuotas_pendientes': saldo.cuotas_pendientes,
+                'total_pendiente': saldo.total_pendiente,
                 'pagos_realizados_mes': cuotas_pagadas.filter(
                     fecha_ultimo_pago__month=date.today().month,
                     fecha_ultimo_pago__year=date.today().year
                 ).count(),
-                'total_pagado_año': total_pagado_año,
+                'total_pagado_año': saldo.pagado_año,
                 'proxima_cuota': CuotaMantenimientoSerializer(proxima_cuota).data if proxima_cuota else None,
                 'historial_pagos': PagoSerializer(pagos_recientes, many=True).data,
-                'metodos_pago': MetodoPagoSerializer(metodos_pago, many=True).data,
+                'metodos_pago': metodos_pago,
                 'cuotas_pendientes_detalle': CuotaMantenimientoSerializer(cuotas_pendientes, many=True).data
             }
             
-            return Response(datos_financieros, status=status.HTTP_200_OK)
+            return Response(datos_financieros, status=status.HTTP_200_OK, headers={'ETag': etag})
             
         except PerfilUsuario.DoesNotExist:
             return Response({
@@ -393,19 +451,52 @@ class FinanzasAPIView(APIView):
 
 
 class ProcesarPagoAPIView(APIView):
+    """
+    Registra un pago sobre una cuota.
+
+    La cuota se bloquea con select_for_update mientras se suma el pago, así dos
+    pagos simultáneos no se pisan. Si el cliente envía una clave de idempotencia
+    (cabecera Idempotency-Key o campo clave_idempotencia), un reintento con la
+    misma clave devuelve el pago original en lugar de cobrar otra vez.
+    """
     permission_classes = [IsAuthenticated]
     
     def post(self, request):
         serializer = CrearPagoSerializer(data=request.data)
-        if serializer.is_valid():
-            try:
-                perfil = PerfilUsuario.objects.get(user=request.user)
-                data = serializer.validated_data
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            perfil = PerfilUsuario.objects.get(user=request.user)
+        except PerfilUsuario.DoesNotExist:
+            return Response({
+                'error': 'Perfil de usuario no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        data = serializer.validated_data
+        clave = request.headers.get('Idempotency-Key') or data.get('clave_idempotencia') or None
+        
+        if clave:
+            pago = Pago.objects.filter(clave_idempotencia=clave).first()
+            if pago:
+                return self.respuesta_repetida(pago, perfil, data)
+        
+        metodo_pago = get_object_or_404(MetodoPago, id=data['metodo_pago_id'])
+        
+        try:
+            # Pago, cuota y saldo de la unidad se guardan en una sola transacción
+            with transaction.atomic():
+                cuota = get_object_or_404(
+                    CuotaMantenimiento.objects.select_for_update(), id=data['cuota_id']
+                )
                 
-                cuota = get_object_or_404(CuotaMantenimiento, id=data['cuota_id'])
-                metodo_pago = get_object_or_404(MetodoPago, id=data['metodo_pago_id'])
+                # Un reintento simultáneo con la misma clave espera el bloqueo y lo ve aquí
+                if clave:
+                    pago = Pago.objects.filter(clave_idempotencia=clave).first()
+                    if pago:
+                        return self.respuesta_repetida(pago, perfil, data)
                 
-                # Crear el pago
+                ahora = timezone.now()
                 pago = Pago.objects.create(
                     cuota=cuota,
                     metodo_pago=metodo_pago,
@@ -413,28 +504,74 @@ class ProcesarPagoAPIView(APIView):
                     numero_transaccion=str(uuid.uuid4()),
                     numero_comprobante=data.get('numero_comprobante', ''),
                     comprobante_imagen=data.get('comprobante_imagen'),
-                    fecha_pago=timezone.now(),
+                    fecha_pago=ahora,
                     estado='COMPLETADO',  # En producción, sería 'PENDIENTE' para verificación
                     registrado_por=perfil,
-                    observaciones=data.get('observaciones', '')
+                    observaciones=data.get('observaciones', ''),
+                    clave_idempotencia=clave
                 )
                 
-                # Actualizar la cuota
+                # Actualizar la cuota bloqueada (la señal post_save actualiza el saldo)
                 cuota.monto_pagado += data['monto_pagado']
-                cuota.fecha_ultimo_pago = timezone.now()
+                cuota.fecha_ultimo_pago = ahora
                 cuota.save()  # El save() actualiza automáticamente el estado
-                
-                return Response({
-                    'message': 'Pago procesado exitosamente',
-                    'pago': PagoSerializer(pago).data
-                }, status=status.HTTP_201_CREATED)
-                
-            except PerfilUsuario.DoesNotExist:
-                return Response({
-                    'error': 'Perfil de usuario no encontrado'
-                }, status=status.HTTP_404_NOT_FOUND)
+        except IntegrityError:
+            # Otra solicitud con la misma clave ganó la carrera en otra cuota
+            pago = Pago.objects.filter(clave_idempotencia=clave).first() if clave else None
+            if pago is None:
+                raise
+            return self.respuesta_repetida(pago, perfil, data)
         
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'message': 'Pago procesado exitosamente',
+            'pago': PagoSerializer(pago).data
+        }, status=status.HTTP_201_CREATED)
+    
+    def respuesta_repetida(self, pago, perfil, data):
+        """Respuesta a un reintento: el pago original, si la clave se usó con los mismos datos"""
+        if (pago.registrado_por_id != perfil.id or pago.cuota_id != data['cuota_id']
+                or pago.monto_pagado != data['monto_pagado']):
+            return Response({
+                'error': 'La clave de idempotencia ya se usó con otra solicitud'
+            }, status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+        
+        return Response({
+            'message': 'Pago procesado exitosamente',
+            'pago': PagoSerializer(pago).data
+        }, status=status.HTTP_201_CREATED, headers={'Idempotent-Replayed': 'true'})
+
+
+class GenerarCuotasAPIView(APIView):
+    """Genera en bloque las cuotas del período para el condominio del administrador"""
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        try:
+            perfil = PerfilUsuario.objects.select_related('tipo_usuario').get(user=request.user)
+        except PerfilUsuario.DoesNotExist:
+            return Response({
+                'error': 'Perfil de usuario no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        if perfil.tipo_usuario.tipo != 'ADMINISTRADOR':
+            return Response({
+                'error': 'Solo administradores pueden generar cuotas'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = GenerarCuotasSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        configuracion = get_object_or_404(
+            ConfiguracionExpensa,
+            condominio=perfil.condominio,
+            periodo_mes=serializer.validated_data['periodo_mes'],
+            periodo_año=serializer.validated_data['periodo_año'],
+            activa=True
+        )
+        
+        resumen = generar_cuotas(configuracion)
+        return Response(resumen, status=status.HTTP_201_CREATED if resumen['cuotas_creadas'] else status.HTTP_200_OK)
 
 
 # =====================================
@@ -448,21 +585,19 @@ class AreasAPIView(APIView):
         try:
             perfil = PerfilUsuario.objects.get(user=request.user)
             
-            # Áreas comunes disponibles
-            areas_comunes = AreaComun.objects.filter(
-                condominio=perfil.condominio,
-                activa=True
-            )
+            # Áreas comunes disponibles (catálogo en cache por condominio)
+            areas_comunes, etag_areas = obtener_catalogo('areas', perfil.condominio_id)
             
             # Reservas del usuario
-            reservas_usuario = ReservaAreaComun.objects.filter(
+            reservas_usuario = optimizar_queryset(ReservaAreaComun.objects.filter(
                 usuario=perfil
-            ).order_by('-fecha_reserva')[:10]
+            ), ReservaAreaComunSerializer).order_by('-fecha_reserva')[:10]
+            mis_reservas = ReservaAreaComunSerializer(reservas_usuario, many=True).data
             
-            return Response({
-                'areas_comunes': AreaComunSerializer(areas_comunes, many=True).data,
-                'mis_reservas': ReservaAreaComunSerializer(reservas_usuario, many=True).data
-            }, status=status.HTTP_200_OK)
+            return respuesta_con_etag(request, {
+                'areas_comunes': areas_comunes,
+                'mis_reservas': mis_reservas
+            }, etag_de(etag_areas, mis_reservas))
             
         except PerfilUsuario.DoesNotExist:
             return Response({
@@ -470,6 +605,45 @@ class AreasAPIView(APIView):
             }, status=status.HTTP_404_NOT_FOUND)
 
 
+class DisponibilidadAreasAPIView(APIView):
+    """
+    Franjas libres y ocupadas por día entre ?desde= y ?hasta= (por defecto los
+    próximos 30 días), de un área o de todas las del condominio
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, area_id=None):
+        parametros = DisponibilidadSerializer(data=request.query_params)
+        if not parametros.is_valid():
+            return Response(parametros.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            perfil = PerfilUsuario.objects.get(user=request.user)
+        except PerfilUsuario.DoesNotExist:
+            return Response({
+                'error': 'Perfil de usuario no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        areas = AreaComun.objects.filter(condominio_id=perfil.condominio_id, activa=True).order_by('nombre')
+        if area_id is not None:
+            areas = [get_object_or_404(areas, id=area_id)]
+        else:
+            areas = list(areas)
+        
+        desde, hasta = parametros.validated_data['desde'], parametros.validated_data['hasta']
+        disponibilidad = obtener_disponibilidad(areas, desde, hasta)
+        
+        resultado = [
+            {'area_id': area.id, 'nombre': area.nombre, 'dias': disponibilidad[area.id]}
+            for area in areas
+        ]
+        return Response({
+            'desde': desde,
+            'hasta': hasta,
+            **({'area': resultado[0]} if area_id is not None else {'areas': resultado})
+        }, status=status.HTTP_200_OK)
+
+
 class CrearReservaAPIView(APIView):
     permission_classes = [IsAuthenticated]
     
@@ -480,40 +654,46 @@ class CrearReservaAPIView(APIView):
                 perfil = PerfilUsuario.objects.get(user=request.user)
                 data = serializer.validated_data
                 
-                area_comun = get_object_or_404(AreaComun, id=data['area_comun_id'])
-                
-                # Verificar disponibilidad
-                reservas_existentes = ReservaAreaComun.objects.filter(
-                    area_comun=area_comun,
-                    fecha_reserva=data['fecha_reserva'],
-                    estado__in=['PENDIENTE', 'CONFIRMADA'],
-                    hora_inicio__lt=data['hora_fin'],
-                    hora_fin__gt=data['hora_inicio']
-                )
+                area_comun = get_object_or_404(AreaComun, id=data['area_comun_id'], activa=True)
                 
-                if reservas_existentes.exists():
+                if not horario_permitido(area_comun, data['fecha_reserva'], data['hora_inicio'], data['hora_fin']):
                     return Response({
-                        'error': 'El área no está disponible en ese horario'
+                        'error': 'El área no atiende en ese día u horario'
                     }, status=status.HTTP_400_BAD_REQUEST)
                 
                 # Calcular costo
-                horas = (datetime.combine(date.today(), data['hora_fin']) - 
-                        datetime.combine(date.today(), data['hora_inicio'])).seconds / 3600
-                monto_total = area_comun.precio_por_hora * horas
+                monto_total = costo_reserva(area_comun, data['hora_inicio'], data['hora_fin'])
                 
-                # Crear reserva
-                reserva = ReservaAreaComun.objects.create(
+                # En PostgreSQL la restricción de exclusión rechaza el solapamiento al
+                # insertar; en otros motores se mantiene la verificación previa
+                if connection.vendor != 'postgresql' and ReservaAreaComun.objects.filter(
                     area_comun=area_comun,
-                    usuario=perfil,
                     fecha_reserva=data['fecha_reserva'],
-                    hora_inicio=data['hora_inicio'],
-                    hora_fin=data['hora_fin'],
-                    numero_personas=data['numero_personas'],
-                    proposito=data['proposito'],
-                    observaciones=data.get('observaciones', ''),
-                    estado='CONFIRMADA',
-                    monto_total=monto_total
-                )
+                    estado__in=ESTADOS_RESERVA_ACTIVOS,
+                    hora_inicio__lt=data['hora_fin'],
+                    hora_fin__gt=data['hora_inicio']
+                ).exists():
+                    return self.respuesta_ocupada()
+                
+                # Crear reserva
+                try:
+                    with transaction.atomic():
+                        reserva = ReservaAreaComun.objects.create(
+                            area_comun=area_comun,
+                            usuario=perfil,
+                            fecha_reserva=data['fecha_reserva'],
+                            hora_inicio=data['hora_inicio'],
+                            hora_fin=data['hora_fin'],
+                            numero_personas=data['numero_personas'],
+                            proposito=data['proposito'],
+                            observaciones=data.get('observaciones', ''),
+                            estado='CONFIRMADA',
+                            monto_total=monto_total
+                        )
+                except IntegrityError as error:
+                    if RESERVA_SIN_SOLAPAMIENTO.name not in str(error):
+                        raise
+                    return self.respuesta_ocupada()
                 
                 return Response({
                     'message': 'Reserva creada exitosamente',
@@ -526,6 +706,87 @@ class CrearReservaAPIView(APIView):
                 }, status=status.HTTP_404_NOT_FOUND)
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    
+    def respuesta_ocupada(self):
+        return Response({
+            'error': 'El área no está disponible en ese horario'
+        }, status=status.HTTP_409_CONFLICT)
+
+
+class CrearReservaRecurrenteAPIView(APIView):
+    """
+    Crea todas las reservas de una regla de recurrencia en una sola llamada.
+    Las fechas se validan contra las reservas existentes con una consulta y
+    las libres se crean con un solo bulk_create; la respuesta detalla los
+    conflictos por fecha. Solo administradores.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        try:
+            perfil = PerfilUsuario.objects.select_related('tipo_usuario').get(user=request.user)
+        except PerfilUsuario.DoesNotExist:
+            return Response({
+                'error': 'Perfil de usuario no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        if perfil.tipo_usuario.tipo != 'ADMINISTRADOR':
+            return Response({
+                'error': 'Solo administradores pueden crear reservas recurrentes'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = CrearReservaRecurrenteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        
+        area_comun = get_object_or_404(
+            AreaComun, id=data['area_comun_id'], condominio_id=perfil.condominio_id, activa=True
+        )
+        conflictos = conflictos_recurrentes(area_comun, data['fechas'], data['hora_inicio'], data['hora_fin'])
+        detalle_conflictos = [{'fecha': fecha, 'motivo': motivo} for fecha, motivo in conflictos.items()]
+        
+        if conflictos and not data['omitir_conflictos']:
+            return Response({
+                'error': 'Algunas fechas no están disponibles; no se creó ninguna reserva',
+                'conflictos': detalle_conflictos
+            }, status=status.HTTP_409_CONFLICT)
+        
+        monto_total = costo_reserva(area_comun, data['hora_inicio'], data['hora_fin'])
+        reservas = [
+            ReservaAreaComun(
+                area_comun=area_comun,
+                usuario=perfil,
+                fecha_reserva=fecha,
+                hora_inicio=data['hora_inicio'],
+                hora_fin=data['hora_fin'],
+                numero_personas=data['numero_personas'],
+                proposito=data['proposito'],
+                observaciones=data.get('observaciones', ''),
+                estado='CONFIRMADA',
+                monto_total=monto_total
+            )
+            for fecha in data['fechas'] if fecha not in conflictos
+        ]
+        
+        try:
+            with transaction.atomic():
+                reservas = ReservaAreaComun.objects.bulk_create(reservas)
+                # bulk_create no dispara post_save
+                transaction.on_commit(lambda: invalidar_disponibilidad(area_comun.id))
+        except IntegrityError as error:
+            # Otra reserva entró entre la verificación y la inserción
+            if RESERVA_SIN_SOLAPAMIENTO.name not in str(error):
+                raise
+            return Response({
+                'error': 'El área se reservó mientras se procesaba la solicitud; intente nuevamente'
+            }, status=status.HTTP_409_CONFLICT)
+        
+        return Response({
+            'creadas': len(reservas),
+            'reservas': ReservaAreaComunCompactoSerializer(reservas, many=True).data,
+            'conflictos': detalle_conflictos
+        }, status=status.HTTP_201_CREATED if reservas else status.HTTP_409_CONFLICT)
 
 
 # =====================================
@@ -533,101 +794,134 @@ class CrearReservaAPIView(APIView):
 # =====================================
 
 class NotificacionesAPIView(APIView):
+    """
+    Bandeja de entrada del usuario, de la más reciente a la más antigua y
+    paginada por cursor. Las notificaciones ya están escritas por destinatario
+    (ver bandeja.py), así que cada página es un recorrido por el índice
+    (usuario, fecha). Filtros: ?tipo=ALERTA y ?no_leidas=true.
+    """
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
         try:
-            perfil = PerfilUsuario.objects.get(user=request.user)
-            
-            # Avisos administrativos (simulados)
-            avisos = [
-                {
-                    'id': str(uuid.uuid4()),
-                    'tipo': 'AVISO',
-                    'titulo': 'Corte de agua programado',
-                    'mensaje': 'Se realizará mantenimiento del sistema de agua el próximo martes de 8:00 AM a 12:00 PM.',
-                    'fecha': timezone.now() - timedelta(hours=2),
-                    'leida': False,
-                    'prioridad': 'MEDIA'
-                },
-                {
-                    'id': str(uuid.uuid4()),
-                    'tipo': 'AVISO',
-                    'titulo': 'Asamblea General Ordinaria',
-                    'mensaje': 'Se convoca a todos los propietarios a la asamblea que se realizará el 15 de diciembre a las 19:00 horas.',
-                    'fecha': timezone.now() - timedelta(days=1),
-                    'leida': True,
-                    'prioridad': 'ALTA'
-                }
-            ]
-            
-            # Alertas de seguridad reales
-            alertas_seguridad = AlertaSeguridad.objects.filter(
-                condominio=perfil.condominio
-            ).order_by('-fecha_hora')[:10]
-            
-            alertas = []
-            for alerta in alertas_seguridad:
-                alertas.append({
-                    'id': str(alerta.id),
-                    'tipo': 'ALERTA',
-                    'titulo': alerta.get_tipo_alerta_display(),
-                    'mensaje': alerta.descripcion,
-                    'fecha': alerta.fecha_hora,
-                    'leida': alerta.revisada,
-                    'prioridad': alerta.nivel
-                })
-            
-            # Emergencias (simuladas)
-            emergencias = [
-                {
-                    'id': str(uuid.uuid4()),
-                    'tipo': 'EMERGENCIA',
-                    'titulo': 'Falla en el ascensor principal',
-                    'mensaje': 'El ascensor principal está fuera de servicio. Se recomienda usar las escaleras.',
-                    'fecha': timezone.now() - timedelta(minutes=30),
-                    'leida': False,
-                    'prioridad': 'CRITICA'
-                }
-            ]
-            
-            # Notificaciones de pagos
-            pagos = []
-            residencia = ResidenciaUnidad.objects.filter(
-                usuario=perfil, 
-                activa=True
-            ).first()
-            
-            if residencia:
-                cuotas_vencen_pronto = CuotaMantenimiento.objects.filter(
-                    unidad=residencia.unidad,
-                    estado='PENDIENTE',
-                    fecha_vencimiento__lte=date.today() + timedelta(days=7)
-                )
-                
-                for cuota in cuotas_vencen_pronto:
-                    days_until = (cuota.fecha_vencimiento - date.today()).days
-                    pagos.append({
-                        'id': str(cuota.id),
-                        'tipo': 'PAGO',
-                        'titulo': f'Cuota próxima a vencer',
-                        'mensaje': f'Su cuota vence en {days_until} días. Monto: ${cuota.monto_total}',
-                        'fecha': timezone.now(),
-                        'leida': False,
-                        'prioridad': 'ALTA' if days_until <= 3 else 'MEDIA'
-                    })
-            
-            return Response({
-                'avisos': avisos,
-                'alertas': alertas,
-                'emergencias': emergencias,
-                'pagos': pagos
-            }, status=status.HTTP_200_OK)
-            
+            perfil = anotar_versiones(PerfilUsuario.objects.all(), 'notificaciones').get(user=request.user)
         except PerfilUsuario.DoesNotExist:
             return Response({
                 'error': 'Perfil de usuario no encontrado'
             }, status=status.HTTP_404_NOT_FOUND)
+        
+        etag = etag_vista(request, 'notificaciones', perfil)
+        if coincide_etag(request, etag):
+            return respuesta_no_modificada(etag)
+        
+        notificaciones = NotificacionUsuario.objects.filter(usuario=perfil)
+        tipo = request.query_params.get('tipo')
+        if tipo:
+            notificaciones = notificaciones.filter(tipo=tipo.upper())
+        if request.query_params.get('no_leidas', '').lower() in ('1', 'true', 'si', 'sí'):
+            notificaciones = notificaciones.filter(leida=False)
+        
+        paginador = PaginacionPorFecha()
+        pagina = paginador.paginate_queryset(notificaciones, request, view=self)
+        respuesta = paginador.get_paginated_response(NotificacionUsuarioSerializer(pagina, many=True).data)
+        respuesta.data['no_leidas'] = NotificacionUsuario.objects.filter(usuario=perfil, leida=False).count()
+        respuesta['ETag'] = etag
+        return respuesta
+
+
+class MarcarNotificacionesLeidasAPIView(APIView):
+    """Marca como leídas las notificaciones indicadas (o todas) con un solo UPDATE"""
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        serializer = MarcarLeidasSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        notificaciones = NotificacionUsuario.objects.filter(usuario__user=request.user, leida=False)
+        if 'ids' in serializer.validated_data:
+            notificaciones = notificaciones.filter(id__in=serializer.validated_data['ids'])
+        ahora = timezone.now()
+        actualizadas = notificaciones.update(leida=True, fecha_lectura=ahora, fecha_modificacion=ahora)
+        
+        return Response({
+            'actualizadas': actualizadas,
+            'no_leidas': NotificacionUsuario.objects.filter(usuario__user=request.user, leida=False).count()
+        }, status=status.HTTP_200_OK)
+
+
+# =====================================
+# COMUNICADOS
+# =====================================
+
+class LeerComunicadoAPIView(APIView):
+    """
+    Registra que el usuario abrió el comunicado y, si lo pide y el comunicado
+    la requiere, la confirmación de lectura. La escritura queda en el buffer de
+    lecturas y se hace por lotes, así que responde 202.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request, comunicado_id):
+        serializer = RegistrarLecturaSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        perfil = PerfilUsuario.objects.filter(user=request.user).values_list('id', 'condominio_id').first()
+        if perfil is None:
+            return Response({
+                'error': 'Perfil de usuario no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
+        perfil_id, condominio_id = perfil
+        
+        requiere_confirmacion = Comunicado.objects.filter(
+            pk=comunicado_id, condominio_id=condominio_id, estado__in=ESTADOS_COMUNICADO_VISIBLES
+        ).values_list('requiere_confirmacion_lectura', flat=True).first()
+        if requiere_confirmacion is None:
+            return Response({
+                'error': 'Comunicado no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        confirmar = serializer.validated_data['confirmar'] and requiere_confirmacion
+        buffer_lecturas.registrar(comunicado_id, perfil_id, confirmar=confirmar)
+        return Response({'registrada': True, 'confirmada': confirmar}, status=status.HTTP_202_ACCEPTED)
+
+
+class ComentariosComunicadoAPIView(APIView):
+    """
+    Comentarios del comunicado en árbol, paginados por hilo: cada página trae
+    hasta HILOS_POR_PAGINA comentarios raíz con todas sus respuestas anidadas,
+    en una sola consulta. La página siguiente se pide con ?despues=<id del
+    último hilo> (el enlace viene en `next`).
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, comunicado_id):
+        try:
+            despues = int(request.query_params['despues']) if 'despues' in request.query_params else None
+        except ValueError:
+            return Response({
+                'error': 'El parámetro despues debe ser un id'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        visible = Comunicado.objects.filter(
+            pk=comunicado_id, condominio__usuarios__user=request.user, estado__in=ESTADOS_COMUNICADO_VISIBLES
+        ).exists()
+        if not visible:
+            return Response({
+                'error': 'Comunicado no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        comentarios, hay_mas = cargar_hilos(comunicado_id, despues)
+        hilos = anidar(ComentarioComunicadoSerializer(comentarios, many=True).data)
+        siguiente = None
+        if hay_mas:
+            siguiente = replace_query_param(request.build_absolute_uri(), 'despues', hilos[-1]['id'])
+        
+        return Response({
+            'next': siguiente,
+            'results': hilos,
+        }, status=status.HTTP_200_OK)
 
 
 # =====================================
@@ -639,7 +933,11 @@ class PerfilAPIView(APIView):
     
     def get(self, request):
         try:
-            perfil = PerfilUsuario.objects.get(user=request.user)
+            perfil = anotar_versiones(PerfilUsuario.objects.all(), 'perfil').get(user=request.user)
+            
+            etag = etag_vista(request, 'perfil', perfil)
+            if coincide_etag(request, etag):
+                return respuesta_no_modificada(etag)
             
             # Información adicional
             vehiculos = Vehiculo.objects.filter(propietario=perfil, activo=True)
@@ -649,7 +947,7 @@ class PerfilAPIView(APIView):
                 'perfil': PerfilUsuarioSerializer(perfil).data,
                 'vehiculos': VehiculoSerializer(vehiculos, many=True).data,
                 'residencias': ResidenciaUnidadSerializer(residencias, many=True).data
-            }, status=status.HTTP_200_OK)
+            }, status=status.HTTP_200_OK, headers={'ETag': etag})
             
         except PerfilUsuario.DoesNotExist:
             return Response({
@@ -694,109 +992,292 @@ class PerfilAPIView(APIView):
             }, status=status.HTTP_404_NOT_FOUND)
 
 
+# =====================================
+# SINCRONIZACIÓN INCREMENTAL
+# =====================================
+
+class SincronizacionAPIView(APIView):
+    """
+    Cambios de cuotas, pagos, reservas, alertas, accesos y comunicados desde
+    ?since=<cursor> (el devuelto por la sincronización anterior), más los ids
+    eliminados. Sin cursor devuelve todo y `completa` en true. Si `hay_mas`
+    viene en true se vuelve a pedir con el cursor nuevo. Las filas van en la
+    vista compacta salvo ?view=full.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        try:
+            perfil = PerfilUsuario.objects.select_related('tipo_usuario').get(user=request.user)
+        except PerfilUsuario.DoesNotExist:
+            return Response({
+                'error': 'Perfil de usuario no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            datos = sincronizar(
+                perfil,
+                cursor=request.query_params.get('since'),
+                elegir_serializer=lambda serializer: elegir_serializer(request, serializer, compacta_por_defecto=True)
+            )
+        except CursorInvalido:
+            return Response({
+                'error': 'Cursor de sincronización inválido'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(datos, status=status.HTTP_200_OK)
+
+
 # =====================================
 # QUICK ACTIONS
 # =====================================
 
+# Estáticas: se sirven siempre con el mismo ETag
+ACCIONES_RAPIDAS = [
+    {
+        'id': 'pagar_cuota',
+        'titulo': 'Pagar Cuota',
+        'descripcion': 'Realizar pago de cuota mensual',
+        'icono': 'payment',
+        'color': '#4CAF50',
+        'disponible': True,
+        'url': '/api/finanzas/'
+    },
+    {
+        'id': 'reservar_area',
+        'titulo': 'Reservar Área',
+        'descripcion': 'Reservar área común',
+        'icono': 'event',
+        'color': '#2196F3',
+        'disponible': True,
+        'url': '/api/areas/'
+    },
+    {
+        'id': 'reportar_incidente',
+        'titulo': 'Reportar Incidente',
+        'descripcion': 'Reportar problema o incidente',
+        'icono': 'report_problem',
+        'color': '#FF9800',
+        'disponible': True,
+        'url': '/api/incidentes/'
+    },
+    {
+        'id': 'contactar_admin',
+        'titulo': 'Contactar Admin',
+        'descripcion': 'Enviar mensaje a administración',
+        'icono': 'message',
+        'color': '#9C27B0',
+        'disponible': True,
+        'url': '/api/mensajes/'
+    }
+]
+
+ETAG_ACCIONES_RAPIDAS = etag_de(ACCIONES_RAPIDAS)
+
+
 class QuickActionsAPIView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        actions = [
-            {
-                'id': 'pagar_cuota',
-                'titulo': 'Pagar Cuota',
-                'descripcion': 'Realizar pago de cuota mensual',
-                'icono': 'payment',
-                'color': '#4CAF50',
-                'disponible': True,
-                'url': '/api/finanzas/'
-            },
-            {
-                'id': 'reservar_area',
-                'titulo': 'Reservar Área',
-                'descripcion': 'Reservar área común',
-                'icono': 'event',
-                'color': '#2196F3',
-                'disponible': True,
-                'url': '/api/areas/'
-            },
-            {
-                'id': 'reportar_incidente',
-                'titulo': 'Reportar Incidente',
-                'descripcion': 'Reportar problema o incidente',
-                'icono': 'report_problem',
-                'color': '#FF9800',
-                'disponible': True,
-                'url': '/api/incidentes/'
-            },
-            {
-                'id': 'contactar_admin',
-                'titulo': 'Contactar Admin',
-                'descripcion': 'Enviar mensaje a administración',
-                'icono': 'message',
-                'color': '#9C27B0',
-                'disponible': True,
-                'url': '/api/mensajes/'
-            }
-        ]
+        return respuesta_con_etag(request, ACCIONES_RAPIDAS, ETAG_ACCIONES_RAPIDAS)
+
+
+class CatalogosAPIView(APIView):
+    """
+    Catálogos de lectura frecuente (áreas, métodos de pago, tipos de unidad y
+    de usuario) desde el cache del condominio, con ETag para respuestas 304
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request, nombre=None):
+        if nombre is not None and nombre not in CATALOGOS:
+            return Response({
+                'error': 'Catálogo no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            perfil = PerfilUsuario.objects.get(user=request.user)
+        except PerfilUsuario.DoesNotExist:
+            return Response({
+                'error': 'Perfil de usuario no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
         
-        return Response(actions, status=status.HTTP_200_OK)
+        if nombre is not None:
+            datos, etag = obtener_catalogo(nombre, perfil.condominio_id)
+            return respuesta_con_etag(request, datos, etag)
+        
+        catalogos = {nombre: obtener_catalogo(nombre, perfil.condominio_id) for nombre in CATALOGOS}
+        return respuesta_con_etag(
+            request,
+            {nombre: datos for nombre, (datos, _) in catalogos.items()},
+            etag_de(*(etag for _, etag in catalogos.values()))
+        )
 
 
 # =====================================
 # VIEWSETS PARA FRONTEND WEB
 # =====================================
 
-class UsuarioViewSet(viewsets.ModelViewSet):
+class UsuarioViewSet(ConsultaOptimizadaMixin, VistaCompactaMixin, viewsets.ModelViewSet):
     queryset = PerfilUsuario.objects.all()
     serializer_class = PerfilUsuarioSerializer
     permission_classes = [IsAuthenticated]
-    
-    def get_queryset(self):
-        queryset = PerfilUsuario.objects.select_related('user', 'condominio', 'tipo_usuario').all()
-        return queryset
 
-class UnidadViewSet(viewsets.ModelViewSet):
+class UnidadViewSet(ConsultaOptimizadaMixin, VistaCompactaMixin, viewsets.ModelViewSet):
     queryset = Unidad.objects.all()
     serializer_class = UnidadSerializer
     permission_classes = [IsAuthenticated]
 
-class AreaComunViewSet(viewsets.ModelViewSet):
+class AreaComunViewSet(ConsultaOptimizadaMixin, VistaCompactaMixin, viewsets.ModelViewSet):
     queryset = AreaComun.objects.all()
     serializer_class = AreaComunSerializer
     permission_classes = [IsAuthenticated]
 
-class CamaraSeguridadViewSet(viewsets.ModelViewSet):
+class CamaraSeguridadViewSet(ConsultaOptimizadaMixin, VistaCompactaMixin, viewsets.ModelViewSet):
     queryset = CamaraSeguridad.objects.all()
     serializer_class = CamaraSeguridadSerializer
     permission_classes = [IsAuthenticated]
 
-class AlertaSeguridadViewSet(viewsets.ModelViewSet):
+class AlertaSeguridadViewSet(ConsultaOptimizadaMixin, VistaCompactaMixin, viewsets.ModelViewSet):
     queryset = AlertaSeguridad.objects.all()
     serializer_class = AlertaSeguridadSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PaginacionPorFechaHora
+
+class RegistroAccesoViewSet(ConsultaOptimizadaMixin, VistaCompactaMixin, viewsets.ReadOnlyModelViewSet):
+    """Historial de accesos (solo lectura, paginado por cursor)"""
+    queryset = RegistroAcceso.objects.all()
+    serializer_class = RegistroAccesoSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = PaginacionPorFechaHora
 
-class PagoViewSet(viewsets.ModelViewSet):
+class PagoViewSet(ConsultaOptimizadaMixin, VistaCompactaMixin, viewsets.ModelViewSet):
     queryset = Pago.objects.all()
     serializer_class = PagoSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = PaginacionPorFechaPago
 
-class ReservaAreaComunViewSet(viewsets.ModelViewSet):
+class ReservaAreaComunViewSet(ConsultaOptimizadaMixin, VistaCompactaMixin, viewsets.ModelViewSet):
     queryset = ReservaAreaComun.objects.all()
     serializer_class = ReservaAreaComunSerializer
     permission_classes = [IsAuthenticated]
 
-class VisitanteViewSet(viewsets.ModelViewSet):
+class VisitanteViewSet(ConsultaOptimizadaMixin, VistaCompactaMixin, viewsets.ModelViewSet):
     queryset = Visitante.objects.all()
     serializer_class = VisitanteSerializer
     permission_classes = [IsAuthenticated]
 
-class VehiculoViewSet(viewsets.ModelViewSet):
+class VehiculoViewSet(ConsultaOptimizadaMixin, VistaCompactaMixin, viewsets.ModelViewSet):
     queryset = Vehiculo.objects.all()
     serializer_class = VehiculoSerializer
     permission_classes = [IsAuthenticated]
 
+# =====================================
+# INTELIGENCIA ARTIFICIAL
+# =====================================
+
+class ReconocimientoFacialView(APIView):
+    """
+    Identifica los rostros de una captura de la cámara de acceso contra los
+    residentes y visitantes activos del condominio (índice en memoria) y deja
+    un RegistroAcceso por rostro con la confianza del reconocimiento.
+    Solo para administración y personal de seguridad.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        try:
+            perfil = PerfilUsuario.objects.select_related('tipo_usuario').get(user=request.user)
+        except PerfilUsuario.DoesNotExist:
+            return Response({
+                'error': 'Perfil de usuario no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        if perfil.tipo_usuario.tipo not in ['ADMINISTRADOR', 'SEGURIDAD']:
+            return Response({
+                'error': 'Solo administración y seguridad pueden registrar accesos'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = ReconocimientoFacialSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        
+        camara_id = data.get('camara_id')
+        if camara_id is not None and not CamaraSeguridad.objects.filter(pk=camara_id, condominio=perfil.condominio_id).exists():
+            return Response({
+                'error': 'Cámara no encontrada'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        resultados = registrar_accesos_faciales(
+            perfil.condominio_id, data['encodings'], data['tipo_acceso'], camara_id=camara_id
+        )
+        return Response({
+            'resultados': [
+                {
+                    'reconocido': coincidencia is not None,
+                    'tipo': coincidencia.tipo if coincidencia else None,
+                    'id': coincidencia.id if coincidencia else None,
+                    'confianza': coincidencia.confianza if coincidencia else None,
+                    'registro_id': registro.id,
+                }
+                for coincidencia, registro in resultados
+            ]
+        }, status=status.HTTP_201_CREATED)
+
+
+class DeteccionVehiculosView(APIView):
+    """
+    Resuelve un lote de lecturas de placas de una cámara de barrera contra
+    los vehículos del condominio y los visitantes del día (índice en memoria,
+    tolerante a errores del OCR) y registra los accesos vehiculares. Solo
+    para administración y personal de seguridad.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        try:
+            perfil = PerfilUsuario.objects.select_related('tipo_usuario').get(user=request.user)
+        except PerfilUsuario.DoesNotExist:
+            return Response({
+                'error': 'Perfil de usuario no encontrado'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        if perfil.tipo_usuario.tipo not in ['ADMINISTRADOR', 'SEGURIDAD']:
+            return Response({
+                'error': 'Solo administración y seguridad pueden registrar accesos'
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = DeteccionVehiculosSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        
+        camara_id = data.get('camara_id')
+        if camara_id is not None and not CamaraSeguridad.objects.filter(pk=camara_id, condominio=perfil.condominio_id).exists():
+            return Response({
+                'error': 'Cámara no encontrada'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        resultados, registrados = registrar_accesos_vehiculares(
+            perfil.condominio_id, data['lecturas'], data['tipo_acceso'], camara_id=camara_id
+        )
+        return Response({
+            'resultados': [
+                {
+                    'placa_leida': resultado.lectura['placa'],
+                    'autorizado': resultado.entrada is not None,
+                    'placa': resultado.entrada.placa if resultado.entrada else None,
+                    'tipo': resultado.entrada.tipo if resultado.entrada else None,
+                    'id': resultado.entrada.id if resultado.entrada else None,
+                    'coincidencia': resultado.coincidencia,
+                }
+                for resultado in resultados
+            ],
+            'registros_creados': registrados,
+        }, status=status.HTTP_200_OK)
+
+
 # =====================================
 # API PARA ESTADÍSTICAS
 # =====================================
@@ -38,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'corsheaders',
@@ -100,6 +101,16 @@ DATABASES = {
 # }
 
 
+# Cache (memoria local por defecto; CACHE_BACKEND permite usar Redis/Memcached)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='condominio'),
+        'TIMEOUT': config('CACHE_TIMEOUT', default=300, cast=int),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -205,6 +216,7 @@ CORS_ALLOW_HEADERS = [
     'user-agent',
     'x-csrftoken',
     'x-requested-with',
+    'idempotency-key',
 ]
 
 # AI Services Configuration
@@ -213,6 +225,9 @@ AI_SERVICES = {
         'PROVIDER': 'AZURE',  # Options: AZURE, AWS, GOOGLE
         'API_KEY': '',
         'ENDPOINT': '',
+        # Comparación local de encodings (comunidad.reconocimiento)
+        'DIMENSION': config('FACE_DIMENSION', default=128, cast=int),
+        'UMBRAL_DISTANCIA': config('FACE_UMBRAL_DISTANCIA', default=0.6, cast=float),
     },
     'OCR_SERVICE': {
         'PROVIDER': 'AZURE',
@@ -226,6 +241,18 @@ AI_SERVICES = {
     }
 }
 
+# Push Notifications
+# Cada plataforma usa el transporte indicado por ruta; TransporteNulo no envía nada
+PUSH_NOTIFICATIONS = {
+    'TRANSPORTES': {
+        'FIREBASE': config('PUSH_TRANSPORTE_FIREBASE', default='comunidad.push.TransporteNulo'),
+        'APNS': config('PUSH_TRANSPORTE_APNS', default='comunidad.push.TransporteNulo'),
+    },
+    'FCM_CREDENCIALES': config('FCM_CREDENCIALES', default=''),
+    'TAMAÑO_LOTE': config('PUSH_TAMANO_LOTE', default=500, cast=int),
+    'CONCURRENCIA': config('PUSH_CONCURRENCIA', default=8, cast=int),
+}
+
 # Security Settings
 SECURE_SSL_REDIRECT = False  # Set to True in production
 SECURE_BROWSER_XSS_FILTER = True
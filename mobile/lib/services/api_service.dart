@@ -1,4 +1,5 @@
 import 'dart:convert';
+import 'dart:math';
 import 'package:http/http.dart' as http;
 import 'package:shared_preferences/shared_preferences.dart';
 
@@ -12,6 +13,9 @@ class ApiService {
   static String? _accessToken;
   static String? _refreshToken;
 
+  // Última respuesta de cada GET con su ETag, para pedirla con If-None-Match
+  static final Map<String, http.Response> _respuestasConEtag = {};
+
   // Headers comunes
   static Map<String, String> get _headers => {
     'Content-Type': 'application/json',
@@ -40,6 +44,7 @@ class ApiService {
     final prefs = await SharedPreferences.getInstance();
     _accessToken = null;
     _refreshToken = null;
+    _respuestasConEtag.clear();
     await prefs.remove('access_token');
     await prefs.remove('refresh_token');
   }
@@ -83,7 +88,18 @@ class ApiService {
     try {
       switch (method.toUpperCase()) {
         case 'GET':
-          response = await http.get(url, headers: _headers);
+          final anterior = _respuestasConEtag[endpoint];
+          response = await http.get(url, headers: {
+            ..._headers,
+            if (anterior != null) 'If-None-Match': anterior.headers['etag']!,
+          });
+          // 304: los datos no cambiaron, se reutiliza la respuesta anterior
+          if (response.statusCode == 304 && anterior != null) {
+            return anterior;
+          }
+          if (response.statusCode == 200 && response.headers['etag'] != null) {
+            _respuestasConEtag[endpoint] = response;
+          }
           break;
         case 'POST':
           response = await http.post(
@@ -220,18 +236,35 @@ class ApiService {
     return null;
   }
 
-  static Future<Map<String, dynamic>?> procesarPago(Map<String, dynamic> pagoData) async {
+  // Clave de idempotencia de un pago: se crea una vez al iniciar el pago y se
+  // reenvía igual en cada reintento, así el servidor no lo registra dos veces
+  static String nuevaClaveIdempotencia() {
+    final aleatorio = Random.secure();
+    final bytes = List<int>.generate(16, (_) => aleatorio.nextInt(256));
+    return bytes.map((b) => b.toRadixString(16).padLeft(2, '0')).join();
+  }
+
+  // Si el resultado es sinRespuesta no se sabe si el pago quedó registrado:
+  // se reintenta con la misma claveIdempotencia y el servidor devuelve el
+  // pago original en lugar de crear otro
+  static Future<ResultadoPago> procesarPago(
+    Map<String, dynamic> pagoData, {
+    required String claveIdempotencia,
+  }) async {
     final response = await _makeRequest(
       'POST',
       '/api/finanzas/pagar/',
-      body: pagoData,
+      body: {...pagoData, 'clave_idempotencia': claveIdempotencia},
     );
-    
-    if (response?.statusCode == 201) {
-      return jsonDecode(response!.body);
+
+    // Sin respuesta, o un error del servidor: no confirma ni descarta el pago
+    if (response == null || response.statusCode >= 500) {
+      return ResultadoPago(statusCode: response?.statusCode, sinRespuesta: true);
     }
-    
-    return null;
+    return ResultadoPago(
+      statusCode: response.statusCode,
+      datos: jsonDecode(response.body),
+    );
   }
 
   // =====================================
@@ -276,6 +309,56 @@ class ApiService {
     return null;
   }
 
+  // Sin ids se marcan todas
+  static Future<Map<String, dynamic>?> marcarNotificacionesLeidas([List<int>? ids]) async {
+    final response = await _makeRequest(
+      'POST',
+      '/api/notificaciones/leer/',
+      body: ids == null ? {} : {'ids': ids},
+    );
+    
+    if (response?.statusCode == 200) {
+      return jsonDecode(response!.body);
+    }
+    
+    return null;
+  }
+
+  // =====================================
+  // COMUNICADOS
+  // =====================================
+
+  // Registrar que se abrió un comunicado (y confirmar la lectura si lo pide)
+  static Future<bool> registrarLecturaComunicado(int comunicadoId, {bool confirmar = false}) async {
+    final response = await _makeRequest(
+      'POST',
+      '/api/comunicados/$comunicadoId/leer/',
+      body: {'confirmar': confirmar},
+    );
+    
+    return response?.statusCode == 202;
+  }
+
+  // =====================================
+  // SINCRONIZACIÓN INCREMENTAL
+  // =====================================
+
+  // Cambios desde el cursor de la sincronización anterior (null la primera vez).
+  // Si la respuesta trae 'completa' hay que reemplazar la copia local; si trae
+  // 'hay_mas' se vuelve a llamar con el cursor nuevo.
+  static Future<Map<String, dynamic>?> sincronizar(String? cursor) async {
+    final endpoint = cursor == null
+        ? '/api/sync/'
+        : '/api/sync/?since=${Uri.encodeQueryComponent(cursor)}';
+    final response = await _makeRequest('GET', endpoint);
+    
+    if (response?.statusCode == 200) {
+      return jsonDecode(response!.body);
+    }
+    
+    return null;
+  }
+
   // =====================================
   // PERFIL
   // =====================================
@@ -324,4 +407,18 @@ class ApiService {
       return false;
     }
   }
-}
\ No newline at end of file
+}
+
+// Resultado de ApiService.procesarPago
+class ResultadoPago {
+  final int? statusCode;
+  final Map<String, dynamic>? datos;
+
+  // La respuesta se perdió (sin conexión, tiempo agotado) o el servidor falló:
+  // reintentar con la misma clave de idempotencia
+  final bool sinRespuesta;
+
+  const ResultadoPago({this.statusCode, this.datos, this.sinRespuesta = false});
+
+  bool get exitoso => statusCode == 201;
+}